@@ -1,74 +1,182 @@
 import logging
 import sys
 import json
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
-from prompts import format_text_bullet_prompt, format_text_highlight_prompt
+from prompts import (
+    format_prompt_messages, format_analysis_prompt, format_window_summary_prompt, format_summary_reduce_prompt
+)
+from transcript_windows import split_transcript_windows, merge_window_bullets
+from llm_cache import ResponseCache, make_cache_key
+from token_budget import plan_extraction, count_message_tokens
+from retry_policy import retrying, CircuitOpenError
+import deadlines
+from deadlines import DeadlineExceeded, hedged_call
+from prefilter import prefilter_transcript, target_aliases
+from model_router import ESCALATED_SUFFIX, cascade_models, tier_of, validate_bullets
+from quote_index import format_timestamp
+from transcript_codec import TRANSCRIPT_ENCODING_COMPACT, encode_transcript
+from incremental import ExtractionState
+from structured_output import (
+    OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_DELIMITED, StructuredOutputError,
+    JsonBulletStreamParser, parse_json_response, response_format,
+)
+from openai_clients import get_openai_client
+import llm_metrics
 
 # --- Dependency Checks ---
 try:
-    import openai
-    # Explicitly import the required classes and exceptions from the openai library
-    from openai import OpenAI, APIError, AuthenticationError, RateLimitError
-    from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+    import httpx
+    # Explicitly import the required exceptions from the openai library
+    from openai import APIError, AuthenticationError, RateLimitError, BadRequestError
 except ImportError:
     # You might want to refine this error message to pinpoint which library failed
     # For example:
     # except ImportError as e:
     #     print(f"ERROR: Required library import failed: {e}. ", file=sys.stderr)
-    #     print("Ensure 'openai' and 'tenacity' are installed: pip install openai tenacity", file=sys.stderr)
+    #     print("Ensure 'openai' and 'httpx' are installed: pip install openai httpx", file=sys.stderr)
     print(
-        "ERROR: Required libraries ('openai', 'tenacity') not found or failed to import. "
-        "Install using: pip install openai tenacity",
+        "ERROR: Required libraries ('openai', 'httpx') not found or failed to import. "
+        "Install using: pip install openai httpx",
         file=sys.stderr
     )
     sys.exit(1)
 
-# --- Helper for Tenacity Retry Logging ---
-def _log_retry_attempt(retry_state):
+# Shared on-disk cache of deterministic (temperature 0) extraction responses
+_response_cache = ResponseCache(
+    Config.LLM_CACHE_DIR,
+    max_bytes=Config.LLM_CACHE_MAX_MB * 1024 * 1024,
+    max_age_seconds=Config.LLM_CACHE_MAX_AGE_DAYS * 24 * 3600,
+    enabled=Config.LLM_CACHE_ENABLED,
+)
+NO_RELEVANT_STATEMENTS = "no relevant statements"  # Window summary reply for a section without the target
+
+def _latency_target() -> Optional[float]:
+    """The planner's latency target: the configured one, tightened to the time left on the deadline."""
+    targets = [t for t in (Config.EXTRACTION_TARGET_LATENCY_SECONDS, deadlines.remaining()) if t]
+    return max(min(targets), 0.0) if targets else None
+
+
+def _request_tokens(client, messages: List[Dict[str, str]], *args, **kwargs) -> int:
+    """Estimated prompt tokens of a chat request, for pacing against the rate-limit budget."""
+    return count_message_tokens(messages, kwargs.get("model"))
+
+@retrying("openai", max_attempts=4, tokens=_request_tokens)
+def _summary_completion(client, messages: List[Dict[str, str]], label: str, model: Optional[str] = None) -> str:
+    """Calls the Chat Completions API for a plain-text summary and records its token usage."""
+    model = model or Config.ANALYSIS_MODEL
+    started = time.perf_counter()
+    response = client.with_options(timeout=deadlines.call_timeout()).chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.0, # Lower temperature for more factual, less creative output
+    )
+    llm_metrics.record_call(label, model, getattr(response, "usage", None), time.perf_counter() - started)
+    return (response.choices[0].message.content or "").strip()
+
+
+def _cached_summary(client, prompt: str, label: str, use_cache: bool = True, kind: str = "analysis") -> str:
     """
-    Logs details of a retry attempt for API calls using tenacity.
+    Runs one summary prompt, answering identical prompts from the response cache.
 
-    Args:
-        retry_state: The state object provided by tenacity.
+    A window's prompt depends only on its text and the target, so an
+    unchanged window is served from the cache across edits and across
+    reports on the same video.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    model = Config.ANALYSIS_MODEL
+    cache_key = make_cache_key(model, messages, prompt_type=kind, temperature=0.0)
+    if use_cache:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"{label} served from cache.")
+            return cached["parsed"]
+    content = _summary_completion(client, messages, label, model)
+    if content:
+        _response_cache.put(cache_key, content, content, model=model)
+    return content
+
+
+def _summarize_hierarchically(client, transcript_text: str, target_name: str, use_cache: bool = True) -> str:
     """
-    exc = retry_state.outcome.exception()
-    wait_time = getattr(retry_state.next_action, 'sleep', 0)
-    logging.warning(
-        f"API Error encountered: {exc}. Retrying attempt "
-        f"{retry_state.attempt_number} after {wait_time:.2f} seconds..."
+    Map-reduce summary: one summary per transcript window, run in parallel,
+    then reduced Config.SUMMARY_REDUCE_FANIN at a time until one remains.
+
+    Windows use the same fixed time grid as windowed extraction, so an edit
+    only changes the summaries of the windows it touches.
+    """
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
     )
+    logging.info(f"Hierarchical summary over {len(windows)} windows")
+
+    def _section(window) -> Tuple[str, str]:
+        if window.start_seconds is None:
+            return f"part {window.index + 1}", f"part {window.index + 1}"
+        return format_timestamp(window.start_seconds), format_timestamp(window.end_seconds)
+
+    def _summarize_window(window):
+        start, end = _section(window)
+        prompt = format_window_summary_prompt(window.text, target_name, f"{start} to {end}")
+        summary = _cached_summary(client, prompt, f"summary window {window.index + 1}", use_cache, "window_summary")
+        return start, end, summary
+
+    def _reduce(group):
+        sections = [f"Section {start} to {end}:\n{summary}" for start, end, summary in group]
+        label = f"summary reduce {group[0][0]} to {group[-1][1]}"
+        prompt = format_summary_reduce_prompt(sections, target_name)
+        return group[0][0], group[-1][1], _cached_summary(client, prompt, label, use_cache, "summary_reduce")
+
+    fan_in = max(Config.SUMMARY_REDUCE_FANIN, 2)
+    with ThreadPoolExecutor(max_workers=Config.EXTRACTION_MAX_WORKERS) as executor:
+        summaries = list(executor.map(deadlines.bind(_summarize_window), windows))
+        # Sections with nothing about the target add nothing to the reduce step
+        summaries = [s for s in summaries if s[2] and not s[2].lower().startswith(NO_RELEVANT_STATEMENTS)]
+        if not summaries:
+            return f"No relevant statements by or about {target_name} were found in the transcript."
+        while True:
+            groups = [summaries[i:i + fan_in] for i in range(0, len(summaries), fan_in)]
+            summaries = list(executor.map(deadlines.bind(_reduce), groups))
+            if len(summaries) == 1:
+                return summaries[0][2]
+
 
 # --- Core Function ---
-@retry(
-    wait=wait_random_exponential(min=3, max=30), # Wait 3-30 seconds between retries
-    stop=stop_after_attempt(4), # Retry up to 3 times (4 attempts total)
-    retry=retry_if_exception_type((APIError, RateLimitError)), # Retry on API errors & rate limits
-    after=_log_retry_attempt, # Log on retries
-    reraise=True # Re-raise the exception if all retries fail
-)
-# Retry Behavior Documentation:
-# - Exponential backoff between retries (3-30s)
-# - Maximum of 4 total attempts (3 retries)
-# - Only retries on API errors and rate limits
-# - Logs each retry attempt via _log_retry_attempt
-# - Re-raises final exception if all retries fail
-# - Designed to handle temporary API issues gracefully
+# Retry Behavior Documentation (see retry_policy):
+# - The API calls below retry transient failures (429, 5xx, connection errors)
+# - Waits follow the server's Retry-After header, else jittered exponential backoff
+# - Requests are paced to the remaining rate-limit budget
+# - An open circuit (provider degraded) fails fast with CircuitOpenError
+# - Re-raises the final exception if all retries fail
 def legacy_analyze_transcript(
     transcript_text: str,
     target_name: str,
-    open_ai_key
+    open_ai_key,
+    windowed: Optional[bool] = None,
+    use_cache: bool = True,
 ) -> Optional[str]:
     """
     Analyzes the transcript using an LLM (Large Language Model) based on a defined prompt.
 
     This function sends the transcript and target name to the OpenAI API
     to generate a plain text analysis. It includes retry logic for handling
-    transient API errors and rate limits.
+    transient API errors and rate limits. Long transcripts are summarized
+    hierarchically: each window is summarized in parallel and the window
+    summaries are reduced into the final analysis. Every summary is cached
+    (see llm_cache), so unchanged windows are not summarized again.
 
     Args:
         transcript_text: The full text of the transcript to be analyzed.
         target_name: The name of the person or entity that the analysis should focus on.
+        open_ai_key: OpenAI API key.
+        windowed: Summarize window by window. None decides by length
+            (Config.WINDOWED_EXTRACTION_MIN_CHARS).
+        use_cache: Reuse cached summaries. Set to False to force fresh calls
+            (the new responses replace the cached ones).
 
     Returns:
         A plain text string containing the analysis results, or None if the
@@ -83,44 +191,21 @@ def legacy_analyze_transcript(
     if not target_name or not target_name.strip():
         logging.error("Target name cannot be empty for analysis.")
         return None
+    if windowed is None:
+        windowed = len(transcript_text) > Config.WINDOWED_EXTRACTION_MIN_CHARS
 
     try:
 
-        client = OpenAI(api_key=open_ai_key)
-        
-        def format_analysis_prompt(transcript_text: str, target_name: str) -> str:
-            """Formats the analysis prompt for LLM processing."""
-            return f"""Analyze the following transcript for key statements made by or about {target_name}:
-
-Transcript:
-{transcript_text}
-
-Instructions:
-1. Identify all significant statements, claims, or commitments made by {target_name}
-2. Note any factual assertions made by others about {target_name}
-3. Highlight any potentially controversial or newsworthy statements
-4. Provide a concise summary of the key points"""
-
-        # Format the prompt using the transcript and target name
-        prompt = format_analysis_prompt(transcript_text, target_name)
-
-        logging.debug("Sending analysis prompt to LLM...")
-        # Consider logging the prompt content here for detailed debugging if needed
-
-        # Call the OpenAI Chat Completions API
-        response = client.chat.completions.create(
-            model=Config.ANALYSIS_MODEL,
-            messages=[
-                # A system message can be added here to guide the AI's behavior
-                # {"role": "system", "content": "You are a helpful research assistant focused on accuracy and direct evidence."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0, # Lower temperature for more factual, less creative output
-            # max_tokens=... # Optional: set max_tokens to control output length and cost
-        )
+        client = get_openai_client(open_ai_key)
 
-        # Extract the analysis content from the API response
-        analysis_content = response.choices[0].message.content
+        with deadlines.deadline(Config.EXTRACTION_DEADLINE_SECONDS, "summary"):
+            if windowed:
+                analysis_content = _summarize_hierarchically(client, transcript_text, target_name, use_cache)
+            else:
+                # Format the prompt using the transcript and target name
+                prompt = format_analysis_prompt(transcript_text, target_name)
+                logging.debug("Sending analysis prompt to LLM...")
+                analysis_content = _cached_summary(client, prompt, "legacy analysis", use_cache)
         logging.info("Analysis received from LLM.")
         # Uncomment the line below to log the raw LLM output for debugging
         # logging.debug(f"Raw LLM Analysis Output:\n{analysis_content}")
@@ -151,174 +236,858 @@ Instructions:
         logging.debug("Re-raising unexpected exception") # Log before re-raising
         raise # Re-raise the exception to be caught by the caller
 
-@retry(
-    wait=wait_random_exponential(min=5, max=60),  # Longer wait times for bullet extraction
-    stop=stop_after_attempt(6),  # More attempts allowed for bullet extraction
-    retry=retry_if_exception_type(RateLimitError), # Only retry on rate limits
-    after=_log_retry_attempt,  # Log each retry attempt
-    reraise=True  # Re-raise if all retries fail
-)
-# Retry Behavior Documentation:
-# - Longer exponential backoff (5-60s) since bullet extraction is more intensive
-# - Maximum of 6 total attempts (5 retries)
-# - Only retries on rate limits (not general API errors)
-# - Logs each retry attempt via _log_retry_attempt
-# - Re-raises final exception if all retries fail
+def build_extraction_messages(
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int = 100,
+    output_format: str = OUTPUT_FORMAT_DELIMITED,
+) -> List[Dict[str, str]]:
+    """Formats the bullet or highlight prompt named by `prompt_type` in the configured layout."""
+    return format_prompt_messages(
+        prompt_type, transcript_text, target_name, metadata, max_bullets,
+        layout=Config.PROMPT_LAYOUT, output_format=output_format, encoding=Config.TRANSCRIPT_ENCODING
+    )
+
+
+def decode_bullets(transcript_text: str, bullets: List[Dict[str, Optional[str]]]) -> List[Dict[str, Optional[str]]]:
+    """
+    Maps the compact transcript encoding back out of extracted bullets.
+
+    With Config.TRANSCRIPT_ENCODING "compact" the prompt shows speaker codes
+    and coarse times (see transcript_codec); a code in the speaker field, or
+    a turn prefix at the start of the body, is replaced with the full name,
+    label and exact timestamp. Quoted text is never rewritten.
+
+    Args:
+        transcript_text: The transcript (or window) the prompt was built from.
+        bullets: The bullets parsed from the reply.
+
+    Returns:
+        The decoded bullets (copies), or the input as it is for the full encoding.
+    """
+    if Config.TRANSCRIPT_ENCODING != TRANSCRIPT_ENCODING_COMPACT or not bullets:
+        return bullets
+    return encode_transcript(transcript_text).decode_bullets(bullets)
+
+
+def _output_formats() -> List[str]:
+    """Reply formats to try in order: structured output first (if enabled), delimited text as the fallback."""
+    if Config.EXTRACTION_OUTPUT_FORMAT == OUTPUT_FORMAT_JSON:
+        return [OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_DELIMITED]
+    return [OUTPUT_FORMAT_DELIMITED]
+
+
+def _extraction_params(prompt_type: str, output_format: str, multi_target: bool = False) -> Dict[str, Any]:
+    """Request parameters for an extraction call in the given reply format."""
+    params = {"temperature": 0.0} # Lower temperature for more structured, predictable output
+    if output_format == OUTPUT_FORMAT_JSON:
+        params["response_format"] = response_format(prompt_type, multi_target)
+    return params
+
+
+def _target_list(target_name: Union[str, List[str]]) -> List[str]:
+    """Returns the distinct, non-empty target names, in order."""
+    names = [target_name] if isinstance(target_name, str) else list(target_name)
+    return list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+
+
+def _parse_bullet_block(content: str, prompt_type: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Parses the content between one BULLET START/END pair into a bullet dict.
+
+    Returns None (and logs a warning) when the block has no headline.
+    """
+    # Split the content by the main delimiter (@@DELIM@@) to get individual fields
+    parts = content.split("@@DELIM@@")
+    bullet_data = {}
+
+    # Extract data for each field based on known prefixes (e.g., **Headline:**)
+    for part in parts:
+        part = part.strip()
+        if part.startswith("**Target:**"):
+            bullet_data['target_raw'] = part[len("**Target:**"):].strip()
+        elif part.startswith("**Headline:**"):
+            bullet_data['headline_raw'] = part[len("**Headline:**"):].strip()
+        elif part.startswith("**Speaker:**") and prompt_type == "format_text_bullet_prompt":
+            bullet_data['speaker_raw'] = part[len("**Speaker:**"):].strip()
+        elif part.startswith("**Body:**") and prompt_type == "format_text_bullet_prompt":
+            bullet_data['body_raw'] = part[len("**Body:**"):].strip()
+        elif part.startswith("**Source:**") and prompt_type == "format_text_bullet_prompt":
+            bullet_data['source_raw'] = part[len("**Source:**"):].strip()
+        elif part.startswith("**Date:**") and prompt_type == "format_text_bullet_prompt":
+            bullet_data['date_raw'] = part[len("**Date:**"):].strip()
+        # elif part.startswith("**Time:**") and prompt_type == "format_text_bullet_prompt":
+            # bullet_data['time_raw'] = part[len("**Time:**"):].strip()
+
+    # Basic validation: check if essential parts (headline, body, speaker) were found
+    # Source and date are optional and might be missing.
+    bullet = None
+    if 'headline_raw' in bullet_data and prompt_type == "format_text_highlight_prompt":
+        bullet = {
+            "headline_raw": bullet_data.get('headline_raw')
+        }
+    elif 'headline_raw' in bullet_data and prompt_type == "format_text_bullet_prompt":
+        bullet = {
+            "headline_raw": bullet_data.get('headline_raw'),
+            "speaker_raw": bullet_data.get('speaker_raw'),
+            "body_raw": bullet_data.get('body_raw'),
+            "source_raw": bullet_data.get('source_raw'), # Will be None if not found
+            "date_raw": bullet_data.get('date_raw')      # Will be None if not found
+            # "time_raw": bullet_data.get('time_raw')
+        }
+    if bullet is not None:
+        if 'target_raw' in bullet_data: # Only present in multi-target replies
+            bullet['target_raw'] = bullet_data['target_raw']
+        return bullet
+    # Log a warning if a block could not be fully parsed
+    logging.warning(f"Could not parse all required fields from block: {content[:100]}...")
+    return None
+
+
+class BulletStreamParser:
+    """
+    Incremental parser for the delimited bullet format.
+
+    Text is fed in as it streams from the model; every time a complete
+    '*** BULLET START *** ... *** BULLET END ***' block has arrived it is parsed
+    and returned. An unfinished block at the end of a cut-off stream is simply
+    never returned, so every bullet completed before the cut is kept.
+    """
+
+    START = "*** BULLET START ***"
+    END = "*** BULLET END ***"
+
+    def __init__(self, prompt_type: str):
+        self.prompt_type = prompt_type
+        self.no_bullets = False
+        self._buffer = ""
+        self._parts: List[str] = []
+
+    def feed(self, text: Optional[str]) -> List[Dict[str, Optional[str]]]:
+        """Adds streamed text and returns any bullets completed by it."""
+        if not text:
+            return []
+        self._parts.append(text)
+        self._buffer += text
+        if "@@NO BULLETS FOUND@@" in self._buffer:
+            self.no_bullets = True
+
+        completed = []
+        while True:
+            end = self._buffer.find(self.END)
+            if end == -1:
+                break
+            start = self._buffer.rfind(self.START, 0, end)
+            content = self._buffer[start + len(self.START):end] if start != -1 else ""
+            self._buffer = self._buffer[end + len(self.END):]
+            if content.strip():
+                bullet = _parse_bullet_block(content.strip(), self.prompt_type)
+                if bullet is not None:
+                    completed.append(bullet)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._parts)
+
+
+def parse_bullet_response(raw_text_response: str, prompt_type: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Parses the delimited text returned by the extraction prompts into bullet dicts.
+
+    Args:
+        raw_text_response: The raw completion text.
+        prompt_type: format_text_bullet_prompt OR format_text_highlight_prompt,
+                     which decides which fields are kept.
+
+    Returns:
+        A list of raw bullet dictionaries. Highlight bullets only carry
+        'headline_raw'; full bullets also carry 'speaker_raw', 'body_raw',
+        'source_raw' and 'date_raw'.
+    """
+    # Check for empty or specific "no bullets found" response
+    if not raw_text_response or not raw_text_response.strip():
+         logging.warning("LLM returned empty content for text bullet extraction.")
+         return []
+    if "@@NO BULLETS FOUND@@" in raw_text_response:
+         logging.info("LLM indicated no relevant bullets found.")
+         return []
+
+    # --- Parse Delimited Text ---
+    # The LLM is expected to return data in a specific delimited format.
+    # This section parses that format into a list of dictionaries.
+    extracted_bullets_raw = []
+    # Split the response into individual bullet blocks using the start delimiter
+    # Expected format:
+    # *** BULLET START ***
+    # **Headline:** ... @@DELIM@@ **Speaker:** ... @@DELIM@@ **Body:** ... @@DELIM@@ **Source:** ... @@DELIM@@ **Date:** ...
+    # *** BULLET END ***
+    bullet_blocks = raw_text_response.split("*** BULLET START ***")
+
+    for block in bullet_blocks:
+        block = block.strip()
+        # Skip empty blocks or blocks that don't contain the end delimiter
+        if not block or "*** BULLET END ***" not in block:
+            continue
+
+        # Remove the end delimiter to isolate the content within the block
+        content = block.split("*** BULLET END ***")[0].strip()
+        bullet = _parse_bullet_block(content, prompt_type)
+        if bullet is not None:
+            extracted_bullets_raw.append(bullet)
+
+    logging.info(f"Parsed {len(extracted_bullets_raw)} raw bullet data dicts from text.")
+    return extracted_bullets_raw
+
+
+def split_bullets_by_target(
+    bullets: List[Dict[str, Optional[str]]],
+    targets: List[str],
+    max_bullets: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Optional[str]]]]:
+    """
+    Splits the bullets of a multi-target extraction into one list per target.
+
+    Each bullet's 'target_raw' tag is matched to the listed names: exactly
+    (ignoring case) first, then by the target whose name or alias (first or
+    last name) it contains, if that identifies a single target. Bullets that
+    match no target are dropped with a warning.
+
+    Args:
+        bullets: Tagged bullets, in transcript order.
+        targets: The target names the extraction was run for.
+        max_bullets: Optional cap per target.
+
+    Returns:
+        A dictionary mapping every target to its bullets (without the
+        'target_raw' tag), in transcript order.
+    """
+    exact = {t.casefold(): t for t in targets}
+    aliases = {t: [a.casefold() for a in target_aliases(t)] for t in targets}
+    per_target = {t: [] for t in targets}
+    unmatched = 0
+    for bullet in bullets:
+        bullet = dict(bullet)
+        tag = (bullet.pop('target_raw', None) or "").strip().casefold()
+        owner = exact.get(tag)
+        if owner is None and tag:
+            owners = [t for t in targets if any(a in tag for a in aliases[t])]
+            owner = owners[0] if len(owners) == 1 else None
+        if owner is None:
+            unmatched += 1
+            continue
+        if max_bullets is None or len(per_target[owner]) < max_bullets:
+            per_target[owner].append(bullet)
+    if unmatched:
+        logging.warning(f"Dropped {unmatched} bullets whose target tag matched none of {targets}.")
+    logging.info("Split bullets by target: " + ", ".join(f"{t}: {len(b)}" for t, b in per_target.items()))
+    return per_target
+
+
+@retrying("openai", tokens=_request_tokens)
+def _complete(
+    client,
+    messages: List[Dict[str, str]],
+    label: str = "extraction",
+    model: Optional[str] = None,
+    **params,
+) -> str:
+    """Calls the Chat Completions API, records its token usage and returns the raw reply text."""
+    model = model or Config.ANALYSIS_MODEL
+    logging.debug(f"Sending Text Bullet extraction prompt to LLM ({model})...")
+    # Consider logging the prompt content here for detailed debugging if needed
+
+    # Call the OpenAI Chat Completions API, hedging calls that run past the usual latency
+    started = time.perf_counter()
+    content, usage = hedged_call(
+        lambda timeout, cancellation: _create_completion(client, messages, model, timeout, cancellation, **params),
+        label=label,
+        model=model,
+        tokens=count_message_tokens(messages, model),
+    )
+    llm_metrics.record_call(label, model, usage, time.perf_counter() - started)
+
+    # Extract the raw text response from the API
+    logging.info("Text bullet extraction response received.")
+    return content
+
+
+def _create_completion(client, messages: List[Dict[str, str]], model: str, timeout: float, cancellation, **params):
+    """
+    Makes one Chat Completions request for `hedged_call` and returns (content, usage).
+
+    A request that may be hedged is streamed, with its stream attached to
+    `cancellation`, so the losing request's connection is closed.
+    """
+    client = client.with_options(timeout=timeout)
+    if cancellation is None:
+        response = client.chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content, getattr(response, "usage", None)
+
+    stream = cancellation.attach(client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        **params,
+    ))
+    parts, usage = [], None
+    with stream:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+    cancellation.check()  # A closed stream can end early without an error
+    return "".join(parts), usage
+
+
+def _request_bullets(
+    client,
+    messages: List[Dict[str, str]],
+    prompt_type: str,
+    use_cache: bool = True,
+    label: Optional[str] = None,
+    model: Optional[str] = None,
+    output_format: str = OUTPUT_FORMAT_DELIMITED,
+    multi_target: bool = False,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Sends one extraction prompt to the LLM and parses the reply into bullet dicts.
+
+    Identical requests are answered from the response cache unless `use_cache`
+    is False; a bypassed call still refreshes the cached entry. Structured
+    replies that cannot be used raise StructuredOutputError and are not cached.
+    """
+    params = _extraction_params(prompt_type, output_format, multi_target)
+    model = model or Config.ANALYSIS_MODEL
+    cache_key = make_cache_key(model, messages, prompt_type=prompt_type, **params)
+
+    if use_cache:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Text bullet extraction served from cache.")
+            return cached["parsed"]
+
+    raw_text_response = _complete(client, messages, label=label or prompt_type, model=model, **params)
+    if output_format == OUTPUT_FORMAT_JSON:
+        bullets = parse_json_response(raw_text_response, prompt_type)
+    else:
+        bullets = parse_bullet_response(raw_text_response, prompt_type)
+    if raw_text_response and raw_text_response.strip():
+        _response_cache.put(cache_key, raw_text_response, bullets, model=model)
+    return bullets
+
+
+def _extract_text(
+    client,
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int,
+    use_cache: bool = True,
+    label: Optional[str] = None,
+    model: Optional[str] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Runs one extraction prompt on its model tier, escalating when the reply fails validation.
+
+    With Config.MODEL_CASCADE on, a reply from a cheaper tier that cannot be
+    parsed, or whose bullets fail `model_router.validate_bullets`, is
+    requested again from the strong tier (Config.ANALYSIS_MODEL).
+    """
+    models = cascade_models(model)
+    for attempt, tier_model in enumerate(models):
+        last = attempt == len(models) - 1
+        call_label = (label or prompt_type) + (ESCALATED_SUFFIX if attempt else "")
+        try:
+            bullets = _extract_text_once(
+                client, transcript_text, target_name, metadata, prompt_type, max_bullets, use_cache,
+                label=call_label, model=tier_model
+            )
+        except (BadRequestError, StructuredOutputError) as e:
+            if last:
+                raise
+            logging.warning(f"{call_label}: {tier_of(tier_model)} tier reply unusable ({e}); escalating")
+            continue
+        reason = None if last else validate_bullets(bullets, transcript_text, prompt_type)
+        if reason is None:
+            return bullets
+        logging.warning(f"{call_label}: {tier_of(tier_model)} tier reply failed validation ({reason}); escalating")
+    return []
+
+
+def _extract_text_once(
+    client,
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int,
+    use_cache: bool = True,
+    label: Optional[str] = None,
+    model: Optional[str] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Runs one extraction prompt, preferring schema-constrained JSON output.
+
+    If the model rejects the JSON schema or returns an unusable structured
+    reply, the same prompt is retried once in the delimited text format.
+    """
+    formats = _output_formats()
+    multi_target = len(_target_list(target_name)) > 1
+    for output_format in formats:
+        messages = build_extraction_messages(
+            transcript_text, target_name, metadata, prompt_type, max_bullets, output_format
+        )
+        try:
+            bullets = _request_bullets(
+                client, messages, prompt_type, use_cache, label=label, model=model, output_format=output_format,
+                multi_target=multi_target
+            )
+            return decode_bullets(transcript_text, bullets[:max_bullets])
+        except (BadRequestError, StructuredOutputError) as e:
+            if output_format == formats[-1]:
+                raise
+            logging.warning(f"Structured output failed, falling back to the delimited format: {e}")
+    return []
+
+
+def _extract_windowed(
+    client,
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int,
+    use_cache: bool = True,
+    model: Optional[str] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Map-reduce extraction: one prompt per transcript window, run in parallel.
+
+    The transcript is split on utterance boundaries into overlapping time
+    windows (see transcript_windows), each window is extracted concurrently,
+    and the per-window results are merged in chronological order with overlap
+    duplicates removed and the global `max_bullets` cap applied.
+    """
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
+    )
+    logging.info(f"Windowed extraction over {len(windows)} windows ({prompt_type})")
+
+    def _extract_window(window):
+        bullets = _extract_text(
+            client, window.text, target_name, metadata, prompt_type, max_bullets, use_cache,
+            label=f"{prompt_type} window {window.index + 1}", model=model
+        )
+        logging.debug(f"Window {window.index + 1}/{len(windows)} produced {len(bullets)} bullets")
+        return bullets
+
+    with ThreadPoolExecutor(max_workers=Config.EXTRACTION_MAX_WORKERS) as executor:
+        per_window = list(executor.map(deadlines.bind(_extract_window), windows))
+
+    merged = merge_window_bullets(per_window, max_bullets)
+    logging.info(f"Merged {sum(len(b) for b in per_window)} window bullets into {len(merged)}.")
+    return merged
+
+
 def extract_raw_data_from_text(
     transcript_text: str,
-    target_name: str,
+    target_name: Union[str, List[str]],
     metadata: Dict[str, Any],
     open_ai_api,
     prompt_type,
     max_bullets: int = 100,
-) -> List[Dict[str, Optional[str]]]:
+    windowed: Optional[bool] = None,
+    use_cache: bool = True,
+    model: Optional[str] = None,
+    prefilter: Optional[bool] = None,
+) -> Union[List[Dict[str, Optional[str]]], Dict[str, List[Dict[str, Optional[str]]]]]:
     """
     Extracts structured bullet points from a transcript using the OpenAI API.
 
     This function sends the transcript, target name, and video metadata to the
-    LLM with a specific prompt designed to extract key bullet points in a
-    structured, delimited format. It includes retry logic for handling
-    transient API errors and rate limits.
+    LLM with a specific prompt designed to extract key bullet points in the
+    structured, delimited text format, or as schema-constrained JSON with the
+    delimited format as fallback when Config.EXTRACTION_OUTPUT_FORMAT is
+    "json_schema". It includes retry logic for handling
+    transient API errors and rate limits. The extraction runs under
+    Config.EXTRACTION_DEADLINE_SECONDS, capped by any enclosing job deadline
+    (see deadlines), and raises DeadlineExceeded when that runs out.
 
     Args:
         transcript_text: The full text of the transcript to analyze.
         target_name: The name of the person or entity to focus the bullet
-                     point extraction on.
+                     point extraction on, or a list of several targets (e.g.
+                     the candidates in a debate). Several targets are
+                     extracted in one pass over the transcript, with every
+                     bullet tagged by target, and split per target.
         metadata: A dictionary containing video metadata, expected to have
                   keys like 'title', 'uploader', 'upload_date', and 'webpage_url'.
                   This metadata is used to provide context to the LLM and
                   potentially populate source/date fields in the extracted bullets.
-        max_bullets: The maximum number of bullet points to attempt to extract.
+        max_bullets: The maximum number of bullet points to attempt to extract
+                     (per target).
         prompt_type: Direct to either highlight or bullet prompt:
             format_text_bullet_prompt OR format_text_highlight_prompt
+        windowed: Split the transcript into overlapping windows and extract
+            from them in parallel (map-reduce). None lets the token budgeter
+            (token_budget.plan_extraction) pick the strategy and, unless
+            `model` is given, the model tier for the configured latency and
+            cost targets.
+        use_cache: Reuse cached responses for identical requests. Set to False
+            to force a fresh call (the new response replaces the cached one).
+        model: The model to use. Defaults to the planned tier, or
+            Config.ANALYSIS_MODEL when `windowed` is given explicitly.
+        prefilter: Reduce the transcript to the target's own turns and the
+            context around mentions of the target before extracting (see
+            prefilter). None leaves it to the planner in auto mode and skips
+            it otherwise; False never filters. Never applied with several
+            targets, as it keeps only one speaker's turns.
 
     Returns:
         A list of dictionaries, where each dictionary represents a raw bullet
         point with potential keys: 'headline_raw', 'speaker_raw', 'body_raw',
         'source_raw', and 'date_raw'. Returns an empty list if extraction fails,
         no relevant bullets are found, or inputs are invalid.
+        With several targets, a dictionary mapping each target to such a list.
     """
+    targets = _target_list(target_name)
+    multi_target = len(targets) > 1
+    if not isinstance(target_name, str) and not multi_target:
+        target_name = targets[0] if targets else ""
+    empty = {t: [] for t in targets} if multi_target else []
+    total_bullets = max_bullets * len(targets) if multi_target else max_bullets
     logging.info(f"Starting Text Bullet extraction for target: {target_name}")
 
     # Basic input validation
     if not transcript_text or not transcript_text.strip():
         logging.error("Cannot extract text bullets from an empty transcript.")
-        return []
+        return empty
     if not metadata:
         logging.error("Cannot extract text bullets: Metadata is missing.")
-        return []
+        return empty
 
-    try:
-        client = OpenAI(api_key=open_ai_api)
-        # Format the prompt for bullet extraction
-        if prompt_type == "format_text_bullet_prompt":
-            prompt = format_text_bullet_prompt(
-                transcript_text, target_name, metadata, max_bullets
+    # The extraction stage runs under its own deadline, capped by the job's
+    with deadlines.deadline(Config.EXTRACTION_DEADLINE_SECONDS, "extraction"):
+        if multi_target:
+            prefilter = False
+
+        if prefilter:
+            transcript_text = prefilter_transcript(
+                transcript_text, target_name, context_utterances=Config.PREFILTER_CONTEXT_UTTERANCES
+            ).text
+
+        if windowed is None:
+            try:
+                plan = plan_extraction(
+                    transcript_text, target_name, metadata, prompt_type, total_bullets,
+                    max_latency_s=_latency_target(),
+                    models=[model] if model else None,
+                    prefilter=False if prefilter is not None else None,
+                )
+                windowed, model = plan.windowed, plan.model
+                transcript_text = plan.transcript_text or transcript_text
+            except Exception as e:
+                logging.warning(f"Extraction planning failed, using the default strategy: {e}")
+                windowed = len(transcript_text) > Config.WINDOWED_EXTRACTION_MIN_CHARS
+
+        try:
+            client = get_openai_client(open_ai_api)
+            if windowed:
+                bullets = _extract_windowed(
+                    client, transcript_text, target_name, metadata, prompt_type, total_bullets, use_cache, model
+                )
+            else:
+                # Format the prompt and run the extraction
+                bullets = _extract_text(
+                    client, transcript_text, target_name, metadata, prompt_type, total_bullets, use_cache, model=model
+                )
+            return split_bullets_by_target(bullets, targets, max_bullets) if multi_target else bullets
+
+        # Specific error handling for OpenAI API errors.
+        # These exceptions are re-raised after logging to be handled by the caller.
+        except AuthenticationError:
+            logging.error("Authentication error during text bullet extraction.")
+            raise
+        except RateLimitError:
+            logging.error("Rate limit error during text bullet extraction.")
+            raise
+        except APIError as e:
+            logging.error(f"API error during text bullet extraction: {e}")
+            raise
+        except (DeadlineExceeded, CircuitOpenError) as e:
+            logging.error(f"Text bullet extraction stopped: {e}")
+            raise
+        except Exception as e:
+            # Catch any other unexpected exceptions during the process
+            logging.error(f"Unexpected error during text bullet extraction: {e}", exc_info=True)
+            return empty # Return empty results on non-critical failures to allow pipeline to continue
+
+
+def build_extraction_state(
+    transcript_text: str,
+    target_name: str,
+    prompt_type: str,
+    bullets: List[Dict[str, Optional[str]]],
+) -> ExtractionState:
+    """
+    Records a finished extraction per transcript window, for `extract_incremental`.
+
+    Works for any run (single-shot, streamed or windowed): each bullet is
+    anchored to the window it came from.
+    """
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
+    )
+    return ExtractionState.from_bullets(prompt_type, target_name, transcript_text, windows, bullets)
+
+
+def extract_incremental(
+    transcript_text: str,
+    target_name: str,
+    metadata: Dict[str, Any],
+    open_ai_api,
+    prompt_type,
+    previous: Optional[ExtractionState] = None,
+    max_bullets: int = 100,
+    use_cache: bool = True,
+    model: Optional[str] = None,
+) -> Tuple[List[Dict[str, Optional[str]]], ExtractionState]:
+    """
+    Re-extracts only the transcript windows that changed since a previous run.
+
+    The edited transcript is split into windows; windows whose text is
+    identical to one in `previous` (ignoring markup and whitespace) reuse its
+    bullets, and only the rest are sent to the LLM (in parallel). Each changed
+    window goes through `extract_raw_data_from_text` with the model and
+    pre-filter decision the token budgeter picks for the whole transcript,
+    and everything runs under the extraction deadline. The results are merged
+    as in windowed extraction. Without a usable previous state every window
+    is extracted.
+
+    Args:
+        previous: The state returned by an earlier run (or built with
+            `build_extraction_state`) for the same prompt type and target.
+        Other arguments as for `extract_raw_data_from_text`.
+
+    Returns:
+        The merged bullets and the new state for the next edit.
+        API errors are re-raised, as in `extract_raw_data_from_text`.
+    """
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
+    )
+    reused = {}
+    if previous is not None and previous.matches(prompt_type, target_name):
+        reused = previous.reusable(windows)
+    changed = [w for w in windows if w.index not in reused]
+    logging.info(
+        f"Incremental extraction ({prompt_type}): {len(changed)} of {len(windows)} windows changed, "
+        f"{len(reused)} reused"
+    )
+
+    # The changed windows share the extraction deadline, and the model and pre-filter planned for the transcript
+    with deadlines.deadline(Config.EXTRACTION_DEADLINE_SECONDS, "extraction"):
+        prefilter = None
+        if changed and model is None:
+            try:
+                plan = plan_extraction(
+                    transcript_text, target_name, metadata, prompt_type, max_bullets, max_latency_s=_latency_target()
+                )
+                model, prefilter = plan.model, plan.transcript_text is not None
+            except Exception as e:
+                logging.warning(f"Extraction planning failed, using the default model: {e}")
+
+        def _extract_window(window):
+            return extract_raw_data_from_text(
+                window.text, target_name, metadata, open_ai_api, prompt_type, max_bullets,
+                windowed=False, use_cache=use_cache, model=model, prefilter=prefilter
             )
-        elif prompt_type == "format_text_highlight_prompt":
-            prompt = format_text_highlight_prompt(
-                transcript_text, target_name, metadata, max_bullets
+
+        try:
+            with ThreadPoolExecutor(max_workers=Config.EXTRACTION_MAX_WORKERS) as executor:
+                fresh = dict(zip((w.index for w in changed), executor.map(deadlines.bind(_extract_window), changed)))
+        except (AuthenticationError, RateLimitError, APIError) as e:
+            logging.error(f"API error during incremental extraction: {e}")
+            raise
+
+    per_window = [reused.get(w.index, fresh.get(w.index, [])) for w in windows]
+    merged = merge_window_bullets(per_window, max_bullets)
+    return merged, ExtractionState.from_windows(prompt_type, target_name, windows, per_window)
+
+
+def extract_many_from_text(
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    open_ai_api,
+    prompt_types: List[str],
+    max_bullets: int = 100,
+    windowed: Optional[bool] = None,
+    use_cache: bool = True,
+    model: Optional[str] = None,
+) -> Dict[str, List[Dict[str, Optional[str]]]]:
+    """
+    Runs several extraction prompts over the same transcript concurrently.
+
+    Each prompt type is an independent `extract_raw_data_from_text` call, so
+    running them side by side makes the total latency the slowest call rather
+    than the sum of all of them.
+
+    Args:
+        transcript_text: The full text of the transcript to analyze.
+        target_name: The person or entity to focus on, or a list of targets
+            (see `extract_raw_data_from_text`).
+        metadata: Video metadata passed through to the prompts.
+        open_ai_api: OpenAI API key.
+        prompt_types: Prompt types to run, e.g.
+            ["format_text_bullet_prompt", "format_text_highlight_prompt"].
+        max_bullets: The maximum number of bullet points per prompt type.
+        windowed: Passed through to `extract_raw_data_from_text`.
+        use_cache: Passed through to `extract_raw_data_from_text`.
+        model: Passed through to `extract_raw_data_from_text`.
+
+    Returns:
+        A dictionary mapping each prompt type to its list of raw bullet dicts
+        (or, with several targets, to its per-target dictionary).
+        API errors from any call are re-raised, as in `extract_raw_data_from_text`.
+    """
+    prompt_types = list(dict.fromkeys(prompt_types))  # Drop duplicates, keep order
+    logging.info(f"Running {len(prompt_types)} extractions concurrently: {prompt_types}")
+
+    with ThreadPoolExecutor(max_workers=max(len(prompt_types), 1)) as executor:
+        futures = {
+            prompt_type: executor.submit(
+                deadlines.bind(extract_raw_data_from_text),
+                transcript_text, target_name, metadata, open_ai_api,
+                prompt_type, max_bullets, windowed, use_cache, model,
             )
+            for prompt_type in prompt_types
+        }
+        return {prompt_type: future.result() for prompt_type, future in futures.items()}
 
-        logging.debug("Sending Text Bullet extraction prompt to LLM...")
-        # Consider logging the prompt content here for detailed debugging if needed
 
-        # Call the OpenAI Chat Completions API
-        response = client.chat.completions.create(
-            model=Config.ANALYSIS_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0, # Lower temperature for more structured, predictable output
+@retrying("openai", tokens=_request_tokens)  # Retried only until the stream opens, before any tokens arrive
+def _open_stream(client, messages: List[Dict[str, str]], model: Optional[str] = None, **params):
+    """Opens a streaming Chat Completions request; the final chunk carries the token usage."""
+    logging.debug("Opening streaming Text Bullet extraction request...")
+    return client.with_options(timeout=deadlines.call_timeout()).chat.completions.create(
+        model=model or Config.ANALYSIS_MODEL,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        **params,
+    )
+
+
+def iter_bullets_from_text(
+    transcript_text: str,
+    target_name: str,
+    metadata: Dict[str, Any],
+    open_ai_api,
+    prompt_type,
+    max_bullets: int = 100,
+    use_cache: bool = True,
+    model: Optional[str] = None,
+) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Streaming version of `extract_raw_data_from_text` (single-shot only).
+
+    The completion is streamed and parsed incrementally with
+    `JsonBulletStreamParser` (or `BulletStreamParser` for the delimited
+    format), and each bullet is yielded as soon as it is complete, so the first bullet is available after a
+    couple of seconds instead of after the whole generation. If the stream
+    is cut off, every bullet completed so far has already been yielded and
+    the iterator simply ends. Only complete streams are written to the
+    response cache; a cache hit yields the cached bullets immediately.
+
+    Args:
+        Same as `extract_raw_data_from_text`.
+
+    Yields:
+        Raw bullet dictionaries in the order the model produced them.
+    """
+    logging.info(f"Starting streaming Text Bullet extraction for target: {target_name}")
+
+    if not transcript_text or not transcript_text.strip():
+        logging.error("Cannot extract text bullets from an empty transcript.")
+        return
+    if not metadata:
+        logging.error("Cannot extract text bullets: Metadata is missing.")
+        return
+
+    model = model or Config.ANALYSIS_MODEL
+    formats = _output_formats()
+    for output_format in formats:
+        messages = build_extraction_messages(
+            transcript_text, target_name, metadata, prompt_type, max_bullets, output_format
         )
+        params = _extraction_params(prompt_type, output_format)
+        # Same key as _request_bullets, so streamed and non-streamed runs share entries
+        cache_key = make_cache_key(model, messages, prompt_type=prompt_type, **params)
 
-        # Extract the raw text response from the API
-        raw_text_response = response.choices[0].message.content
-        logging.info("Text bullet extraction response received.")
-
-        # Check for empty or specific "no bullets found" response
-        if not raw_text_response or not raw_text_response.strip():
-             logging.warning("LLM returned empty content for text bullet extraction.")
-             return []
-        if "@@NO BULLETS FOUND@@" in raw_text_response:
-             logging.info("LLM indicated no relevant bullets found.")
-             return []
-
-        # --- Parse Delimited Text ---
-        # The LLM is expected to return data in a specific delimited format.
-        # This section parses that format into a list of dictionaries.
-        extracted_bullets_raw = []
-        # Split the response into individual bullet blocks using the start delimiter
-        # Expected format:
-        # *** BULLET START ***
-        # **Headline:** ... @@DELIM@@ **Speaker:** ... @@DELIM@@ **Body:** ... @@DELIM@@ **Source:** ... @@DELIM@@ **Date:** ...
-        # *** BULLET END ***
-        bullet_blocks = raw_text_response.split("*** BULLET START ***")
-
-        for block in bullet_blocks:
-            block = block.strip()
-            # Skip empty blocks or blocks that don't contain the end delimiter
-            if not block or "*** BULLET END ***" not in block:
-                continue
-
-            # Remove the end delimiter to isolate the content within the block
-            content = block.split("*** BULLET END ***")[0].strip()
-
-            # Split the content by the main delimiter (@@DELIM@@) to get individual fields
-            parts = content.split("@@DELIM@@")
-            bullet_data = {}
-
-            # Extract data for each field based on known prefixes (e.g., **Headline:**)
-            for part in parts:
-                part = part.strip()
-                if part.startswith("**Headline:**"):
-                    bullet_data['headline_raw'] = part[len("**Headline:**"):].strip()
-                elif part.startswith("**Speaker:**") and prompt_type == "format_text_bullet_prompt":
-                    bullet_data['speaker_raw'] = part[len("**Speaker:**"):].strip()
-                elif part.startswith("**Body:**") and prompt_type == "format_text_bullet_prompt":
-                    bullet_data['body_raw'] = part[len("**Body:**"):].strip()
-                elif part.startswith("**Source:**") and prompt_type == "format_text_bullet_prompt":
-                    bullet_data['source_raw'] = part[len("**Source:**"):].strip()
-                elif part.startswith("**Date:**") and prompt_type == "format_text_bullet_prompt":
-                    bullet_data['date_raw'] = part[len("**Date:**"):].strip()
-                # elif part.startswith("**Time:**") and prompt_type == "format_text_bullet_prompt":
-                    # bullet_data['time_raw'] = part[len("**Time:**"):].strip()
-
-            # Basic validation: check if essential parts (headline, body, speaker) were found
-            # Source and date are optional and might be missing.
-            if 'headline_raw' in bullet_data and prompt_type == "format_text_highlight_prompt":
-                # Append the extracted data as a dictionary to the results list
-                extracted_bullets_raw.append({
-                    "headline_raw": bullet_data.get('headline_raw')
-                })
-            elif 'headline_raw' in bullet_data and prompt_type == "format_text_bullet_prompt":
-                # Append the extracted data as a dictionary to the results list
-                extracted_bullets_raw.append({
-                    "headline_raw": bullet_data.get('headline_raw'),
-                    "speaker_raw": bullet_data.get('speaker_raw'),
-                    "body_raw": bullet_data.get('body_raw'),
-                    "source_raw": bullet_data.get('source_raw'), # Will be None if not found
-                    "date_raw": bullet_data.get('date_raw')      # Will be None if not found
-                    # "time_raw": bullet_data.get('time_raw')
-                })
-            else:
-                # Log a warning if a block could not be fully parsed
-                logging.warning(f"Could not parse all required fields from block: {content[:100]}...")
+        if use_cache:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logging.info("Streaming extraction served from cache.")
+                yield from decode_bullets(transcript_text, cached["parsed"][:max_bullets])
+                return
 
-        logging.info(f"Parsed {len(extracted_bullets_raw)} raw bullet data dicts from text.")
-        return extracted_bullets_raw
+        if output_format == OUTPUT_FORMAT_JSON:
+            parser = JsonBulletStreamParser(prompt_type)
+        else:
+            parser = BulletStreamParser(prompt_type)
+        bullets = []
+        usage = None
+        codec = encode_transcript(transcript_text) if Config.TRANSCRIPT_ENCODING == TRANSCRIPT_ENCODING_COMPACT else None
+        started = time.perf_counter()
+        try:
+            stream = _open_stream(get_openai_client(open_ai_api), messages, model=model, **params)
+        except BadRequestError as e:
+            if output_format == formats[-1]:
+                raise
+            logging.warning(f"Structured output rejected, falling back to the delimited format: {e}")
+            continue
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                for bullet in parser.feed(chunk.choices[0].delta.content):
+                    bullets.append(bullet)  # Cached as the model wrote it, like _request_bullets
+                    yield codec.decode_bullets([bullet])[0] if codec else bullet
+                    if len(bullets) >= max_bullets:
+                        return
+        except (APIError, httpx.HTTPError) as e:
+            # Keep what was completed; an interrupted reply is never cached
+            logging.warning(f"Extraction stream interrupted after {len(bullets)} bullets: {e}")
+            return
+        finally:
+            stream.close()
+            if usage is not None:
+                llm_metrics.record_call(f"{prompt_type} (stream)", model, usage, time.perf_counter() - started)
 
-    # Specific error handling for OpenAI API errors.
-    # These exceptions are re-raised after logging to be handled by the caller.
-    except AuthenticationError:
-        logging.error("Authentication error during text bullet extraction.")
-        raise
-    except RateLimitError:
-        logging.error("Rate limit error during text bullet extraction.")
-        raise
-    except APIError as e:
-        logging.error(f"API error during text bullet extraction: {e}")
-        raise
-    except Exception as e:
-        # Catch any other unexpected exceptions during the process
-        logging.error(f"Unexpected error during text bullet extraction: {e}", exc_info=True)
-        return [] # Return empty list on non-critical failures to allow pipeline to continue
+        # A structured reply without a "bullets" array is unusable; nothing was yielded, so retry as text
+        if output_format == OUTPUT_FORMAT_JSON and not parser.started and output_format != formats[-1]:
+            logging.warning("Structured reply had no bullets array, falling back to the delimited format.")
+            continue
 
+        if parser.no_bullets:
+            logging.info("LLM indicated no relevant bullets found.")
+        logging.info(f"Streamed {len(bullets)} raw bullet data dicts.")
+        if parser.text.strip():
+            _response_cache.put(cache_key, parser.text, bullets, model=model)
+        return
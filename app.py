@@ -85,10 +85,173 @@ if check_password():
             if original_ytdl is not None:
                 downloader_module._apify_ytdl_fallback = original_ytdl
 
-    from transcriber import transcribe_file
-    from analyzer import extract_raw_data_from_text
+    from openai_clients import warm_up as warm_up_openai
+
+    @st.cache_resource
+    def warm_openai_pool(api_key: str) -> bool:
+        """Opens the pooled OpenAI connection once per server process."""
+        warm_up_openai(api_key)
+        return True
+
+    from transcriber import transcribe_file, iter_transcribe_file, ChunkTranscriptionError
+    from analyzer import extract_raw_data_from_text, extract_many_from_text, iter_bullets_from_text
+    from analyzer import extract_incremental, build_extraction_state, legacy_analyze_transcript
+    import llm_metrics
+    import deadlines
+    import speculative
+    from quote_index import verify_bullets
+    from model_router import format_tier_report
+    from token_budget import plan_extraction
     from output import generate_report_highlights, save_text_file, generate_report_bullets, generate_report_both
     
+    def prepare_transcript_for_edit(transcript: str) -> None:
+        """Wraps a labelled transcript in HTML and collects its speakers for the Step 2 editor."""
+        # --- Format transcript HTML ---
+        transcript = re.sub(r'(\[\d+:\d+:\d+\] Speaker [A-Z])', r'</p><p>\1', transcript)
+        transcript = '<p>' + transcript.strip() + '</p>'
+
+        # --- Extract speaker labels for editor ---
+        pattern = r'\[[\d:.]+\]\s+(Speaker\s+[A-Z])\s+\(([^)]+)\):'
+        matches = re.findall(pattern, transcript)
+
+        unique_speakers = set()
+        unique_speakers_edit = set()
+
+        for speaker_id, name in matches:
+            unique_speakers.add(f"{speaker_id} ({name})")
+            unique_speakers_edit.add(f"{speaker_id}: {name}")
+
+        st.session_state.speaker_list = sorted(unique_speakers)
+        st.session_state.speaker_list_text = sorted(unique_speakers_edit)
+        st.session_state.transcript = transcript
+
+        # Start the report's extractions while the user reviews the transcript (see speculative)
+        st.session_state.speaker_renames = []
+        if st.session_state.get("speculation") is not None:
+            st.session_state.speculation.cancel()  # Superseded by this transcript
+        st.session_state.speculation = speculative.start(
+            transcript,
+            st.session_state.target_name,
+            st.session_state.metadata,
+            OPENAI_API_KEY,
+            REPORT_PROMPT_TYPES.get(st.session_state.report_type, [])
+        )
+
+    REPORT_PROMPT_TYPES = {
+        "highlights": ["format_text_highlight_prompt"],
+        "bullets": ["format_text_bullet_prompt"],
+        "both": ["format_text_bullet_prompt", "format_text_highlight_prompt"],
+    }
+
+    @st.cache_data(show_spinner=False, max_entries=32)
+    def estimate_report(transcript: str, target_name: str, metadata: dict, report_type: str) -> list:
+        """Plans each extraction a report needs, for the pre-flight estimate in Step 2."""
+        return [
+            plan_extraction(transcript, target_name, metadata, prompt_type)
+            for prompt_type in REPORT_PROMPT_TYPES.get(report_type, [])
+        ]
+
+    def extract_bullets_live(prompt_type: str):
+        """
+        Extracts bullets for the current transcript, showing each one as soon as it is parsed.
+
+        The strategy and model come from the token budgeter; a pre-filtered
+        plan streams the reduced transcript. Transcripts it plans as windowed
+        fall back to the regular (non-streaming) call.
+        """
+        plan = plan_extraction(
+            st.session_state.transcript,
+            st.session_state.target_name,
+            st.session_state.metadata,
+            prompt_type
+        )
+        if plan.windowed:
+            return extract_raw_data_from_text(
+                st.session_state.transcript,
+                st.session_state.target_name,
+                st.session_state.metadata,
+                OPENAI_API_KEY,
+                prompt_type,
+                windowed=True,
+                use_cache=st.session_state.use_cache,
+                model=plan.model
+            )
+
+        live = st.empty()
+        bullets = []
+        for bullet in iter_bullets_from_text(
+            plan.transcript_text or st.session_state.transcript,
+            st.session_state.target_name,
+            st.session_state.metadata,
+            OPENAI_API_KEY,
+            prompt_type,
+            use_cache=st.session_state.use_cache,
+            model=plan.model
+        ):
+            bullets.append(bullet)
+            live.markdown("\n".join(f"- {b.get('headline_raw', '')}" for b in bullets))
+        return bullets
+
+    def extract_for_report(prompt_types: list) -> dict:
+        """
+        Extracts each prompt type for the report, reusing results from the last run where possible.
+
+        After an edit-and-regenerate, only transcript windows that changed are
+        re-extracted (see incremental). The per-window state of every run is
+        kept in session state for the next edit. On the first run, the
+        speculative extraction started in Step 2 is reused when the transcript
+        is unchanged apart from speaker renames, and seeds the incremental
+        run otherwise (see speculative). Extraction runs under the report
+        job's deadline (Config.JOB_DEADLINE_SECONDS).
+        """
+        with deadlines.deadline(Config.JOB_DEADLINE_SECONDS, "report job"):
+            states = st.session_state.extraction_states
+            transcript = st.session_state.transcript
+            results = {}
+            speculation = st.session_state.get("speculation")
+            st.session_state.speculation = None
+            if speculation is not None and st.session_state.use_cache:
+                reused, speculative_states = speculation.resolve(
+                    transcript,
+                    st.session_state.target_name,
+                    prompt_types,
+                    st.session_state.get("speaker_renames", [])
+                )
+                states.update(speculative_states)
+                if reused is not None:
+                    return reused
+            elif speculation is not None:
+                speculation.cancel()
+            if st.session_state.use_cache and all(p in states for p in prompt_types):
+                for prompt_type in prompt_types:
+                    results[prompt_type], states[prompt_type] = extract_incremental(
+                        transcript,
+                        st.session_state.target_name,
+                        st.session_state.metadata,
+                        OPENAI_API_KEY,
+                        prompt_type,
+                        previous=states[prompt_type],
+                        use_cache=st.session_state.use_cache
+                    )
+                return results
+
+            if len(prompt_types) == 1:
+                results[prompt_types[0]] = extract_bullets_live(prompt_types[0])
+            else:
+                results = extract_many_from_text(
+                    transcript,
+                    st.session_state.target_name,
+                    st.session_state.metadata,
+                    OPENAI_API_KEY,
+                    prompt_types,
+                    use_cache=st.session_state.use_cache
+                )
+            for prompt_type, bullets in results.items():
+                states[prompt_type] = build_extraction_state(
+                    transcript, st.session_state.target_name, prompt_type, bullets
+                )
+            return results
+
     # UI layout
     st.title("TrackGPT: Tracking Report Tool")
     url = "https://docs.google.com/document/d/1SR45h_w20Vn1-KrCRfAfkf2E2-aDvH-mXu8S2eA4630/edit?usp=sharing"
@@ -123,9 +286,17 @@ if check_password():
         st.session_state.audio_path = None
     if "transcript_docx" not in st.session_state:
         st.session_state.transcript_docx = ""
+    if "transcript_pending" not in st.session_state:
+        st.session_state.transcript_pending = False
+    if "use_cache" not in st.session_state:
+        st.session_state.use_cache = True
+    if "extraction_states" not in st.session_state:
+        st.session_state.extraction_states = {}
     
     # Restart button
     if st.button("Restart"):
+        if st.session_state.get("speculation") is not None:
+            st.session_state.speculation.cancel()  # Its result would never be used
         for key in list(st.session_state.keys()):
             if key != "password_correct":
                 del st.session_state[key]
@@ -135,6 +306,7 @@ if check_password():
     # Set up API keys
     OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
     ASSEMBLYAI_API_KEY = st.secrets["ASSEMBLYAI_API_KEY"]
+    warm_openai_pool(OPENAI_API_KEY)
     
     # STEP 1: INPUT
     if st.session_state.step == "input":
@@ -179,6 +351,26 @@ if check_password():
         platform = st.text_input("Enter Platform:") if platform_box else "Local file"
         
         target_name = st.text_input("Target Name*")
+
+        trim_silence = st.checkbox(
+            "Skip silence and dead air before transcribing",
+            value=Config.TRIM_SILENCE,
+            help="Quiet stretches are cut before upload. Timestamps still match the original recording."
+        )
+
+        transcribe_tempo = st.select_slider(
+            "Transcription playback speed",
+            options=[1.0, 1.25, 1.5],
+            value=Config.TRANSCRIBE_TEMPO if Config.TRANSCRIBE_TEMPO in (1.0, 1.25, 1.5) else 1.0,
+            format_func=lambda v: f"{v:g}x",
+            help="Speeding audio up makes transcription faster and cheaper. Timestamps still match the original recording."
+        )
+
+        stream_transcript = st.checkbox(
+            "Show the transcript while it is processing",
+            help="Audio is transcribed in chunks and shown as each one finishes. "
+                 "Speaker letters may differ between chunks, so double-check names in Step 2."
+        )
         
         # Select which type of report
         st.subheader("Select Report Type:")
@@ -255,32 +447,21 @@ if check_password():
                     # --- Transcript handling ---
                     if transcript_input:
                         transcript = transcript_input
+                    elif stream_transcript:
+                        # Hand the audio to Step 2, which renders the transcript as chunks finish
+                        audio_path = audio_path or st.session_state.get("audio_path")
+                        if not audio_path:
+                            raise ValueError("No audio source available to transcribe.")
+                        st.session_state.transcript_pending = True
+                        st.session_state.transcribe_options = {"trim_silence": trim_silence, "tempo": transcribe_tempo}
+                        st.session_state.step = "edit_transcript"
+                        st.rerun()
                     else:
                         audio_path = audio_path or st.session_state.get("audio_path")  # add this line (optional but helpful)
                         if not audio_path:
                             raise ValueError("No audio source available to transcribe.")
-                        transcript = transcribe_file(audio_path, OPENAI_API_KEY, ASSEMBLYAI_API_KEY, target_name)
-                    # --- Format transcript HTML ---
-                    transcript = re.sub(r'(\[\d+:\d+:\d+\] Speaker [A-Z])', r'</p><p>\1', transcript)
-                    transcript = '<p>' + transcript.strip() + '</p>'
-
-                    # --- Extract speaker labels for editor ---
-                    pattern = r'\[[\d:.]+\]\s+(Speaker\s+[A-Z])\s+\(([^)]+)\):'
-                    matches = re.findall(pattern, transcript)
-
-                    unique_speakers = set()
-                    unique_speakers_edit = set()
-
-                    for speaker_id, name in matches:
-                        unique_speakers.add(f"{speaker_id} ({name})")
-                        unique_speakers_edit.add(f"{speaker_id}: {name}")
-
-                    speaker_list = sorted(unique_speakers)
-                    speaker_list_text = sorted(unique_speakers_edit)
-
-                    st.session_state.speaker_list = speaker_list
-                    st.session_state.speaker_list_text = speaker_list_text
-                    st.session_state.transcript = transcript
+                        transcript = transcribe_file(audio_path, OPENAI_API_KEY, ASSEMBLYAI_API_KEY, target_name, trim_silence, transcribe_tempo)
+                    prepare_transcript_for_edit(transcript)
                     st.session_state.step = "edit_transcript"
                     st.rerun()
 
@@ -303,7 +484,38 @@ if check_password():
         
         # Show current report type
         st.info(f"Report Type: {st.session_state.report_type.title()}")
-        
+
+        # Render a streamed transcript chunk by chunk, then reload into the editor
+        if st.session_state.transcript_pending:
+            preview = st.empty()
+            status = st.empty()
+            lines = []
+            try:
+                status.caption("Transcribing... the rest of the transcript will appear below as it is ready.")
+                # Each chunk arrives with its speakers already named (labelled per chunk)
+                for chunk_lines in iter_transcribe_file(
+                    st.session_state.audio_path,
+                    ASSEMBLYAI_API_KEY,
+                    OPENAI_API_KEY,
+                    st.session_state.target_name,
+                    **st.session_state.get("transcribe_options", {})
+                ):
+                    lines.extend(chunk_lines)
+                    preview.text("\n\n".join(lines))
+                prepare_transcript_for_edit("\n".join(lines))
+                st.session_state.transcript_pending = False
+                st.rerun()
+            except ChunkTranscriptionError as e:
+                # Finished chunks are checkpointed, so a retry only uploads the failed ones
+                status.empty()
+                st.error(f"Processing failed: {e}")
+                st.button("Retry failed chunks")  # Clicking reruns this step, which resumes the transcription
+                st.stop()
+            except Exception as e:
+                st.session_state.transcript_pending = False
+                st.error(f"Processing failed: {e}")
+                st.stop()
+
         # Edit Transcript Step for User
         edited_transcript = st.text_area(
             "Edit Transcript:",
@@ -330,6 +542,32 @@ if check_password():
             height=100
         )
 
+        # Cached results are reused for an unchanged transcript unless the user opts out
+        regenerate = st.checkbox(
+            "Regenerate from scratch (ignore cached results)",
+            help="Reports for an unchanged transcript are normally reused instantly."
+        )
+        st.session_state.use_cache = not regenerate
+
+        # Pre-flight estimate of tokens, cost and latency for the edited transcript
+        if st.session_state.report_type in REPORT_PROMPT_TYPES:
+            try:
+                plans = estimate_report(
+                    edited_transcript,
+                    st.session_state.target_name,
+                    st.session_state.metadata,
+                    st.session_state.report_type
+                )
+                for plan in plans:
+                    st.caption(f"Estimate: {plan.describe()}")
+                if len(plans) > 1:
+                    st.caption(
+                        f"Total: ~${sum(p.cost_usd for p in plans):.3f}, "
+                        f"~{max(p.latency_s for p in plans):.0f}s (run concurrently)"
+                    )
+            except Exception as e:
+                log.warning(f"Could not estimate extraction cost: {e}")
+
         col1, col2 = st.columns(2)
         
         with col1:
@@ -362,16 +600,16 @@ if check_password():
                 if len(st.session_state.speaker_list) != len(speaker_list_edited):
                     st.write("Issue with changing speakers. Please manually change the output.")
                     st.session_state.transcript = transcript
+                    st.session_state.speaker_renames = []
                     st.session_state.step = "generate_report"
                     st.rerun()
                 else:
                     # Replace speaker labels in transcript
                     print("original speakers", st.session_state.speaker_list)
                     print("edited speakers", speaker_list_edited)
-                    for original_speaker, edited_speaker in zip(st.session_state.speaker_list, speaker_list_edited):
-                        transcript = transcript.replace(original_speaker, edited_speaker.strip())
-                        # st.write(f"Replaced '{original_speaker}' with '{edited_speaker}'")
-                        # st.write(transcript)
+                    renames = list(zip(st.session_state.speaker_list, speaker_list_edited))
+                    transcript = speculative.rename_speakers(transcript, renames)
+                    st.session_state.speaker_renames = renames
 
                     transcript_docx = re.sub(r'<p>', '<br><br>', transcript)
             
@@ -391,18 +629,13 @@ if check_password():
         output_dir.mkdir(parents=True, exist_ok=True)
         html_path = output_dir / f"{base_filename}_report.html"
         docx_path = output_dir / f"{base_filename}_report.docx"
+        usage_marker = llm_metrics.mark()
         
         try:
             # Call higlight step from analyzer.py
             if st.session_state.report_type == "highlights":
                 with st.spinner("Writing Highlights..."):
-                    bullets = extract_raw_data_from_text(
-                        st.session_state.transcript, 
-                        st.session_state.target_name, 
-                        st.session_state.metadata, 
-                        OPENAI_API_KEY, 
-                        "format_text_highlight_prompt"
-                    )
+                    bullets = extract_for_report(["format_text_highlight_prompt"])["format_text_highlight_prompt"]
 
                 # Format report with function from output.py
                 with st.spinner("Formatting Report..."):
@@ -424,13 +657,9 @@ if check_password():
             # Call bullet step from analyzer.py
             elif st.session_state.report_type == "bullets":
                 with st.spinner("Writing Bullets..."):
-                    bullets = extract_raw_data_from_text(
-                        st.session_state.transcript, 
-                        st.session_state.target_name, 
-                        st.session_state.metadata, 
-                        OPENAI_API_KEY, 
-                        "format_text_bullet_prompt"
-                    )
+                    bullets = extract_for_report(["format_text_bullet_prompt"])["format_text_bullet_prompt"]
+                    # Check each quote against the transcript and attach its timestamp
+                    bullets = verify_bullets(st.session_state.transcript, bullets)
                 # Format report with function from output.py
                 with st.spinner("Formatting Report..."):
                     html = generate_report_bullets(
@@ -449,24 +678,11 @@ if check_password():
                     )
             
             elif st.session_state.report_type == "both":
-                # Call bullet step from analyzer.py
-                with st.spinner("Writing Bullets..."):
-                    bullets = extract_raw_data_from_text(
-                        st.session_state.transcript, 
-                        st.session_state.target_name, 
-                        st.session_state.metadata, 
-                        OPENAI_API_KEY, 
-                        "format_text_bullet_prompt"
-                    )
-                # Call highlight step from analyzer.py
-                with st.spinner("Writing Highlights..."):
-                        highlights = extract_raw_data_from_text(
-                            st.session_state.transcript, 
-                            st.session_state.target_name, 
-                            st.session_state.metadata, 
-                            OPENAI_API_KEY, 
-                            "format_text_highlight_prompt"
-                        )
+                # Call bullet and highlight steps from analyzer.py concurrently
+                with st.spinner("Writing Bullets and Highlights..."):
+                    results = extract_for_report(["format_text_bullet_prompt", "format_text_highlight_prompt"])
+                    bullets = verify_bullets(st.session_state.transcript, results["format_text_bullet_prompt"])
+                    highlights = results["format_text_highlight_prompt"]
                 # Format report with both bullets and highlights from output.py
                 with st.spinner("Formatting Report..."):
                         html = generate_report_both(
@@ -493,6 +709,8 @@ if check_password():
                     docx = f"<h2>{st.session_state.target_name} Transcript</h2>" + st.session_state.transcript_docx
             
             # Store results in session_state
+            st.session_state.llm_usage = llm_metrics.calls_since(usage_marker)
+            st.session_state.summary = None  # Summaries of an earlier version of the transcript
             st.session_state.html_report = html
             save_text_file(html, html_path)
 
@@ -570,6 +788,35 @@ if check_password():
                     mime="audio/mpeg"
                 )
         
+        # Token usage per LLM call, including input served from the provider's prompt cache
+        if st.session_state.get("llm_usage"):
+            with st.expander("LLM token usage"):
+                st.code(llm_metrics.format_report(st.session_state.llm_usage), language=None)
+                st.caption("Latency and estimated cost per model tier")
+                st.code(format_tier_report(st.session_state.llm_usage), language=None)
+
+        # Written summary of the transcript; window summaries are cached, so re-runs after edits are quick
+        if st.button("Summarize Transcript"):
+            with st.spinner("Summarizing transcript..."):
+                try:
+                    with deadlines.deadline(Config.JOB_DEADLINE_SECONDS, "summary job"):
+                        st.session_state.summary = legacy_analyze_transcript(
+                            st.session_state.transcript,
+                            st.session_state.target_name,
+                            OPENAI_API_KEY,
+                            use_cache=st.session_state.use_cache
+                        )
+                except Exception as e:
+                    st.error(f"Summary failed: {e}")
+        if st.session_state.get("summary"):
+            with st.expander("Summary", expanded=True):
+                st.markdown(st.session_state.summary)
+
+        # Go back to fix names or typos; only the changed parts of the transcript are re-analyzed
+        if st.session_state.report_type != "transcript_only" and st.button("Edit Transcript and Regenerate"):
+            st.session_state.step = "edit_transcript"
+            st.rerun()
+
         # Option to start over
         if st.button("Create Another Report"):
             for key in list(st.session_state.keys()):
@@ -0,0 +1,303 @@
+"""
+Module for preparing audio before it is sent for transcription.
+
+Handles:
+- Detecting non-speech regions (dead air, long pauses) with ffmpeg's
+  energy-based `silencedetect` filter
+- Cutting those regions out of the audio before upload
+- Time-compressing speech with ffmpeg's `atempo` filter to cut upload size
+  and per-minute transcription time
+- Mapping timestamps from the trimmed/sped-up audio back to original media time
+"""
+import os
+import re
+import logging
+import tempfile
+import subprocess
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_NOISE_DB = -35  # Anything quieter than this counts as silence
+DEFAULT_MIN_SILENCE_SECONDS = 2.0  # Shorter pauses are kept to preserve natural speech
+DEFAULT_PADDING_SECONDS = 0.25  # Speech kept on either side of a removed region
+MIN_SAVING_RATIO = 0.05  # Skip trimming when it would remove less than 5% of the audio
+MAX_ATEMPO = 2.0  # Largest factor a single atempo filter accepts on older ffmpeg builds
+MAX_KEPT_REGIONS = 200  # Regions in one aselect expression; ffmpeg evaluates every term for every frame
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+class OffsetMap:
+    """
+    Maps times in a trimmed and/or sped-up audio file back to times in the original media.
+
+    The map is a list of kept segments, each stored as
+    (trimmed_start_seconds, original_start_seconds, duration_seconds), in order.
+    An empty list means nothing was trimmed. `tempo` is the playback factor the
+    trimmed audio was sped up by; times are multiplied by it before the
+    segment lookup.
+    """
+
+    def __init__(self, segments: Optional[List[Tuple[float, float, float]]] = None, tempo: float = 1.0):
+        self.segments = segments or []
+        self.tempo = tempo
+        self._starts = [seg[0] for seg in self.segments]
+
+    @classmethod
+    def from_kept_regions(cls, regions: List[Tuple[float, float]]) -> "OffsetMap":
+        """Builds a map from the (start, end) regions of the original audio that were kept."""
+        segments = []
+        trimmed_pos = 0.0
+        for start, end in regions:
+            duration = end - start
+            if duration <= 0:
+                continue
+            segments.append((trimmed_pos, start, duration))
+            trimmed_pos += duration
+        return cls(segments)
+
+    def with_tempo(self, tempo: float) -> "OffsetMap":
+        """Returns a copy of this map for audio that was further sped up by `tempo`."""
+        return OffsetMap(self.segments, self.tempo * tempo)
+
+    def to_original(self, seconds: float) -> float:
+        """Converts a time in the processed audio (seconds) to original media time."""
+        seconds *= self.tempo
+        if not self.segments:
+            return seconds
+        idx = max(bisect_right(self._starts, seconds) - 1, 0)
+        trimmed_start, original_start, duration = self.segments[idx]
+        # Clamp into the segment so times past the end stay inside kept audio
+        offset = min(max(seconds - trimmed_start, 0.0), duration)
+        return original_start + offset
+
+    def to_original_ms(self, ms: float) -> int:
+        """Millisecond version of `to_original`, matching AssemblyAI timestamps."""
+        return int(round(self.to_original(ms / 1000) * 1000))
+
+    @property
+    def kept_seconds(self) -> float:
+        return sum(seg[2] for seg in self.segments)
+
+
+def temp_audio_path(audio_path, tag: str, suffix: Optional[str] = None) -> Path:
+    """
+    Creates an empty, uniquely named temporary file for audio derived from `audio_path`.
+
+    The name keeps the source's stem and `tag` for debugging but is unique, so
+    concurrent sessions working on files with the same name never overwrite
+    each other's output. The caller is responsible for deleting the file.
+    """
+    audio_path = Path(audio_path)
+    fd, name = tempfile.mkstemp(prefix=f"{audio_path.stem}_{tag}_", suffix=suffix or audio_path.suffix)
+    os.close(fd)
+    return Path(name)
+
+
+def detect_silences(
+    audio_path: str,
+    noise_db: float = DEFAULT_NOISE_DB,
+    min_silence_seconds: float = DEFAULT_MIN_SILENCE_SECONDS,
+) -> List[Tuple[float, float]]:
+    """
+    Runs ffmpeg's silencedetect filter and returns the silent regions found.
+
+    Args:
+        audio_path: Path to the audio file to scan.
+        noise_db: Level in dB below which audio counts as silence.
+        min_silence_seconds: Minimum length of a silent region.
+
+    Returns:
+        A list of (start, end) tuples in seconds. A silence that runs to the end
+        of the file is returned with an end of `float('inf')`.
+    """
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostats',
+        '-i', str(audio_path),
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_silence_seconds}',
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Silence detection failed: {e.stderr}")
+        raise RuntimeError(f"Silence detection failed: {str(e)}")
+
+    silences = []
+    current_start = None
+    for line in result.stderr.splitlines():
+        m = _SILENCE_START_RE.search(line)
+        if m:
+            current_start = max(float(m.group(1)), 0.0)
+            continue
+        m = _SILENCE_END_RE.search(line)
+        if m and current_start is not None:
+            silences.append((current_start, float(m.group(1))))
+            current_start = None
+    if current_start is not None:
+        silences.append((current_start, float('inf')))
+
+    logger.debug(f"Detected {len(silences)} silent regions in {audio_path}")
+    return silences
+
+
+def speech_regions(
+    silences: List[Tuple[float, float]],
+    total_duration: float,
+    padding_seconds: float = DEFAULT_PADDING_SECONDS,
+) -> List[Tuple[float, float]]:
+    """
+    Inverts a list of silent regions into the regions of audio to keep.
+
+    Each silence is shrunk by `padding_seconds` on both sides so word onsets and
+    tails next to a pause are not clipped. Silences touching the start or end of
+    the file are removed completely.
+    """
+    regions = []
+    pos = 0.0
+    for start, end in silences:
+        cut_start = start + padding_seconds if start > 0 else 0.0
+        cut_end = end - padding_seconds if end < total_duration else total_duration
+        if cut_end <= cut_start:
+            continue
+        if cut_start > pos:
+            regions.append((pos, cut_start))
+        pos = max(pos, cut_end)
+    if pos < total_duration:
+        regions.append((pos, total_duration))
+    return regions
+
+
+def cap_regions(regions: List[Tuple[float, float]], max_regions: int = MAX_KEPT_REGIONS) -> List[Tuple[float, float]]:
+    """
+    Merges kept regions across the shortest gaps until at most `max_regions` remain.
+
+    A long recording can have thousands of speech regions, and the trimming
+    filter checks every one of them for every audio frame. Bridging the
+    shortest pauses keeps the filter cheap while still removing the long ones.
+    """
+    if len(regions) <= max(max_regions, 1):
+        return regions
+    by_gap = sorted(range(len(regions) - 1), key=lambda i: regions[i + 1][0] - regions[i][1])
+    bridged = set(by_gap[:len(regions) - max(max_regions, 1)])  # Gap i lies between regions i and i + 1
+    merged = [regions[0]]
+    for i, (start, end) in enumerate(regions[1:]):
+        if i in bridged:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    longest = max(regions[i + 1][0] - regions[i][1] for i in bridged)
+    logger.debug(f"Merged {len(regions)} kept regions into {len(merged)} (pauses up to {longest:.2f}s kept)")
+    return merged
+
+
+def trim_non_speech(
+    audio_path: str,
+    total_duration: float,
+    noise_db: float = DEFAULT_NOISE_DB,
+    min_silence_seconds: float = DEFAULT_MIN_SILENCE_SECONDS,
+    padding_seconds: float = DEFAULT_PADDING_SECONDS,
+) -> Tuple[str, Optional[OffsetMap]]:
+    """
+    Removes non-speech regions from an audio file ahead of transcription.
+
+    Args:
+        audio_path: Path to the original audio file.
+        total_duration: Duration of the original audio in seconds.
+        noise_db: Level in dB below which audio counts as silence.
+        min_silence_seconds: Minimum length of a region worth removing.
+        padding_seconds: Audio kept on either side of each removed region.
+
+    Returns:
+        A tuple of (path_to_transcribe, offset_map). When trimming would save
+        too little to be worth a re-encode, the original path is returned with
+        an offset map of None. Otherwise the path points to a new temporary file
+        that the caller is responsible for deleting.
+    """
+    silences = detect_silences(audio_path, noise_db, min_silence_seconds)
+    regions = cap_regions(speech_regions(silences, total_duration, padding_seconds))
+    offset_map = OffsetMap.from_kept_regions(regions)
+
+    removed = total_duration - offset_map.kept_seconds
+    if not regions or removed < total_duration * MIN_SAVING_RATIO:
+        logger.info(f"Skipping silence trimming: only {removed:.1f}s of {total_duration:.1f}s is silent")
+        return str(audio_path), None
+
+    audio_path = Path(audio_path)
+    trimmed_path = temp_audio_path(audio_path, "speech", ".mp3")
+    select_expr = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+
+    try:
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-i', str(audio_path),
+            '-af', f"aselect='{select_expr}',asetpts=N/SR/TB",
+            '-vn',
+            str(trimmed_path)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to trim silence from {audio_path}: {str(e)}")
+        trimmed_path.unlink(missing_ok=True)
+        raise RuntimeError(f"Failed to trim silence: {str(e)}")
+
+    logger.info(
+        f"Trimmed {removed:.1f}s of non-speech audio ({removed / total_duration:.0%}) "
+        f"across {len(regions)} kept regions"
+    )
+    return str(trimmed_path), offset_map
+
+
+def atempo_filter(factor: float) -> str:
+    """
+    Builds an ffmpeg filter string that speeds audio up by `factor` without changing pitch.
+
+    Factors above MAX_ATEMPO are split into a chain of atempo filters, since
+    older ffmpeg builds reject a single atempo above 2.0.
+    """
+    if factor <= 0:
+        raise ValueError(f"Tempo factor must be positive, got {factor}")
+    stages = []
+    remaining = factor
+    while remaining > MAX_ATEMPO:
+        stages.append(MAX_ATEMPO)
+        remaining /= MAX_ATEMPO
+    stages.append(remaining)
+    return ",".join(f"atempo={stage:.4f}" for stage in stages)
+
+
+def speed_up_audio(audio_path: str, factor: float, suffix: str = "fast") -> str:
+    """
+    Writes a time-compressed copy of an audio file for faster, cheaper transcription.
+
+    Args:
+        audio_path: Path to the audio file to speed up.
+        factor: Playback speed, e.g. 1.25 or 1.5. Timestamps in the result must
+                be multiplied by this factor to get back to input time.
+        suffix: Tag added to the temporary file name.
+
+    Returns:
+        Path to a new temporary mp3 file that the caller is responsible for deleting.
+    """
+    audio_path = Path(audio_path)
+    fast_path = temp_audio_path(audio_path, f"{suffix}{factor:g}x", ".mp3")
+
+    try:
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-i', str(audio_path),
+            '-af', atempo_filter(factor),
+            '-vn',
+            str(fast_path)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to speed up {audio_path} by {factor}x: {str(e)}")
+        fast_path.unlink(missing_ok=True)
+        raise RuntimeError(f"Failed to speed up audio: {str(e)}")
+
+    logger.info(f"Created {factor:g}x time-compressed audio: {fast_path}")
+    return str(fast_path)
@@ -0,0 +1,469 @@
+"""
+Offline batch mode for queued, non-urgent report jobs.
+
+Collects the extraction prompts of many jobs into a single provider batch
+(the OpenAI Batch API runs them within 24 hours at half the synchronous price
+and outside the interactive rate limits), tracks the batch, and fans the
+parsed bullets back out into one report per job.
+
+A file-based local backend with the same interface stands in for the Batch
+API in tests and offline runs: it writes the same input/output JSONL files and
+answers each request with a responder function (by default a synchronous
+Chat Completions call).
+
+Jobs are listed in a JSON file, one object per job:
+    {"id": "duggan-townhall", "transcript": "transcripts/duggan.txt",
+     "target_name": "Mike Duggan", "report_type": "both",
+     "metadata": {"title": "...", "uploader": "...", "upload_date": "20250101",
+                  "extractor": "youtube", "webpage_url": "https://..."}}
+`transcript` is a path to a labelled transcript text file; `report_type` is
+highlights, bullets or both. A job may give "target_names": [...] instead of
+"target_name" to extract several people (e.g. debate candidates) in one pass;
+it then gets one report per target.
+
+Usage:
+    python batch.py submit jobs.json [--name overnight] [--backend openai|local]
+    python batch.py status overnight
+    python batch.py collect overnight [--wait] [--no-fallback]
+"""
+import argparse
+import io
+import json
+import logging
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from analyzer import (
+    build_extraction_messages, parse_bullet_response, extract_raw_data_from_text, split_bullets_by_target,
+    decode_bullets
+)
+from structured_output import OUTPUT_FORMAT_JSON, StructuredOutputError, parse_json_response, response_format
+from transcript_windows import split_transcript_windows, merge_window_bullets
+from openai_clients import get_openai_client
+from retry_policy import call_with_retry
+from output import generate_report_highlights, generate_report_bullets, generate_report_both, save_text_file
+from quote_index import verify_bullets
+import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+# Constants
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_SECONDS = 60
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+REPORT_PROMPT_TYPES = {
+    "highlights": ["format_text_highlight_prompt"],
+    "bullets": ["format_text_bullet_prompt"],
+    "both": ["format_text_bullet_prompt", "format_text_highlight_prompt"],
+}
+
+
+class OpenAIBatchBackend:
+    """Submits request files to the OpenAI Batch API."""
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        self.client = client or get_openai_client(Config.OPENAI_API_KEY)
+
+    def submit(self, input_path: Path) -> str:
+        def _upload():
+            with open(input_path, "rb") as f:  # Reopened on every attempt
+                return self.client.files.create(file=f, purpose="batch")
+
+        uploaded = call_with_retry("openai", _upload, label="batch upload")
+        batch = call_with_retry(
+            "openai", self.client.batches.create,
+            input_file_id=uploaded.id,
+            endpoint=ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+            label="batch create",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        batch = call_with_retry("openai", self.client.batches.retrieve, batch_id, label="batch status")
+        counts = getattr(batch, "request_counts", None)
+        return {
+            "status": batch.status,
+            "completed": getattr(counts, "completed", 0) if counts else 0,
+            "failed": getattr(counts, "failed", 0) if counts else 0,
+            "total": getattr(counts, "total", 0) if counts else 0,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        info = self.status(batch_id)
+        lines = []
+        for file_id in (info["output_file_id"], info["error_file_id"]):
+            if file_id:
+                text = call_with_retry("openai", self.client.files.content, file_id, label="batch download").text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+def _chat_responder(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Answers one batch request with a synchronous Chat Completions call."""
+    client = get_openai_client(Config.OPENAI_API_KEY)
+    response = call_with_retry("openai", client.chat.completions.create, label="local batch request", **request["body"])
+    return response.model_dump()
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API.
+
+    Batches live under `root/<batch_id>/` as input.jsonl, output.jsonl and
+    status.json, in the same line formats as the Batch API. Requests are
+    answered when the batch is first checked after submission, by
+    `responder(request) -> chat completion dict` (a synchronous API call by
+    default; tests pass a function returning canned completions).
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.root = Path(root)
+        self.responder = responder or _chat_responder
+
+    def _dir(self, batch_id: str) -> Path:
+        return self.root / batch_id
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        batch_dir = self._dir(batch_id)
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        (batch_dir / "input.jsonl").write_bytes(Path(input_path).read_bytes())
+        self._write_status(batch_id, "validating")
+        return batch_id
+
+    def _write_status(self, batch_id: str, status: str, **counts: int) -> None:
+        data = {"status": status, "completed": 0, "failed": 0, "total": 0, **counts}
+        (self._dir(batch_id) / "status.json").write_text(json.dumps(data), encoding="utf-8")
+
+    def _process(self, batch_id: str) -> None:
+        batch_dir = self._dir(batch_id)
+        requests = [json.loads(l) for l in (batch_dir / "input.jsonl").read_text(encoding="utf-8").splitlines() if l.strip()]
+        completed = failed = 0
+        with open(batch_dir / "output.jsonl", "w", encoding="utf-8") as out:
+            for request in requests:
+                line = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+                try:
+                    line["response"] = {"status_code": 200, "body": self.responder(request)}
+                    line["error"] = None
+                    completed += 1
+                except Exception as e:
+                    line["response"] = None
+                    line["error"] = {"code": type(e).__name__, "message": str(e)}
+                    failed += 1
+                out.write(json.dumps(line) + "\n")
+        self._write_status(batch_id, "completed", completed=completed, failed=failed, total=len(requests))
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        status = json.loads((self._dir(batch_id) / "status.json").read_text(encoding="utf-8"))
+        if status["status"] == "validating":
+            self._process(batch_id)
+            status = json.loads((self._dir(batch_id) / "status.json").read_text(encoding="utf-8"))
+        return status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        path = self._dir(batch_id) / "output.jsonl"
+        return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+
+def get_backend(name: str, batch_dir: Optional[Path] = None):
+    """Returns the batch backend called `name` ("openai" or "local")."""
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalBatchBackend(Path(batch_dir or Config.BATCH_DIR) / "_local")
+    raise ValueError(f"Unknown batch backend: {name}")
+
+
+def _job_windows(transcript_text: str) -> List[str]:
+    """Splits long transcripts into windows, as interactive extraction would; short ones stay whole."""
+    if len(transcript_text) <= Config.WINDOWED_EXTRACTION_MIN_CHARS:
+        return [transcript_text]
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
+    )
+    return [w.text for w in windows] or [transcript_text]
+
+
+def _job_target(job: Dict[str, Any]):
+    """The target of a job as passed to the prompts: one name, or the list of several targets."""
+    targets = job["targets"]
+    return targets if len(targets) > 1 else targets[0]
+
+
+def build_requests(jobs: List[Dict[str, Any]], model: str, output_format: str, max_bullets: int = 100):
+    """
+    Builds the batch request lines for every job.
+
+    A job with several targets gets one request per window and prompt type
+    covering all of them, with bullets tagged by target.
+
+    Returns:
+        (request lines, index) where the index maps each custom_id to its
+        job, prompt type and window number.
+    """
+    lines = []
+    index = {}
+    for job in jobs:
+        windows = _job_windows(job["transcript_text"])
+        multi_target = len(job["targets"]) > 1
+        for prompt_type in REPORT_PROMPT_TYPES[job["report_type"]]:
+            for number, text in enumerate(windows):
+                custom_id = f"{job['id']}|{prompt_type}|{number}"
+                messages = build_extraction_messages(
+                    text, _job_target(job), job["metadata"], prompt_type, max_bullets, output_format
+                )
+                body = {"model": model, "messages": messages, "temperature": 0.0}
+                if output_format == OUTPUT_FORMAT_JSON:
+                    body["response_format"] = response_format(prompt_type, multi_target)
+                lines.append({"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body})
+                index[custom_id] = {"job": job["id"], "prompt_type": prompt_type, "window": number, "windows": len(windows)}
+    return lines, index
+
+
+def _batch_dir(name: str) -> Path:
+    return Path(Config.BATCH_DIR) / name
+
+
+def load_jobs(jobs_file: str) -> List[Dict[str, Any]]:
+    """Reads a jobs file and loads each job's transcript."""
+    base = Path(jobs_file).parent
+    with open(jobs_file, encoding="utf-8") as f:
+        jobs = json.load(f)
+    for job in jobs:
+        if job.get("report_type") not in REPORT_PROMPT_TYPES:
+            raise ValueError(f"Job {job.get('id')}: report_type must be one of {sorted(REPORT_PROMPT_TYPES)}")
+        job["targets"] = job.get("target_names") or [job.get("target_name")]
+        if not all(job["targets"]):
+            raise ValueError(f"Job {job.get('id')}: target_name or target_names is required")
+        path = Path(job["transcript"])
+        job["transcript_text"] = (path if path.is_absolute() else base / path).read_text(encoding="utf-8")
+        job.setdefault("metadata", {})
+    return jobs
+
+
+def submit(jobs: List[Dict[str, Any]], name: Optional[str] = None, backend_name: Optional[str] = None) -> Path:
+    """
+    Submits the extraction requests of all jobs as one batch.
+
+    Returns:
+        The batch directory holding the manifest and request file.
+    """
+    name = name or datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    backend_name = backend_name or Config.BATCH_BACKEND
+    batch_dir = _batch_dir(name)
+    batch_dir.mkdir(parents=True, exist_ok=True)
+
+    model = Config.ANALYSIS_MODEL
+    output_format = Config.EXTRACTION_OUTPUT_FORMAT
+    lines, index = build_requests(jobs, model, output_format)
+    input_path = batch_dir / "requests.jsonl"
+    with open(input_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    batch_id = get_backend(backend_name).submit(input_path)
+    manifest = {
+        "name": name,
+        "backend": backend_name,
+        "batch_id": batch_id,
+        "model": model,
+        "output_format": output_format,
+        "created": time.time(),
+        "jobs": jobs,
+        "requests": index,
+    }
+    (batch_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Submitted {len(lines)} requests for {len(jobs)} jobs as batch {batch_id} ({backend_name})")
+    return batch_dir
+
+
+def load_manifest(name: str) -> Dict[str, Any]:
+    return json.loads((_batch_dir(name) / "manifest.json").read_text(encoding="utf-8"))
+
+
+def status(name: str) -> Dict[str, Any]:
+    """Returns the provider status of a submitted batch."""
+    manifest = load_manifest(name)
+    return get_backend(manifest["backend"]).status(manifest["batch_id"])
+
+
+def _parse_line(line: Dict[str, Any], prompt_type: str, output_format: str, model: str):
+    """Returns the bullets of one result line, or None if the request failed or its reply is unusable."""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        logger.warning(f"Batch request {line.get('custom_id')} failed: {line.get('error') or response.get('status_code')}")
+        return None
+    body = response["body"]
+    llm_metrics.record_call(f"batch {line['custom_id']}", body.get("model", model), body.get("usage"))
+    content = body["choices"][0]["message"].get("content")
+    try:
+        if output_format == OUTPUT_FORMAT_JSON:
+            return parse_json_response(content, prompt_type)
+        return parse_bullet_response(content, prompt_type)
+    except StructuredOutputError as e:
+        logger.warning(f"Batch request {line['custom_id']} returned an unusable reply: {e}")
+        return None
+
+
+def collect(name: str, fallback: bool = True, max_bullets: int = 100) -> Dict[str, Dict[str, list]]:
+    """
+    Downloads a completed batch and writes one report per job.
+
+    Requests that failed or came back unusable are re-run synchronously
+    (delimited fallback included) unless `fallback` is False.
+
+    Returns:
+        For each job id and each of its targets, the bullets per prompt type.
+    """
+    manifest = load_manifest(name)
+    batch_dir = _batch_dir(name)
+    backend = get_backend(manifest["backend"])
+    info = backend.status(manifest["batch_id"])
+    if info["status"] != "completed":
+        raise RuntimeError(f"Batch {name} is not complete (status: {info['status']}).")
+
+    jobs = {job["id"]: job for job in manifest["jobs"]}
+    index = manifest["requests"]
+    per_window: Dict[str, Dict[str, Dict[int, list]]] = {}
+    answered = set()
+    for line in backend.results(manifest["batch_id"]):
+        entry = index.get(line.get("custom_id"))
+        if entry is None:
+            continue
+        bullets = _parse_line(line, entry["prompt_type"], manifest["output_format"], manifest["model"])
+        if bullets is not None:
+            bullets = decode_bullets(_job_windows(jobs[entry["job"]]["transcript_text"])[entry["window"]], bullets)
+            per_window.setdefault(entry["job"], {}).setdefault(entry["prompt_type"], {})[entry["window"]] = bullets
+            answered.add(line["custom_id"])
+
+    missing = [custom_id for custom_id in index if custom_id not in answered]
+    if missing:
+        logger.warning(f"{len(missing)} batch requests have no usable result" + ("; re-running them now." if fallback else "."))
+    if fallback:
+        for custom_id in missing:
+            entry = index[custom_id]
+            job = jobs[entry["job"]]
+            text = _job_windows(job["transcript_text"])[entry["window"]]
+            bullets = extract_raw_data_from_text(
+                text, _job_target(job), job["metadata"], Config.OPENAI_API_KEY,
+                entry["prompt_type"], max_bullets, windowed=False, model=manifest["model"],
+            )
+            if isinstance(bullets, dict):  # Several targets: re-tag for the split below
+                bullets = [dict(b, target_raw=t) for t, target_bullets in bullets.items() for b in target_bullets]
+            per_window.setdefault(entry["job"], {}).setdefault(entry["prompt_type"], {})[entry["window"]] = bullets
+
+    results = {}
+    for job_id, job in jobs.items():
+        targets = job["targets"]
+        results[job_id] = {target: {} for target in targets}
+        for prompt_type in REPORT_PROMPT_TYPES[job["report_type"]]:
+            windows = per_window.get(job_id, {}).get(prompt_type, {})
+            merged = merge_window_bullets([windows[i] for i in sorted(windows)], max_bullets * len(targets))
+            if len(targets) > 1:
+                for target, bullets in split_bullets_by_target(merged, targets, max_bullets).items():
+                    results[job_id][target][prompt_type] = bullets
+            else:
+                results[job_id][targets[0]][prompt_type] = merged
+        for target in targets:
+            write_report(job, target, results[job_id][target], batch_dir / "reports")
+
+    (batch_dir / "results.json").write_text(json.dumps(results, ensure_ascii=False), encoding="utf-8")
+    return results
+
+
+def write_report(job: Dict[str, Any], target_name: str, bullets: Dict[str, list], out_dir: Path) -> Path:
+    """Writes the HTML (and, if html2docx is installed, DOCX) report of one job and target."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    transcript = re.sub(r'(\[\d+:\d+:\d+\] )', r'</p><p>\1', job["transcript_text"])
+    transcript = '<p>' + transcript.strip() + '</p>'
+    transcript_docx = re.sub(r'<p>', '<br><br>', transcript)
+    metadata = job["metadata"]
+    if "format_text_bullet_prompt" in bullets:
+        bullets = dict(bullets)
+        bullets["format_text_bullet_prompt"] = verify_bullets(transcript, bullets["format_text_bullet_prompt"])
+    stem = job["id"] if len(job["targets"]) == 1 else f"{job['id']}_" + "".join(c if c.isalnum() else "_" for c in target_name)
+
+    def _render(transcript_text: str, html_or_docx: str) -> str:
+        if job["report_type"] == "highlights":
+            return generate_report_highlights(
+                metadata, bullets["format_text_highlight_prompt"], transcript_text, target_name, html_or_docx
+            )
+        if job["report_type"] == "bullets":
+            return generate_report_bullets(
+                metadata, bullets["format_text_bullet_prompt"], transcript_text, target_name, html_or_docx
+            )
+        return generate_report_both(
+            metadata, bullets["format_text_bullet_prompt"], bullets["format_text_highlight_prompt"],
+            transcript_text, target_name, html_or_docx
+        )
+
+    html_path = out_dir / f"{stem}_report.html"
+    save_text_file(_render(transcript, "html"), html_path)
+    try:
+        from html2docx import html2docx
+        document = html2docx(_render(transcript_docx, "docx"), title=f"{target_name} Report")
+        buffer = io.BytesIO()
+        document.save(buffer)
+        (out_dir / f"{stem}_report.docx").write_bytes(buffer.getvalue())
+    except Exception as e:
+        logger.warning(f"DOCX export failed for job {job['id']}: {e}")
+    return html_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run report extraction for many jobs as one offline batch.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_submit = sub.add_parser("submit", help="Submit a jobs file as a batch")
+    p_submit.add_argument("jobs", help="JSON file listing the jobs")
+    p_submit.add_argument("--name", help="Batch name (default: batch_<timestamp>)")
+    p_submit.add_argument("--backend", choices=["openai", "local"], help="Defaults to BATCH_BACKEND")
+    p_status = sub.add_parser("status", help="Show the status of a batch")
+    p_status.add_argument("name")
+    p_collect = sub.add_parser("collect", help="Download results and write the reports")
+    p_collect.add_argument("name")
+    p_collect.add_argument("--wait", action="store_true", help="Poll until the batch finishes")
+    p_collect.add_argument("--no-fallback", action="store_true", help="Do not re-run failed requests synchronously")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable INFO logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == "submit":
+        batch_dir = submit(load_jobs(args.jobs), args.name, args.backend)
+        print(f"Submitted. Batch directory: {batch_dir}")
+    elif args.command == "status":
+        print(json.dumps(status(args.name), indent=2))
+    elif args.command == "collect":
+        while args.wait and status(args.name)["status"] not in TERMINAL_STATUSES:
+            time.sleep(POLL_SECONDS)
+        try:
+            results = collect(args.name, fallback=not args.no_fallback)
+        except RuntimeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        for job_id, per_target in results.items():
+            for target, per_type in per_target.items():
+                counts = ", ".join(f"{p}: {len(b)}" for p, b in per_type.items())
+                print(f"{job_id} / {target}: {counts}")
+        print(f"Reports written to {_batch_dir(args.name) / 'reports'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark for the accelerated-playback transcription mode.
+
+Transcribes each sample file at several playback speeds and reports word
+error rate (WER), upload size and wall-clock latency per speed, so a safe
+TRANSCRIBE_TEMPO can be picked per source type.
+
+Samples are listed in a CSV file with the columns `audio`, `source_type` and
+an optional `reference` (path to a plain-text reference transcript). When no
+reference is given, the 1.0x transcript is used as the reference, so the WER
+column shows how much speeding up changes the output.
+
+Usage:
+    python bench_tempo.py samples.csv --speeds 1.0 1.25 1.5 1.75 [--csv results.csv]
+
+The AssemblyAI key is read from the ASSEMBLYAI_API_KEY environment variable.
+"""
+import argparse
+import csv
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any
+
+from audio_prep import speed_up_audio
+
+try:
+    import assemblyai as aai
+except ImportError:
+    print("ERROR: 'assemblyai' library not found. Install using: pip install assemblyai", file=sys.stderr)
+    sys.exit(1)
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercases text, strips timestamps/speaker tags and punctuation, and splits into words."""
+    text = re.sub(r"\[\d+:\d+:\d+\]\s*Speaker\s+\S+?(\s*\([^)]*\))?:", " ", text)
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return text.split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Computes WER as word-level edit distance divided by the reference length."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Single-row dynamic programming over the edit-distance table
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            cost = 0 if ref_word == hyp_word else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def transcribe_plain(audio_path: str) -> str:
+    """Transcribes a file with AssemblyAI and returns the plain text."""
+    transcript = aai.Transcriber().transcribe(audio_path)
+    if transcript.status == aai.TranscriptStatus.error:
+        raise RuntimeError(f"AssemblyAI failed on {audio_path}: {transcript.error}")
+    return transcript.text or ""
+
+
+def run_sample(sample: Dict[str, str], speeds: List[float]) -> List[Dict[str, Any]]:
+    """Runs one sample file at every speed and returns a result row per speed."""
+    audio = sample["audio"]
+    reference_text = None
+    if sample.get("reference"):
+        reference_text = Path(sample["reference"]).read_text(encoding="utf-8")
+
+    rows = []
+    for speed in sorted(speeds):
+        audio_file = audio if speed == 1.0 else speed_up_audio(audio, speed, suffix="bench")
+        try:
+            started = time.perf_counter()
+            text = transcribe_plain(audio_file)
+            latency = time.perf_counter() - started
+            size = os.path.getsize(audio_file)
+        finally:
+            if audio_file != audio:
+                Path(audio_file).unlink(missing_ok=True)
+
+        if reference_text is None and speed == 1.0:
+            reference_text = text
+        rows.append({
+            "source_type": sample.get("source_type") or "unknown",
+            "audio": audio,
+            "speed": speed,
+            "upload_mb": size / (1024 * 1024),
+            "latency_s": latency,
+            "wer": word_error_rate(reference_text, text) if reference_text is not None else None,
+        })
+        logging.info(f"{audio} @ {speed:g}x: {latency:.1f}s, WER {rows[-1]['wer']}")
+    return rows
+
+
+def summarize(rows: List[Dict[str, Any]]) -> None:
+    """Prints the per-file rows and the mean WER/latency per source type and speed."""
+    print(f"{'source_type':<14} {'speed':>6} {'upload_mb':>10} {'latency_s':>10} {'wer':>7}  audio")
+    for row in rows:
+        wer = f"{row['wer']:.3f}" if row["wer"] is not None else "n/a"
+        print(f"{row['source_type']:<14} {row['speed']:>5g}x {row['upload_mb']:>10.1f} "
+              f"{row['latency_s']:>10.1f} {wer:>7}  {row['audio']}")
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row["source_type"], row["speed"])].append(row)
+
+    print("\nMean per source type:")
+    print(f"{'source_type':<14} {'speed':>6} {'latency_s':>10} {'wer':>7}")
+    for (source_type, speed), group in sorted(groups.items()):
+        wers = [r["wer"] for r in group if r["wer"] is not None]
+        mean_wer = f"{sum(wers) / len(wers):.3f}" if wers else "n/a"
+        mean_latency = sum(r["latency_s"] for r in group) / len(group)
+        print(f"{source_type:<14} {speed:>5g}x {mean_latency:>10.1f} {mean_wer:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark WER against playback speed for transcription.")
+    parser.add_argument("samples", help="CSV file with columns: audio, source_type, reference (optional)")
+    parser.add_argument("--speeds", type=float, nargs="+", default=[1.0, 1.25, 1.5, 1.75])
+    parser.add_argument("--csv", help="Optional path to write the per-file results as CSV")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable INFO logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    api_key = os.getenv("ASSEMBLYAI_API_KEY")
+    if not api_key:
+        print("ERROR: ASSEMBLYAI_API_KEY is not set.", file=sys.stderr)
+        sys.exit(1)
+    aai.settings.api_key = api_key
+
+    speeds = list(args.speeds)
+    if 1.0 not in speeds:
+        speeds.append(1.0)  # Needed as the baseline when a sample has no reference
+
+    with open(args.samples, newline="", encoding="utf-8") as f:
+        samples = list(csv.DictReader(f))
+
+    rows = []
+    for sample in samples:
+        try:
+            rows.extend(run_sample(sample, speeds))
+        except Exception as e:
+            logging.error(f"Skipping {sample.get('audio')}: {e}")
+
+    summarize(rows)
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["source_type", "audio", "speed", "upload_mb", "latency_s", "wer"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,15 +30,85 @@ class Config:
     OPENAI_API_KEY: str = st.secrets["OPENAI_API_KEY"]  # Required OpenAI API key
     ASSEMBLYAI_API_KEY: str = st.secrets["ASSEMBLYAI_API_KEY"] # AssemblyAI API key
 
+    # --- API Endpoints ---
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")  # Override the OpenAI API URL, e.g. http://127.0.0.1:8089/v1 for mock_server.py
+    ASSEMBLYAI_BASE_URL: str = os.getenv("ASSEMBLYAI_BASE_URL", "")  # Override the AssemblyAI API URL, e.g. http://127.0.0.1:8089
+
+    # --- OpenAI Connection Pool ---
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "600"))  # Read timeout per request
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))  # TCP/TLS connect timeout
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))  # Pool size per API key
+    OPENAI_KEEPALIVE_SECONDS: float = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "120"))  # Idle time before a pooled connection closes
+
+    # --- API Retries ---
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "6"))  # Attempts per API call before giving up
+    RETRY_MIN_WAIT_SECONDS: float = float(os.getenv("RETRY_MIN_WAIT_SECONDS", "2"))  # First backoff step without a Retry-After header
+    RETRY_MAX_WAIT_SECONDS: float = float(os.getenv("RETRY_MAX_WAIT_SECONDS", "60"))  # Longest single wait; longer Retry-After values fail fast
+    RATE_LIMIT_PACING: bool = os.getenv("RATE_LIMIT_PACING", "true").lower() == "true"  # Wait for the rate-limit window instead of collecting 429s
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # Consecutive server/connection failures that open the circuit
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "60"))  # How long an open circuit fails fast before a trial call
+
+    # --- Deadlines & Hedging ---
+    JOB_DEADLINE_SECONDS: float = float(os.getenv("JOB_DEADLINE_SECONDS", "0"))  # Budget for generating one report (0 = none)
+    EXTRACTION_DEADLINE_SECONDS: float = float(os.getenv("EXTRACTION_DEADLINE_SECONDS", "0"))  # Budget per extraction, within the job's (0 = none)
+    LLM_CALL_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "300"))  # Longest single LLM request, within the deadline
+    HEDGE_REQUESTS: bool = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"  # Send a duplicate of calls that run past the latency percentile
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))  # Observed latency percentile that triggers a hedge
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # Calls recorded per model before hedging starts
+    HEDGE_MAX_WORKERS: int = int(os.getenv("HEDGE_MAX_WORKERS", "16"))  # Threads for hedged requests
+
     # --- Models ---
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "whisper-1")  # Default transcription model
     ANALYSIS_MODEL: str = os.getenv("ANALYSIS_MODEL", "gpt-4.1-mini")  # Default analysis model
+    FAST_ANALYSIS_MODEL: str = os.getenv("FAST_ANALYSIS_MODEL", "gpt-4.1-nano")  # Cheaper/faster tier for tight latency or cost targets
+    MODEL_ROUTING: bool = os.getenv("MODEL_ROUTING", "false").lower() == "true"  # Prefer the fast tier for light tasks (see model_router)
+    ROUTE_FAST_PROMPT_TYPES: str = os.getenv("ROUTE_FAST_PROMPT_TYPES", "format_text_highlight_prompt")  # Comma-separated prompt types routed to the fast tier
+    ROUTE_FAST_MAX_TOKENS: int = int(os.getenv("ROUTE_FAST_MAX_TOKENS", "3000"))  # Transcripts up to this size (a short clip) go to the fast tier
+    MODEL_CASCADE: bool = os.getenv("MODEL_CASCADE", "false").lower() == "true"  # Escalate fast-tier replies that fail validation to ANALYSIS_MODEL
+    CASCADE_MAX_MALFORMED: float = float(os.getenv("CASCADE_MAX_MALFORMED", "0.1"))  # Share of bullets missing fields that triggers escalation
+    CASCADE_MAX_UNVERIFIED: float = float(os.getenv("CASCADE_MAX_UNVERIFIED", "0.25"))  # Share of quotes not in the transcript that triggers escalation
+
+    # --- Extraction ---
+    WINDOWED_EXTRACTION_MIN_CHARS: int = int(os.getenv("WINDOWED_EXTRACTION_MIN_CHARS", "120000"))  # Longer transcripts use map-reduce extraction
+    EXTRACTION_WINDOW_SECONDS: int = int(os.getenv("EXTRACTION_WINDOW_SECONDS", "900"))  # Audio covered by each extraction window
+    EXTRACTION_WINDOW_OVERLAP_SECONDS: int = int(os.getenv("EXTRACTION_WINDOW_OVERLAP_SECONDS", "30"))  # Context shared by neighbouring windows
+    EXTRACTION_MAX_WORKERS: int = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))  # Parallel LLM calls per extraction
+    SUMMARY_REDUCE_FANIN: int = int(os.getenv("SUMMARY_REDUCE_FANIN", "10"))  # Window summaries combined per reduce call
+    EXTRACTION_TARGET_LATENCY_SECONDS: float = float(os.getenv("EXTRACTION_TARGET_LATENCY_SECONDS", "0"))  # Pick a faster plan above this (0 = no target)
+    EXTRACTION_TARGET_COST_USD: float = float(os.getenv("EXTRACTION_TARGET_COST_USD", "0"))  # Pick a cheaper plan above this (0 = no target)
+    PREFILTER_MODE: str = os.getenv("PREFILTER_MODE", "auto")  # Target-relevance pre-filter: "auto", "always" or "never"
+    PREFILTER_CONTEXT_UTTERANCES: int = int(os.getenv("PREFILTER_CONTEXT_UTTERANCES", "1"))  # Utterances kept either side of a mention
+    PREFILTER_MIN_SAVING: float = float(os.getenv("PREFILTER_MIN_SAVING", "0.5"))  # In auto mode, prefer the filter when it cuts at least this share
+    EXTRACTION_OUTPUT_FORMAT: str = os.getenv("EXTRACTION_OUTPUT_FORMAT", "delimited")  # "delimited" or "json_schema" (schema-constrained JSON, delimited text as fallback)
+    PROMPT_LAYOUT: str = os.getenv("PROMPT_LAYOUT", "inline")  # "inline" (original single prompt) or "cached_prefix" (static system prompt first, for prompt caching)
+    TRANSCRIPT_ENCODING: str = os.getenv("TRANSCRIPT_ENCODING", "full")  # "full" (as labelled) or "compact" (speaker legend, merged turns, coarse times)
+    SPECULATIVE_EXTRACTION: bool = os.getenv("SPECULATIVE_EXTRACTION", "false").lower() == "true"  # Start extracting while the user reviews the transcript
+    SPECULATIVE_MAX_WORKERS: int = int(os.getenv("SPECULATIVE_MAX_WORKERS", "4"))  # Speculative extractions running at once (across sessions)
+
+    # --- LLM Response Cache ---
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"  # Reuse identical extraction responses
+    LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", os.path.join(os.getenv("OUTPUT_DIR", "output"), "llm_cache"))  # Where cached responses live
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "200"))  # Size limit before least recently used entries go
+    LLM_CACHE_MAX_AGE_DAYS: float = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))  # Entries older than this are dropped
 
     # --- Processing ---
     AUDIO_FORMAT: str = os.getenv("AUDIO_FORMAT", "mp3")  # Default audio format for downloads
 
+    # --- Silence Trimming ---
+    TRIM_SILENCE: bool = os.getenv("TRIM_SILENCE", "false").lower() == "true"  # Cut dead air before transcription
+    VAD_NOISE_DB: float = float(os.getenv("VAD_NOISE_DB", "-35"))  # Level (dB) treated as silence
+    VAD_MIN_SILENCE_SECONDS: float = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "2.0"))  # Shortest pause removed
+
+    # --- Accelerated Playback ---
+    TRANSCRIBE_TEMPO: float = float(os.getenv("TRANSCRIBE_TEMPO", "1.0"))  # Speed-up applied before upload (1.0 = off)
+
     # --- Output ---
     DEFAULT_OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "output")  # Directory for generated files
+    CHUNK_MANIFEST_DIR: str = os.getenv("CHUNK_MANIFEST_DIR", os.path.join(DEFAULT_OUTPUT_DIR, "chunk_manifests"))  # Resumable chunk progress
+
+    # --- Batch Extraction ---
+    BATCH_BACKEND: str = os.getenv("BATCH_BACKEND", "openai")  # "openai" (Batch API) or "local" (file-based stand-in)
+    BATCH_DIR: str = os.getenv("BATCH_DIR", os.path.join(DEFAULT_OUTPUT_DIR, "batches"))  # Manifests, request files and reports of batches
 
     @classmethod
     def validate(cls) -> None:
@@ -0,0 +1,291 @@
+"""
+Module for job deadlines and hedged LLM requests.
+
+A job (e.g. generating one report) runs under an overall time budget, and
+each stage (extraction, ...) may have a budget of its own. Deadlines nest: a
+stage never outlives the job it belongs to. The innermost deadline is kept in
+a context variable, so every API call made inside it gets a timeout of at
+most the time that is left, and retries stop once it has passed. Work handed
+to thread pools carries the deadline along via `bind`. A deadline can also be
+cancelled, which ends it (and every deadline nested in it) at once, e.g. for
+background work whose result is no longer wanted.
+
+Hedging targets tail latency: when a call is still running after the
+observed p95 latency for its model (scaled to the size of its prompt), a
+duplicate request is sent and whichever answers first is used. Hedged
+requests are streamed and register their stream with a Cancellation; the
+slower one is closed as soon as the other answers, which drops its
+connection instead of letting it run on to its timeout.
+
+Handles:
+- Nested job/stage deadlines and the per-call timeout they imply
+- Cancelling a deadline together with the stages nested in it
+- Carrying the current deadline into worker threads
+- Issuing a hedge request past the p95, returning the first success and
+  closing the other request
+"""
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FuturesTimeout, wait
+from typing import Any, Callable, Iterator, Optional
+
+from config import Config
+import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a job or stage has run out of time."""
+
+
+class RequestCancelled(RuntimeError):
+    """Raised by a hedged request that was closed because the other one answered first."""
+
+
+class Deadline:
+    """A point in time by which a job or stage must finish."""
+
+    def __init__(self, seconds: Optional[float], name: str = "job", parent: Optional["Deadline"] = None):
+        self.name = name
+        ends_at = time.monotonic() + seconds if seconds else None
+        if parent is not None and parent.ends_at is not None:
+            if ends_at is None or parent.ends_at < ends_at:
+                ends_at = parent.ends_at
+                name = parent.name
+        self.ends_at = ends_at
+        self.limited_by = name  # The (possibly enclosing) deadline that ends first
+        self.parent = parent
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Ends the deadline now, along with every deadline nested in it."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (0 once cancelled), or None when there is no limit."""
+        if self.cancelled:
+            return 0.0
+        return None if self.ends_at is None else self.ends_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self) -> None:
+        """Raises DeadlineExceeded if the deadline has passed or was cancelled."""
+        if self.cancelled:
+            raise DeadlineExceeded(f"The {self.name} was cancelled")
+        if self.expired:
+            raise DeadlineExceeded(f"The {self.limited_by} deadline has passed")
+
+    def __repr__(self) -> str:
+        remaining = self.remaining()
+        return f"Deadline({self.name}, remaining={'none' if remaining is None else f'{remaining:.1f}s'})"
+
+
+class Cancellation:
+    """Stops a hedged request that lost: closes the stream (or response) it registered."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._resources = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def attach(self, resource: Any) -> Any:
+        """Registers something with a `close()` method and returns it; closed at once if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._resources.append(resource)
+                return resource
+        _close(resource)
+        return resource
+
+    def check(self) -> None:
+        """Raises RequestCancelled if the request was cancelled."""
+        if self.cancelled:
+            raise RequestCancelled("The other hedged request answered first")
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._event.set()
+            resources, self._resources = self._resources, []
+        for resource in resources:
+            _close(resource)
+
+
+def _close(resource: Any) -> None:
+    try:
+        resource.close()
+    except Exception as e:  # Closing a stream mid-read may raise in either thread
+        logger.debug(f"Error closing a cancelled request: {e}")
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    """Returns the innermost active deadline, if any."""
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left on the innermost deadline, or None when there is none."""
+    deadline = current()
+    return deadline.remaining() if deadline is not None else None
+
+
+@contextmanager
+def deadline(seconds: Optional[float], name: str = "job") -> Iterator[Deadline]:
+    """
+    Runs the enclosed block under a deadline of `seconds` (0 or None: no limit of its own).
+
+    The deadline is capped by any enclosing one.
+    """
+    active = Deadline(seconds, name, parent=current())
+    token = _current.set(active)
+    try:
+        yield active
+    finally:
+        _current.reset(token)
+
+
+def bind(fn: Callable[..., Any], active: Optional[Deadline] = None) -> Callable[..., Any]:
+    """
+    Wraps `fn` so it runs under the caller's current deadline, e.g. in a worker thread.
+
+    `active` runs it under that deadline instead.
+    """
+    active = active or current()
+
+    def run(*args, **kwargs):
+        token = _current.set(active)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def call_timeout(default: Optional[float] = None) -> float:
+    """
+    Returns the timeout for one API call: Config.LLM_CALL_TIMEOUT_SECONDS
+    (or `default`), capped by the time left on the current deadline.
+
+    Raises:
+        DeadlineExceeded: When the deadline has already passed.
+    """
+    timeout = float(default or Config.LLM_CALL_TIMEOUT_SECONDS or Config.OPENAI_TIMEOUT_SECONDS)
+    active = current()
+    if active is not None:
+        active.check()
+        left = active.remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+    return timeout
+
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=Config.HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+        return _hedge_pool
+
+
+def hedge_delay(model: Optional[str] = None, tokens: Optional[int] = None) -> Optional[float]:
+    """
+    Returns how long to wait before hedging a call to `model`, or None to not hedge.
+
+    This is the observed Config.HEDGE_PERCENTILE latency of the model once
+    Config.HEDGE_MIN_SAMPLES calls have been recorded (see llm_metrics),
+    scaled to a prompt of `tokens` tokens when given.
+    """
+    if not Config.HEDGE_REQUESTS:
+        return None
+    return llm_metrics.latency_percentile(
+        Config.HEDGE_PERCENTILE, model, min_samples=Config.HEDGE_MIN_SAMPLES, tokens=tokens
+    )
+
+
+def hedged_call(
+    fn: Callable[[float, Optional[Cancellation]], Any],
+    label: str = "LLM call",
+    model: Optional[str] = None,
+    tokens: Optional[int] = None,
+) -> Any:
+    """
+    Calls `fn(timeout, cancellation)`, sending a duplicate if it runs past the hedge delay.
+
+    Args:
+        fn: Makes the request with the given timeout in seconds. When
+            `cancellation` is not None the request may be hedged, and should
+            stream and attach its stream to the cancellation so the losing
+            request can be closed.
+        label: Name used in log messages.
+        model: The model called, for the latency percentile.
+        tokens: Prompt tokens of the request, to scale the latency percentile.
+
+    Returns:
+        The result of whichever request succeeds first.
+
+    Raises:
+        The error of the original request if it fails before the hedge delay,
+        or of the last request to fail; DeadlineExceeded when the deadline
+        passes while waiting.
+    """
+    delay = hedge_delay(model, tokens)
+    if delay is None:
+        return fn(call_timeout(), None)
+
+    left = remaining()
+    if left is not None and left <= delay:
+        return fn(call_timeout(), None)  # No time for a hedge to help
+
+    cancellations = {}
+    primary_cancel = Cancellation()
+    primary = _pool().submit(bind(fn), call_timeout(), primary_cancel)
+    cancellations[primary] = primary_cancel
+    try:
+        return primary.result(timeout=delay)
+    except FuturesTimeout:
+        pass
+
+    logger.info(f"{label}: no answer after {delay:.1f}s (p{Config.HEDGE_PERCENTILE:g}); sending a hedge request")
+    hedge_cancel = Cancellation()
+    hedge = _pool().submit(bind(fn), call_timeout(), hedge_cancel)
+    cancellations[hedge] = hedge_cancel
+    started = {primary: "original", hedge: "hedge"}
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"{label}: the {current().limited_by} deadline passed while waiting")
+            for future in done:
+                if future.exception() is None:
+                    logger.info(f"{label}: {started[future]} request answered first")
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        for future in pending:
+            future.cancel()
+            cancellations[future].cancel()  # Closes the losing request's stream
@@ -0,0 +1,123 @@
+"""
+Module for diff-aware re-extraction after transcript edits.
+
+After a report is generated, its bullets are assigned to the transcript
+windows they came from (see transcript_windows) and kept as an
+ExtractionState. When the user edits the transcript and regenerates, only
+windows whose text changed need a new LLM call; bullets of unchanged windows
+are reused as they are.
+
+Windows sit on a fixed time grid, so a typo fix in one utterance changes the
+key of the one or two windows containing it and no others. Keys ignore HTML
+tags and whitespace (see transcript_windows.normalize_transcript), so the
+re-wrapping done by the Step 2 editor does not change them.
+
+Handles:
+- Anchoring each bullet to the utterance it most likely came from
+- Recording per-window results of a run, keyed by normalized window text
+- Working out which windows of an edited transcript can reuse earlier results
+"""
+import re
+import logging
+from typing import Dict, List, Optional, Set
+
+from transcript_windows import TranscriptWindow, split_utterances, Utterance
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_LABEL_RE = re.compile(r"^\s*\[\d{1,2}:\d{2}:\d{2}\][^:]{0,80}:")
+MIN_WORD_LENGTH = 4  # Shorter words are too common to locate a bullet
+
+
+def _content_words(text: Optional[str]) -> Set[str]:
+    return {w for w in _WORD_RE.findall((text or "").lower()) if len(w) >= MIN_WORD_LENGTH}
+
+
+def _utterance_words(utterance: Utterance) -> Set[str]:
+    return _content_words(_LABEL_RE.sub("", _TAG_RE.sub(" ", utterance.text)))
+
+
+def anchor_bullets(utterances: List[Utterance], bullets: List[Dict[str, Optional[str]]]) -> List[int]:
+    """
+    Finds the utterance each bullet most likely came from.
+
+    Bullets are in transcript order, so each one is matched to the utterance
+    at or after the previous anchor that shares the most content words with
+    its body (or headline, for highlights).
+
+    Returns:
+        One utterance index per bullet.
+    """
+    words = [_utterance_words(u) for u in utterances]
+    anchors = []
+    previous = 0
+    for bullet in bullets:
+        target = _content_words(bullet.get("body_raw")) or _content_words(bullet.get("headline_raw"))
+        best, best_score = previous, 0.0
+        if target:
+            for i in range(previous, len(utterances)):
+                score = len(target & words[i]) / len(target)
+                if score > best_score:
+                    best, best_score = i, score
+        anchors.append(best)
+        previous = best
+    return anchors
+
+
+def _owning_window(windows: List[TranscriptWindow], utterance: Utterance) -> int:
+    """The window whose own time slot (not its overlap) contains the utterance."""
+    for window in windows:
+        if window.start_seconds is not None and utterance.start_seconds is not None:
+            if window.start_seconds <= utterance.start_seconds < window.end_seconds:
+                return window.index
+    for window in windows:
+        if any(u.index == utterance.index for u in window.utterances):
+            return window.index
+    return len(windows) - 1
+
+
+class ExtractionState:
+    """Per-window bullets of one extraction run, keyed by normalized window text."""
+
+    def __init__(self, prompt_type: str, target_name: str, results: Dict[str, List[Dict[str, Optional[str]]]]):
+        self.prompt_type = prompt_type
+        self.target_name = target_name
+        self.results = results
+
+    def matches(self, prompt_type: str, target_name: str) -> bool:
+        """True when this state can be reused for the given extraction."""
+        return self.prompt_type == prompt_type and self.target_name == target_name
+
+    def reusable(self, windows: List[TranscriptWindow]) -> Dict[int, List[Dict[str, Optional[str]]]]:
+        """Maps window index to the earlier bullets of every window whose text is unchanged."""
+        return {w.index: self.results[w.key] for w in windows if w.key in self.results}
+
+    @classmethod
+    def from_windows(
+        cls,
+        prompt_type: str,
+        target_name: str,
+        windows: List[TranscriptWindow],
+        per_window: List[List[Dict[str, Optional[str]]]],
+    ) -> "ExtractionState":
+        """Records the results of a run that was already done per window."""
+        return cls(prompt_type, target_name, {w.key: list(b) for w, b in zip(windows, per_window)})
+
+    @classmethod
+    def from_bullets(
+        cls,
+        prompt_type: str,
+        target_name: str,
+        transcript_text: str,
+        windows: List[TranscriptWindow],
+        bullets: List[Dict[str, Optional[str]]],
+    ) -> "ExtractionState":
+        """Records the results of any run (e.g. single-shot) by anchoring its bullets to windows."""
+        utterances = split_utterances(transcript_text)
+        per_window: List[List[Dict[str, Optional[str]]]] = [[] for _ in windows]
+        if utterances and windows:
+            for bullet, anchor in zip(bullets, anchor_bullets(utterances, bullets)):
+                per_window[_owning_window(windows, utterances[anchor])].append(bullet)
+        return cls.from_windows(prompt_type, target_name, windows, per_window)
@@ -0,0 +1,168 @@
+"""
+Module for caching deterministic LLM responses on disk.
+
+Extraction calls run at temperature 0, so the same (model, prompt, parameters)
+request gives the same answer. This cache stores each raw completion together
+with its parsed result under a hash of the request, so regenerating an
+unchanged report costs nothing.
+
+Handles:
+- Building stable cache keys from model, messages and request parameters
+- Reading and atomically writing cache entries as JSON files
+- Evicting entries by age and by total cache size (least recently used first)
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600  # 30 days
+EVICT_EVERY_N_PUTS = 25  # How often a write triggers an eviction pass
+
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], **params: Any) -> str:
+    """
+    Builds a cache key from everything that determines a completion.
+
+    Args:
+        model: The model name.
+        messages: The chat messages exactly as sent.
+        **params: Any other request parameters (temperature, response format,
+                  prompt type, ...). They are sorted so argument order does
+                  not matter.
+
+    Returns:
+        A hex SHA-256 digest.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    File-backed cache of LLM responses, one JSON file per key.
+
+    Each entry holds the raw completion text, the parsed result and the time it
+    was written. Reading an entry refreshes its modification time, so the size
+    limit evicts the least recently used entries first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        enabled: bool = True,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry for `key`, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age_seconds:
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        logger.debug(f"LLM cache hit: {key[:12]}")
+        return entry
+
+    def put(self, key: str, raw: str, parsed: Any, **extra: Any) -> None:
+        """Stores a raw completion and its parsed result under `key`."""
+        if not self.enabled:
+            return
+        entry = {"created": time.time(), "raw": raw, "parsed": parsed, **extra}
+        path = self._path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write LLM cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= EVICT_EVERY_N_PUTS
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Removes expired entries, then the least recently used ones until the
+        cache fits in `max_bytes`.
+
+        Returns:
+            The number of entries removed.
+        """
+        try:
+            files = [(p, p.stat()) for p in self.cache_dir.glob("*.json")]
+        except OSError:
+            return 0
+
+        now = time.time()
+        removed = 0
+        kept = []
+        for path, stat in files:
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept.append((path, stat))
+
+        total = sum(stat.st_size for _, stat in kept)
+        for path, stat in sorted(kept, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} LLM cache entries from {self.cache_dir}")
+        return removed
+
+    def clear(self) -> None:
+        """Deletes every entry in the cache."""
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
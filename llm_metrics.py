@@ -0,0 +1,145 @@
+"""
+Module for recording per-call LLM usage.
+
+Every completion made by the analyzer is recorded here with its token usage,
+including how many prompt tokens the provider served from its prompt cache,
+and its latency. The records back the usage report shown after a job, so the
+effect of prompt caching (and later, model choice) can be checked per call.
+"""
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_calls: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+MAX_RECORDS = 5000  # Oldest records are dropped beyond this
+LATENCY_BASE_TOKENS = 1000  # Prompt-independent share of a call's latency (output, queueing), in prompt-token terms
+
+
+def _get(obj: Any, name: str, default: Any = 0) -> Any:
+    """Reads a field from an SDK object or a plain dict."""
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def record_call(label: str, model: str, usage: Any, latency_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Records one completion's usage.
+
+    Args:
+        label: What the call was for, e.g. the prompt type or 'window 3'.
+        model: The model that served the call.
+        usage: The `usage` object from a Chat Completions response (or an
+               equivalent dict). May be None when the provider sent no usage.
+        latency_s: Wall-clock time of the call in seconds.
+
+    Returns:
+        The stored record.
+    """
+    prompt_tokens = _get(usage, "prompt_tokens") or 0
+    details = _get(usage, "prompt_tokens_details", None)
+    cached_tokens = _get(details, "cached_tokens") or 0
+    record = {
+        "time": time.time(),
+        "label": label,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "uncached_tokens": prompt_tokens - cached_tokens,
+        "completion_tokens": _get(usage, "completion_tokens") or 0,
+        "latency_s": latency_s,
+    }
+    with _lock:
+        _calls.append(record)
+        if len(_calls) > MAX_RECORDS:
+            del _calls[:len(_calls) - MAX_RECORDS]
+
+    logger.info(
+        f"LLM usage [{label}] {model}: prompt={prompt_tokens} "
+        f"(cached={cached_tokens}, uncached={prompt_tokens - cached_tokens}), "
+        f"completion={record['completion_tokens']}"
+        + (f", {latency_s:.2f}s" if latency_s is not None else "")
+    )
+    return record
+
+
+def mark() -> float:
+    """Returns a marker for `calls_since`, taken at the start of a job."""
+    return time.time()
+
+
+def calls_since(marker: float) -> List[Dict[str, Any]]:
+    """Returns the records made since `marker`."""
+    with _lock:
+        return [c for c in _calls if c["time"] >= marker]
+
+
+def summarize(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals a list of call records."""
+    prompt = sum(c["prompt_tokens"] for c in calls)
+    cached = sum(c["cached_tokens"] for c in calls)
+    return {
+        "calls": len(calls),
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "uncached_tokens": prompt - cached,
+        "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        "cached_ratio": (cached / prompt) if prompt else 0.0,
+        "latency_s": sum(c["latency_s"] or 0 for c in calls),
+    }
+
+
+def latency_percentile(
+    percentile: float,
+    model: Optional[str] = None,
+    min_samples: int = 1,
+    tokens: Optional[int] = None,
+) -> Optional[float]:
+    """
+    Returns the given latency percentile (0-100) of recorded calls.
+
+    Args:
+        percentile: e.g. 95 for the p95.
+        model: Only count calls served by this model.
+        min_samples: Return None when fewer calls have a recorded latency.
+        tokens: Scale each recorded latency to a prompt of this many tokens,
+            so a long prompt is not judged against short ones.
+    """
+    def _latency(c):
+        if tokens is None:
+            return c["latency_s"]
+        return c["latency_s"] * (tokens + LATENCY_BASE_TOKENS) / (c["prompt_tokens"] + LATENCY_BASE_TOKENS)
+
+    with _lock:
+        latencies = sorted(
+            _latency(c) for c in _calls
+            if c["latency_s"] is not None and (model is None or c["model"] == model)
+        )
+    if not latencies or len(latencies) < min_samples:
+        return None
+    index = min(len(latencies) - 1, max(0, int(round(percentile / 100 * len(latencies))) - 1))
+    return latencies[index]
+
+
+def format_report(calls: List[Dict[str, Any]]) -> str:
+    """Renders call records as a plain-text table with a totals line."""
+    lines = [f"{'call':<32} {'model':<16} {'prompt':>8} {'cached':>8} {'uncached':>9} {'output':>7} {'secs':>6}"]
+    for c in calls:
+        secs = f"{c['latency_s']:.1f}" if c["latency_s"] is not None else "-"
+        lines.append(
+            f"{c['label'][:32]:<32} {c['model'][:16]:<16} {c['prompt_tokens']:>8} {c['cached_tokens']:>8} "
+            f"{c['uncached_tokens']:>9} {c['completion_tokens']:>7} {secs:>6}"
+        )
+    total = summarize(calls)
+    lines.append(
+        f"{'TOTAL':<32} {'':<16} {total['prompt_tokens']:>8} {total['cached_tokens']:>8} "
+        f"{total['uncached_tokens']:>9} {total['completion_tokens']:>7} {total['latency_s']:>6.1f}"
+    )
+    lines.append(f"Prompt tokens served from cache: {total['cached_ratio']:.0%}")
+    return "\n".join(lines)
@@ -0,0 +1,499 @@
+"""
+Local stand-in for the OpenAI and AssemblyAI APIs, for offline load and latency testing.
+
+Serves the endpoints the app uses, with configurable latency, rate limits and
+failures, and deterministic canned output:
+- POST /v1/chat/completions: extraction replies in the '*** BULLET START ***'
+  format (or {"bullets": [...]} JSON when a json_schema response_format is
+  sent), built from the utterances of the transcript in the prompt; speaker
+  labelling and free-text analysis get simple canned replies. Streaming (SSE)
+  and stream usage are supported, and repeated system prompts of 1024+ tokens
+  are reported as cached prompt tokens.
+- POST /v1/audio/transcriptions: a canned Whisper transcription.
+- GET /v1/models: for connection warm-up.
+- POST /v2/upload, POST /v2/transcript, GET /v2/transcript/<id>: AssemblyAI
+  upload and transcription, with labelled utterances; a transcript completes
+  after the sampled processing time.
+- GET /stats: request counts, 429s, injected errors and peak concurrency.
+
+Every OpenAI response carries x-ratelimit-* headers for the configured
+requests/tokens per minute; requests beyond them get a 429 with Retry-After.
+
+Point the app at it through config:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 ASSEMBLYAI_BASE_URL=http://127.0.0.1:8089
+
+Latency specs are "fixed:SECONDS", "uniform:LOW,HIGH" or
+"lognormal:MEDIAN,SIGMA" (heavy-tailed, like real LLM latency).
+
+Usage:
+    python mock_server.py [--port 8089] [--latency lognormal:1.5,0.6] [--rpm 500] [--tpm 200000]
+                          [--error-rate 0.02] [--bullets 8] [--seed 1]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+CHARS_PER_TOKEN = 4
+MIN_CACHED_PREFIX_TOKENS = 1024  # OpenAI only caches prompt prefixes this long
+CACHE_BLOCK_TOKENS = 128  # Cached tokens are reported in blocks of this size
+STREAM_PIECE_CHARS = 24  # Characters per streamed chunk
+UTTERANCE_SECONDS = 20  # Length of each canned AssemblyAI utterance
+BYTES_PER_AUDIO_SECOND = 16000  # 128 kbps, to guess the duration of an upload
+
+_UTTERANCE_RE = re.compile(r"\[(\d{1,2}:\d{2}:\d{2})\]\s*([^:\n<]{1,80}?):\s*(.+)")
+_TARGET_RE = re.compile(r"^# TARGET: (.+)$", re.M)
+_DATE_RE = re.compile(r"Upload Date \(YYYYMMDD\): (\S+)")
+_PROVIDER_RE = re.compile(r"Source Provider: ([^#\n]+)")
+
+CANNED_SENTENCES = [
+    "We fixed the streetlights across the whole city in under three years.",
+    "My opponent voted against the infrastructure bill twice.",
+    "I grew up two blocks from here and my father worked at the plant.",
+    "We are going to lower property taxes for every homeowner.",
+    "The state lost forty thousand manufacturing jobs last decade.",
+    "I will never take money from corporate PACs.",
+    "Thank you all for coming out tonight.",
+    "Our schools need more counselors, not more paperwork.",
+    "The governor's plan would cut funding for rural hospitals.",
+    "I spent twelve years as a prosecutor before running for office.",
+]
+
+
+class LatencyModel:
+    """Samples request latencies from a "fixed", "uniform" or "lognormal" spec."""
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v.strip()] if args else []
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.kind = kind
+        self.values = values or [0.0]
+        self.rng = rng
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.values[0]
+            if self.kind == "uniform":
+                low, high = (self.values + self.values)[:2]
+                return self.rng.uniform(low, high)
+            median, sigma = (self.values + [0.5])[:2]
+            return self.rng.lognormvariate(math.log(max(median, 1e-6)), sigma)
+
+
+class RateLimiter:
+    """Fixed one-minute windows of requests and tokens, as reported in x-ratelimit-* headers."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window_start = time.monotonic()
+        self.requests = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def take(self, tokens: int) -> Tuple[bool, Dict[str, str]]:
+        """Counts one request; returns whether it is allowed and the headers to send."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.requests, self.tokens = now, 0, 0
+            reset = max(60 - (now - self.window_start), 0.001)
+            allowed = (not self.rpm or self.requests < self.rpm) and (not self.tpm or self.tokens + tokens <= self.tpm)
+            if allowed:
+                self.requests += 1
+                self.tokens += tokens
+            headers = {"x-ratelimit-reset-requests": f"{reset:.3f}s", "x-ratelimit-reset-tokens": f"{reset:.3f}s"}
+            if self.rpm:
+                headers["x-ratelimit-limit-requests"] = str(self.rpm)
+                headers["x-ratelimit-remaining-requests"] = str(max(self.rpm - self.requests, 0))
+            if self.tpm:
+                headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+                headers["x-ratelimit-remaining-tokens"] = str(max(self.tpm - self.tokens, 0))
+            if not allowed:
+                headers["retry-after-ms"] = str(int(reset * 1000))
+                headers["retry-after"] = str(math.ceil(reset))
+            return allowed, headers
+
+
+class MockState:
+    """Settings and shared state of one mock server."""
+
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.latency = LatencyModel(args.latency, self.rng)
+        self.audio_latency = LatencyModel(args.audio_latency, self.rng)
+        self.limiter = RateLimiter(args.rpm, args.tpm)
+        self.error_rate = args.error_rate
+        self.max_bullets = args.bullets
+        self.seen_prefixes = set()
+        self.uploads: Dict[str, int] = {}
+        self.transcripts: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._lock = threading.Lock()
+
+    def inject_error(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def cached_tokens(self, system_text: str) -> int:
+        """Simulates automatic prefix caching of a repeated system prompt."""
+        tokens = _tokens(system_text)
+        if tokens < MIN_CACHED_PREFIX_TOKENS:
+            return 0
+        key = hashlib.sha1(system_text.encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = key in self.seen_prefixes
+            self.seen_prefixes.add(key)
+        return (tokens // CACHE_BLOCK_TOKENS) * CACHE_BLOCK_TOKENS if seen else 0
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+def _message_text(messages: List[Dict[str, Any]], role: Optional[str] = None) -> str:
+    parts = []
+    for m in messages or []:
+        if role is None or m.get("role") == role:
+            content = m.get("content")
+            parts.append(content if isinstance(content, str) else json.dumps(content))
+    return "\n".join(parts)
+
+
+def _canned_bullets(prompt: str, max_bullets: int, with_target: bool) -> List[Dict[str, str]]:
+    """Builds deterministic bullets from evenly spaced utterances of the transcript in a prompt."""
+    utterances = _UTTERANCE_RE.findall(prompt)
+    if not utterances:
+        return []
+    targets_match = _TARGET_RE.search(prompt)
+    targets = [t.strip() for t in targets_match.group(1).split(";")] if targets_match else ["TARGET"]
+    date = (_DATE_RE.search(prompt) or [None, "Date Unknown"])[1]
+    source = (_PROVIDER_RE.search(prompt) or [None, "Mock Source"])[1].strip()
+    step = max(1, len(utterances) // max(max_bullets, 1))
+    bullets = []
+    for _, speaker, text in utterances[::step][:max_bullets]:
+        name = re.sub(r"^Speaker \S+\s*\(?|\)$", "", speaker).strip() or speaker.strip()
+        words = re.sub(r"<[^>]+>", "", text).split()
+        bullet = {
+            "headline": f"{name} said {' '.join(words[:12]).rstrip('.,;:')}.",
+            "speaker": name.upper(),
+            "body": " ".join(words),
+            "source": source,
+            "date": date,
+        }
+        if with_target:
+            bullet["target"] = next((t for t in targets if t.lower() in speaker.lower()), targets[0])
+        bullets.append(bullet)
+    return bullets
+
+
+def canned_reply(body: Dict[str, Any], max_bullets: int) -> str:
+    """Returns the mock model's reply to a chat completion request."""
+    messages = body.get("messages") or []
+    system = _message_text(messages, "system")
+    prompt = _message_text(messages)
+    response_format = body.get("response_format") or {}
+
+    if "append a guessed human-readable name" in prompt:  # Speaker labelling
+        transcript = _message_text(messages, "user")
+        return re.sub(r"^(\[[\d:]+\]\s+Speaker\s+(\S+?)):", r"\1 (Mock Speaker \2):", transcript, flags=re.M)
+
+    if "BULLET START" in prompt or response_format.get("type") == "json_schema":
+        schema = (response_format.get("json_schema") or {}).get("schema") or {}
+        item_fields = (((schema.get("properties") or {}).get("bullets") or {}).get("items") or {}).get("properties")
+        multi_target = "MULTI-TARGET EXTRACTION" in system + prompt
+        bullets = _canned_bullets(prompt, max_bullets, multi_target)
+        highlight = (item_fields is not None and "speaker" not in item_fields) or (
+            item_fields is None and "**Speaker:**" not in prompt
+        )
+        if highlight:
+            bullets = [{k: b[k] for k in ("target", "headline") if k in b} for b in bullets]
+        if item_fields is not None:
+            return json.dumps({"bullets": bullets})
+        if not bullets:
+            return "@@NO BULLETS FOUND@@"
+        blocks = []
+        for b in bullets:
+            fields = [f"**Target:** {b['target']}"] if "target" in b else []
+            fields.append(f"**Headline:** {b['headline']}")
+            if not highlight:
+                fields += [f"**Speaker:** {b['speaker']}", f"**Body:** {b['body']}",
+                           f"**Source:** {b['source']}", f"**Date:** {b['date']}"]
+            blocks.append("*** BULLET START ***\n" + "\n@@DELIM@@\n".join(fields) + "\n*** BULLET END ***")
+        return "\n\n".join(blocks)
+
+    return "Mock analysis: the speaker made several statements about local policy."
+
+
+def _canned_utterances(duration_s: float, rng: random.Random) -> List[Dict[str, Any]]:
+    utterances = []
+    start = 0
+    index = 0
+    while start < duration_s * 1000 or not utterances:
+        end = int(min(duration_s * 1000, start + UTTERANCE_SECONDS * 1000)) or start + 1000
+        text = CANNED_SENTENCES[rng.randrange(len(CANNED_SENTENCES))]
+        speaker = "AB"[index % 2]
+        words = text.split()
+        span = max((end - start) // len(words), 1)
+        utterances.append({
+            "speaker": speaker,
+            "start": start,
+            "end": end,
+            "text": text,
+            "confidence": 0.95,
+            "words": [
+                {"text": w, "start": start + i * span, "end": start + (i + 1) * span, "confidence": 0.95, "speaker": speaker}
+                for i, w in enumerate(words)
+            ],
+        })
+        start = end
+        index += 1
+    return utterances
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Routes requests to the mock endpoints."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the real APIs
+    state: MockState = None
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, kind: str, code: Optional[str] = None, headers=None) -> None:
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": code, "param": None}}, headers)
+
+    def _guard(self, tokens: int) -> Optional[Dict[str, str]]:
+        """Applies rate limits and injected failures; returns the headers to send, or None if answered."""
+        allowed, headers = self.state.limiter.take(tokens)
+        if not allowed:
+            self.state.count("rate_limited")
+            self._error(429, "Rate limit reached (mock).", "requests", "rate_limit_exceeded", headers)
+            return None
+        if self.state.inject_error():
+            self.state.count("errors")
+            self._error(503, "The mock server is overloaded.", "server_error", headers=headers)
+            return None
+        return headers
+
+    def do_GET(self):
+        self.state.count("requests")
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.state.stats)
+        elif self.path.startswith("/v1/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        elif self.path.startswith("/v2/transcript/"):
+            self._get_transcript(self.path.rsplit("/", 1)[-1])
+        else:
+            self._error(404, f"Unknown endpoint {self.path}", "invalid_request_error")
+
+    def do_POST(self):
+        self.state.count("requests")
+        self.state.count("in_flight")
+        try:
+            body = self._read_body()
+            if self.path.startswith("/v1/chat/completions"):
+                self._chat(json.loads(body or b"{}"))
+            elif self.path.startswith("/v1/audio/transcriptions"):
+                self._whisper(len(body))
+            elif self.path.startswith("/v2/upload"):
+                upload_id = uuid.uuid4().hex
+                self.state.uploads[upload_id] = len(body)
+                self._send_json(200, {"upload_url": f"http://{self.headers.get('Host')}/uploads/{upload_id}"})
+            elif self.path.rstrip("/") == "/v2/transcript":
+                self._create_transcript(json.loads(body or b"{}"))
+            else:
+                self._error(404, f"Unknown endpoint {self.path}", "invalid_request_error")
+        finally:
+            self.state.count("in_flight", -1)
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        messages = body.get("messages") or []
+        prompt_tokens = sum(_tokens(_message_text([m])) + 4 for m in messages)
+        headers = self._guard(prompt_tokens)
+        if headers is None:
+            return
+        content = canned_reply(body, self.state.max_bullets)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _tokens(content),
+            "total_tokens": prompt_tokens + _tokens(content),
+            "prompt_tokens_details": {"cached_tokens": self.state.cached_tokens(_message_text(messages, "system"))},
+        }
+        completion_id = f"chatcmpl-mock{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+        latency = self.state.latency.sample()
+
+        if not body.get("stream"):
+            time.sleep(latency)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content, "refusal": None},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }],
+                "usage": usage,
+            }, headers)
+            return
+
+        # Server-sent events: a third of the latency before the first token, the rest spread over the pieces
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+        pieces = [content[i:i + STREAM_PIECE_CHARS] for i in range(0, len(content), STREAM_PIECE_CHARS)] or [""]
+        time.sleep(latency / 3)
+        per_piece = (latency * 2 / 3) / len(pieces)
+
+        def _event(choices, extra=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices}
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            _event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for piece in pieces:
+                _event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                time.sleep(per_piece)
+            _event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                _event([], {"usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client closed the stream early")
+
+    def _whisper(self, size: int) -> None:
+        headers = self._guard(0)
+        if headers is None:
+            return
+        time.sleep(self.state.audio_latency.sample())
+        seconds = size / BYTES_PER_AUDIO_SECOND
+        sentences = max(1, int(seconds // UTTERANCE_SECONDS))
+        text = " ".join(CANNED_SENTENCES[i % len(CANNED_SENTENCES)] for i in range(sentences))
+        self._send_json(200, {"text": text}, headers)
+
+    def _create_transcript(self, request: Dict[str, Any]) -> None:
+        if self.state.inject_error():
+            self.state.count("errors")
+            self._error(503, "The mock server is overloaded.", "server_error")
+            return
+        upload_id = str(request.get("audio_url", "")).rsplit("/", 1)[-1]
+        duration = max(self.state.uploads.get(upload_id, BYTES_PER_AUDIO_SECOND * 60) / BYTES_PER_AUDIO_SECOND, 1.0)
+        transcript_id = uuid.uuid4().hex
+        rng = random.Random(upload_id)
+        utterances = _canned_utterances(duration, rng)
+        self.state.transcripts[transcript_id] = {
+            "ready_at": time.monotonic() + self.state.audio_latency.sample(),
+            "body": {
+                "id": transcript_id,
+                "audio_url": request.get("audio_url"),
+                "status": "queued",
+                "text": " ".join(u["text"] for u in utterances),
+                "words": [w for u in utterances for w in u["words"]],
+                "utterances": utterances if request.get("speaker_labels") else None,
+                "speaker_labels": bool(request.get("speaker_labels")),
+                "audio_duration": int(duration),
+                "language_code": "en_us",
+                "confidence": 0.95,
+                "error": None,
+            },
+        }
+        self._get_transcript(transcript_id)
+
+    def _get_transcript(self, transcript_id: str) -> None:
+        entry = self.state.transcripts.get(transcript_id)
+        if entry is None:
+            self._error(404, f"Transcript {transcript_id} not found", "invalid_request_error")
+            return
+        body = dict(entry["body"])
+        if time.monotonic() >= entry["ready_at"]:
+            body["status"] = "completed"
+        else:
+            body.update(status="processing", text=None, words=None, utterances=None)
+        self._send_json(200, body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local mock of the OpenAI and AssemblyAI APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="lognormal:1.5,0.6", help="Chat completion latency distribution")
+    parser.add_argument("--audio-latency", default="uniform:1,3", help="Transcription latency distribution")
+    parser.add_argument("--rpm", type=int, default=500, help="Requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=200000, help="Tokens per minute before 429s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--bullets", type=int, default=8, help="Bullets per canned extraction reply")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for latencies, failures and canned text")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        MockHandler.state = MockState(args)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    base = f"http://{args.host}:{args.port}"
+    print(f"Mock API listening on {base}")
+    print(f"  OPENAI_BASE_URL={base}/v1  ASSEMBLYAI_BASE_URL={base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
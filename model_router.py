@@ -0,0 +1,153 @@
+"""
+Module for routing extraction calls to model tiers.
+
+Not every extraction needs the strongest model: highlights are one-line
+headlines, and a short clip has little to get wrong. Each task is routed to
+a tier up front:
+- fast (Config.FAST_ANALYSIS_MODEL): highlight prompts and transcripts of at
+  most Config.ROUTE_FAST_MAX_TOKENS tokens;
+- strong (Config.ANALYSIS_MODEL): everything else, e.g. long bullet extraction.
+
+The routed order is what the token budgeter considers, so a tier that does
+not fit the transcript or misses the latency/cost targets is still skipped.
+
+With Config.MODEL_CASCADE on, a call answered by the fast tier is checked
+before it is used, and sent again to the strong tier when the reply fails
+validation: no parseable reply, too many bullets missing required fields, or
+too many quotes that are not in the transcript (see quote_index).
+
+Both are off by default. Routing without the cascade sends fast-tier replies
+to the report unchecked, so turn on Config.MODEL_CASCADE together with
+Config.MODEL_ROUTING.
+
+Handles:
+- Picking the tier order for a prompt type and transcript length
+- Validating a cheap tier's bullets and deciding whether to escalate
+- Latency and cost per tier, for the usage report
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from quote_index import get_index
+
+logger = logging.getLogger(__name__)
+
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+ESCALATED_SUFFIX = " (escalated)"  # Appended to the label of a cascaded call
+
+
+def tier_of(model: Optional[str]) -> str:
+    """Returns the tier a model belongs to, or the model name for models outside the tiers."""
+    model = model or Config.ANALYSIS_MODEL
+    if model == Config.ANALYSIS_MODEL:
+        return TIER_STRONG
+    if model == Config.FAST_ANALYSIS_MODEL:
+        return TIER_FAST
+    return model
+
+
+def route_models(prompt_type: str, transcript_tokens: int) -> List[str]:
+    """
+    Returns the models to consider for a task, preferred tier first.
+
+    Args:
+        prompt_type: format_text_bullet_prompt OR format_text_highlight_prompt
+        transcript_tokens: Size of the transcript to extract from.
+
+    Returns:
+        [fast, strong] for highlight prompts and short transcripts, otherwise
+        [strong, fast]. Without Config.MODEL_ROUTING, always [strong, fast].
+    """
+    strong, fast = Config.ANALYSIS_MODEL, Config.FAST_ANALYSIS_MODEL
+    if not Config.MODEL_ROUTING:
+        return [strong, fast]
+    fast_prompt_types = [p.strip() for p in Config.ROUTE_FAST_PROMPT_TYPES.split(",") if p.strip()]
+    if prompt_type in fast_prompt_types or transcript_tokens <= Config.ROUTE_FAST_MAX_TOKENS:
+        logger.debug(f"Routing {prompt_type} ({transcript_tokens} tokens) to the fast tier")
+        return [fast, strong]
+    return [strong, fast]
+
+
+def cascade_models(model: Optional[str]) -> List[str]:
+    """The models to try in turn for a call planned on `model`: just it, or it and then the strong tier."""
+    model = model or Config.ANALYSIS_MODEL
+    if Config.MODEL_CASCADE and model != Config.ANALYSIS_MODEL:
+        return [model, Config.ANALYSIS_MODEL]
+    return [model]
+
+
+def validate_bullets(
+    bullets: List[Dict[str, Optional[str]]], transcript_text: str, prompt_type: str
+) -> Optional[str]:
+    """
+    Checks a cheap tier's bullets before they are used.
+
+    Args:
+        bullets: The parsed bullets.
+        transcript_text: The transcript (or window) they were extracted from.
+        prompt_type: format_text_bullet_prompt OR format_text_highlight_prompt
+
+    Returns:
+        Why the bullets should be escalated, or None when they pass.
+    """
+    if not bullets:
+        return None  # "No bullets" is a valid answer; an unparseable reply raises instead
+
+    required = ["headline_raw"]
+    if prompt_type == "format_text_bullet_prompt":
+        required += ["speaker_raw", "body_raw"]
+    malformed = sum(1 for b in bullets if any(not b.get(field) for field in required))
+    if malformed / len(bullets) > Config.CASCADE_MAX_MALFORMED:
+        return f"{malformed} of {len(bullets)} bullets are missing required fields"
+
+    quotes = [b["body_raw"] for b in bullets if b.get("body_raw")]
+    if quotes:
+        index = get_index(transcript_text)
+        unmatched = sum(1 for quote in quotes if not index.find(quote).verified)
+        if unmatched / len(quotes) > Config.CASCADE_MAX_UNVERIFIED:
+            return f"{unmatched} of {len(quotes)} quotes are not in the transcript"
+    return None
+
+
+def tier_summary(calls: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Totals call records (see llm_metrics) per tier.
+
+    Returns:
+        For each tier: calls, escalations (calls made after a cheaper tier
+        failed validation), input/output tokens, total and mean latency in
+        seconds, and the estimated cost in USD (see token_budget).
+    """
+    from token_budget import estimate_cost  # token_budget routes through this module
+
+    tiers: Dict[str, Dict[str, Any]] = {}
+    for c in calls:
+        tier = tiers.setdefault(tier_of(c["model"]), {
+            "calls": 0, "escalations": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "latency_s": 0.0, "timed_calls": 0, "cost_usd": 0.0,
+        })
+        tier["calls"] += 1
+        tier["escalations"] += c["label"].endswith(ESCALATED_SUFFIX)
+        tier["prompt_tokens"] += c["prompt_tokens"]
+        tier["completion_tokens"] += c["completion_tokens"]
+        if c["latency_s"] is not None:
+            tier["latency_s"] += c["latency_s"]
+            tier["timed_calls"] += 1
+        tier["cost_usd"] += estimate_cost(c["model"], c["prompt_tokens"], c["completion_tokens"], c["cached_tokens"])
+    for tier in tiers.values():
+        tier["mean_latency_s"] = tier["latency_s"] / tier["timed_calls"] if tier["timed_calls"] else None
+    return tiers
+
+
+def format_tier_report(calls: List[Dict[str, Any]]) -> str:
+    """Renders `tier_summary` as a plain-text table, like llm_metrics.format_report."""
+    lines = [f"{'tier':<16} {'calls':>6} {'escalated':>9} {'prompt':>8} {'output':>7} {'secs':>7} {'avg s':>6} {'cost $':>8}"]
+    for name, t in sorted(tier_summary(calls).items()):
+        mean = f"{t['mean_latency_s']:.1f}" if t["mean_latency_s"] is not None else "-"
+        lines.append(
+            f"{name[:16]:<16} {t['calls']:>6} {t['escalations']:>9} {t['prompt_tokens']:>8} "
+            f"{t['completion_tokens']:>7} {t['latency_s']:>7.1f} {mean:>6} {t['cost_usd']:>8.4f}"
+        )
+    return "\n".join(lines)
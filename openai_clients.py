@@ -0,0 +1,139 @@
+"""
+Process-wide registry of pooled OpenAI clients.
+
+Every module asks this registry for its client instead of constructing
+`OpenAI(...)` per call, so consecutive requests in a job reuse the same
+keep-alive HTTP connections rather than paying for new connection pools and
+TLS handshakes each time.
+
+Handles:
+- One shared client per (API key, timeout) pair, created lazily and thread-safely
+- Keep-alive connection pooling with configurable limits and timeouts
+- Warming the pool at server start so the first real request skips the handshake
+- Feeding every response's rate-limit headers to the shared retry policy
+"""
+import sys
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import Config
+from retry_policy import observe_response
+
+# --- Dependency Checks ---
+try:
+    import httpx
+    from openai import OpenAI
+except ImportError:
+    print(
+        "ERROR: Required libraries ('openai', 'httpx') not found or failed to import. "
+        "Install using: pip install openai",
+        file=sys.stderr
+    )
+    sys.exit(1)
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[str, float], OpenAI] = {}
+_lock = threading.Lock()
+
+
+def _key_id(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key, safe to log."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def _observe_rate_limits(response) -> None:
+    observe_response("openai", response)
+
+
+def _build_client(api_key: str, timeout: float) -> OpenAI:
+    """
+    Creates an OpenAI client backed by a keep-alive httpx connection pool.
+
+    The SDK's own retries are turned off: retry_policy retries every call, and
+    two retry layers would multiply each other's attempts.
+    """
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(timeout, connect=Config.OPENAI_CONNECT_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=Config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.OPENAI_MAX_CONNECTIONS,
+            keepalive_expiry=Config.OPENAI_KEEPALIVE_SECONDS,
+        ),
+        event_hooks={"response": [_observe_rate_limits]},
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=Config.OPENAI_BASE_URL or None,
+        timeout=timeout,
+        http_client=http_client,
+        max_retries=0,
+    )
+
+
+def get_openai_client(api_key: Optional[str] = None, timeout: Optional[float] = None) -> OpenAI:
+    """
+    Returns the shared OpenAI client for an API key, creating it on first use.
+
+    Args:
+        api_key: OpenAI API key. Defaults to Config.OPENAI_API_KEY.
+        timeout: Read timeout in seconds for requests made with this client.
+                 Defaults to Config.OPENAI_TIMEOUT_SECONDS. Clients with
+                 different timeouts get separate pools.
+
+    Returns:
+        An OpenAI client that is safe to share between threads.
+    """
+    api_key = api_key or Config.OPENAI_API_KEY
+    timeout = float(timeout if timeout is not None else Config.OPENAI_TIMEOUT_SECONDS)
+    registry_key = (api_key, timeout)
+
+    client = _clients.get(registry_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(registry_key)
+        if client is None:
+            logger.info(f"Creating pooled OpenAI client for key {_key_id(api_key)} (timeout {timeout}s)")
+            client = _build_client(api_key, timeout)
+            _clients[registry_key] = client
+    return client
+
+
+def warm_up(api_key: Optional[str] = None, background: bool = True) -> None:
+    """
+    Opens a pooled connection to the API ahead of the first real request.
+
+    A cheap authenticated request (listing models) completes the TCP and TLS
+    handshakes so the connection sits in the keep-alive pool. Failures are
+    logged and otherwise ignored; warm-up is only an optimisation.
+
+    Args:
+        api_key: OpenAI API key. Defaults to Config.OPENAI_API_KEY.
+        background: Run the request on a daemon thread instead of blocking.
+    """
+    def _warm():
+        try:
+            get_openai_client(api_key).models.list()
+            logger.info("OpenAI connection pool warmed up.")
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up failed (continuing without it): {e}")
+
+    if background:
+        threading.Thread(target=_warm, name="openai-warm-up", daemon=True).start()
+    else:
+        _warm()
+
+
+def close_all() -> None:
+    """Closes every pooled client and empties the registry."""
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug(f"Error closing OpenAI client: {e}")
+        _clients.clear()
@@ -19,6 +19,8 @@ import textwrap
 import re
 from typing import List, Dict, Any, Optional
 
+from quote_index import UNMATCHED
+
 def _title_case_word(word: str) -> str:
     """
     Helper function to apply specific title casing rules to a single word.
@@ -104,6 +106,20 @@ def apply_strict_title_case_every_word(text: str) -> str:
     return result
 
 
+def quote_note(bullet_data: dict) -> str:
+    """
+    Returns the escaped HTML placed after a bullet's citation: the timestamp of
+    its quote, and a warning when the quote was not found in the transcript
+    (see quote_index.verify_bullets). Empty for unverified bullets.
+    """
+    note = ""
+    if bullet_data.get('timestamp_raw'):
+        note += f" {html.escape(bullet_data['timestamp_raw'])}"
+    if bullet_data.get('quote_status_raw') == UNMATCHED:
+        note += " <em>(Quote not found in transcript; check before use.)</em>"
+    return note
+
+
 def save_text_file(content: str, filepath: Path) -> bool:
     """
     Saves the given text content to a file at the specified path.
@@ -667,7 +683,7 @@ def generate_report_bullets(
 
              # Append the HTML for the formatted bullet point (uses already escaped parts)
              html_parts.append("<div class=\"bullet\">")
-             html_parts.append(f"<p><b>{safe_headline}</b> \"{safe_body}\" {citation}</p>")
+             html_parts.append(f"<p><b>{safe_headline}</b> \"{safe_body}\" {citation}{quote_note(bullet_data)}</p>")
              html_parts.append("</div>")
     else:
         html_parts.append("<p>No relevant bullets were extracted. Using Bullets</p>")
@@ -991,7 +1007,7 @@ def generate_report_both(
 
              # Append the HTML for the formatted bullet point (uses already escaped parts)
              html_parts.append("<div class=\"bullet\">")
-             html_parts.append(f"<p><b>{safe_headline}</b> \"{safe_body}\" {citation}</p>")
+             html_parts.append(f"<p><b>{safe_headline}</b> \"{safe_body}\" {citation}{quote_note(bullet_data)}</p>")
              html_parts.append("</div>")
     else:
         html_parts.append("<p>No relevant bullets were extracted. Using Bullets</p>")
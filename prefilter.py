@@ -0,0 +1,175 @@
+"""
+Module for shrinking a transcript to the parts relevant to the target.
+
+Both extraction prompts only care about statements by or about the target, so
+for panel shows and long interviews most of the transcript is dead weight.
+This pre-filter indexes speaker turns and mentions of the target locally and
+keeps only the target's own utterances, the question before each of them, and
+a window of context around every mention. Kept utterances are copied verbatim,
+so their original timestamps (and any HTML tags) survive.
+
+Handles:
+- Deriving name aliases (full, first and last name) for the target
+- Indexing speaker turns, name mentions and nearby pronoun references
+- Building the reduced transcript, with "[...]" marking each gap
+"""
+import re
+import logging
+from typing import List, Optional, Set
+
+from transcript_windows import split_utterances, Utterance
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_CONTEXT_UTTERANCES = 1  # Utterances kept either side of a mention
+DEFAULT_PRONOUN_REACH = 2  # Utterances after a mention where he/she still refers to the target
+MIN_ALIAS_LENGTH = 3  # Shorter name parts (initials, "Al") are too ambiguous to index
+GAP_MARKER = "[...]\n\n"
+
+_SPEAKER_RE = re.compile(r"\[\d{1,2}:\d{2}:\d{2}\]\s*([^:\n<]{1,80}?):")
+_PRONOUN_RE = re.compile(r"\b(he|him|his|she|her|hers)\b", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class PrefilterResult:
+    """The reduced transcript and how much of the original it kept."""
+
+    def __init__(self, text: str, applied: bool, kept_utterances: int, total_utterances: int, original_chars: int):
+        self.text = text
+        self.applied = applied
+        self.kept_utterances = kept_utterances
+        self.total_utterances = total_utterances
+        self.original_chars = original_chars
+
+    @property
+    def ratio(self) -> float:
+        """Kept characters as a fraction of the original transcript."""
+        return len(self.text) / self.original_chars if self.original_chars else 1.0
+
+    def __repr__(self) -> str:
+        return (
+            f"PrefilterResult(applied={self.applied}, utterances={self.kept_utterances}/{self.total_utterances}, "
+            f"ratio={self.ratio:.2f})"
+        )
+
+
+def target_aliases(target_name: str, extra_aliases: Optional[List[str]] = None) -> List[str]:
+    """Returns the names the target may be referred to by: full name, first and last name, plus any extras."""
+    aliases = [target_name.strip()] if target_name and target_name.strip() else []
+    parts = [p.strip(".,") for p in (target_name or "").split()]
+    if len(parts) > 1:
+        aliases.extend(p for p in (parts[0], parts[-1]) if len(p) >= MIN_ALIAS_LENGTH)
+    aliases.extend(a.strip() for a in (extra_aliases or []) if a and a.strip())
+    return list(dict.fromkeys(aliases))
+
+
+def _alias_pattern(aliases: List[str]) -> Optional["re.Pattern"]:
+    if not aliases:
+        return None
+    alternatives = "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+
+
+def speaker_of(utterance: Utterance) -> Optional[str]:
+    """Returns the speaker label of an utterance ('Speaker A (Jane Doe)', 'Jane Doe', ...), if any."""
+    match = _SPEAKER_RE.search(utterance.text)
+    return match.group(1).strip() if match else None
+
+
+def _spoken_text(utterance: Utterance) -> str:
+    """The words of an utterance, without its timestamp, speaker label or HTML tags."""
+    text = _TAG_RE.sub(" ", utterance.text)
+    match = _SPEAKER_RE.search(text)
+    return text[match.end():] if match else text
+
+
+def prefilter_transcript(
+    transcript_text: str,
+    target_name: str,
+    aliases: Optional[List[str]] = None,
+    context_utterances: int = DEFAULT_CONTEXT_UTTERANCES,
+    pronoun_reach: int = DEFAULT_PRONOUN_REACH,
+) -> PrefilterResult:
+    """
+    Keeps only the parts of a transcript that are by or about the target.
+
+    An utterance is kept when:
+    - the target is its speaker (plus the utterance just before it, usually
+      the question being answered),
+    - it mentions the target by name or alias, or
+    - it refers to "he"/"she" within `pronoun_reach` utterances after a
+      mention or a turn by the target,
+    together with `context_utterances` utterances either side of every
+    mention. Runs of dropped utterances are replaced by a "[...]" line.
+
+    The filter is only applied when the target can be identified as a
+    speaker; otherwise (generic "Speaker A" labels, or a target who never
+    speaks) dropping turns could lose the target's own words, so the
+    transcript is returned unchanged with `applied` False.
+
+    Args:
+        transcript_text: The labelled transcript (plain or <p>-wrapped HTML).
+        target_name: The person the report is about.
+        aliases: Extra names for the target (nicknames, titles such as "the governor").
+        context_utterances: Utterances kept either side of each mention.
+        pronoun_reach: How far after a mention a pronoun still counts.
+
+    Returns:
+        A PrefilterResult with the reduced transcript.
+    """
+    utterances = split_utterances(transcript_text)
+    original_chars = len(transcript_text or "")
+    unchanged = PrefilterResult(transcript_text, False, len(utterances), len(utterances), original_chars)
+
+    pattern = _alias_pattern(target_aliases(target_name, aliases))
+    if pattern is None or not utterances:
+        return unchanged
+
+    target_turns: Set[int] = set()
+    mentions: Set[int] = set()
+    for u in utterances:
+        speaker = speaker_of(u)
+        if speaker and pattern.search(speaker):
+            target_turns.add(u.index)
+        elif pattern.search(_spoken_text(u)):
+            mentions.add(u.index)
+
+    if not target_turns:
+        logger.info(f"Pre-filter skipped: '{target_name}' is not identified as a speaker.")
+        return unchanged
+
+    # Pronouns shortly after a mention (or a target turn) are taken to refer to the target
+    last_reference = None
+    for u in utterances:
+        if u.index in target_turns or u.index in mentions:
+            last_reference = u.index
+        elif last_reference is not None and u.index - last_reference <= pronoun_reach:
+            if _PRONOUN_RE.search(_spoken_text(u)):
+                mentions.add(u.index)
+
+    keep: Set[int] = set()
+    for i in target_turns:
+        keep.update((i - 1, i))
+    for i in mentions:
+        keep.update(range(i - context_utterances, i + context_utterances + 1))
+    keep = {i for i in keep if 0 <= i < len(utterances)}
+
+    pieces = []
+    previous = -1
+    for u in utterances:
+        if u.index not in keep:
+            continue
+        if u.index != previous + 1:
+            pieces.append(GAP_MARKER)
+        pieces.append(u.text)
+        previous = u.index
+    if previous != len(utterances) - 1:
+        pieces.append(GAP_MARKER)
+
+    result = PrefilterResult("".join(pieces), True, len(keep), len(utterances), original_chars)
+    logger.info(
+        f"Pre-filter kept {result.kept_utterances}/{result.total_utterances} utterances "
+        f"({result.ratio:.0%} of the transcript) for '{target_name}'"
+    )
+    return result
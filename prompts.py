@@ -1,4 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+
+from transcript_codec import TRANSCRIPT_ENCODING_FULL, encode_for_prompt
+from structured_output import OUTPUT_FORMAT_DELIMITED, OUTPUT_FORMAT_JSON
 
 TEXT_HIGHLIGHT_PROMPT_TEMPLATE = """# ROLE: Meticulous Communications Analyst & Information Extractor. Follow every rule exactly.
 
@@ -97,13 +100,15 @@ def format_text_highlight_prompt(
     transcript_text: str,
     target_name: str,
     metadata: Dict[str, Any],
-    max_bullets: int = 100
+    max_bullets: int = 100,
+    encoding: str = TRANSCRIPT_ENCODING_FULL
 ) -> str:
-    """Formats the Text Bullet Extraction prompt."""
+    """Formats the Text Bullet Extraction prompt (`encoding`: "full" or "compact", see transcript_codec)."""
     import logging # Ensure logging is imported
 
     if not transcript_text or not transcript_text.strip():
         logging.warning("Formatting Text Bullet prompt with empty transcript text.")
+    transcript_text = encode_for_prompt(transcript_text, encoding)
 
     if not metadata:
          logging.warning("Formatting Text Bullet prompt with missing metadata. Using defaults.")
@@ -210,13 +215,15 @@ def format_text_bullet_prompt(
     transcript_text: str,
     target_name: str,
     metadata: Dict[str, Any],
-    max_bullets: int = 100
+    max_bullets: int = 100,
+    encoding: str = TRANSCRIPT_ENCODING_FULL
 ) -> str:
-    """Formats the Text Bullet Extraction prompt."""
+    """Formats the Text Bullet Extraction prompt (`encoding`: "full" or "compact", see transcript_codec)."""
     import logging # Ensure logging is imported
 
     if not transcript_text or not transcript_text.strip():
         logging.warning("Formatting Text Bullet prompt with empty transcript text.")
+    transcript_text = encode_for_prompt(transcript_text, encoding)
 
     if not metadata:
          logging.warning("Formatting Text Bullet prompt with missing metadata. Using defaults.")
@@ -246,4 +253,267 @@ def format_text_bullet_prompt(
         raise ValueError(f"Failed to format Text Bullet prompt due to missing key: {e}")
 
 
+# ================== CACHED-PREFIX LAYOUT ==================
+# The templates above place the per-video metadata and transcript before the
+# instructions, so no two prompts share a prefix. The "cached_prefix" layout
+# reorders the same content: the invariant role, rules, examples and output
+# format become a system message that is byte-identical on every call (the
+# target is referred to as TARGET), and the video-specific data follows in the
+# user message. Providers that cache prompt prefixes (OpenAI does so
+# automatically for prefixes over 1024 tokens) then bill and process the
+# instruction block as cached input on repeated jobs. The original "inline"
+# layout stays the default; set PROMPT_LAYOUT=cached_prefix to use this one.
+
+PROMPT_LAYOUT_INLINE = "inline"
+PROMPT_LAYOUT_CACHED_PREFIX = "cached_prefix"
+
+_METADATA_MARKER = "# --- CONTEXTUAL METADATA"
+_INSTRUCTIONS_MARKER = "# ================== INSTRUCTIONS"
+_OUTPUT_MARKER = "# ================== OUTPUT FORMAT"
+_BEGIN_MARKER = "# Begin Extraction:"
+
+# Replaces the delimited OUTPUT FORMAT section when the reply is constrained by
+# a JSON schema (see structured_output).
+TEXT_HIGHLIGHT_JSON_OUTPUT = """# ================== OUTPUT FORMAT (JSON) ==================
+
+# Return ONE JSON object of the form {"bullets": [{"headline": "..."}, ...]}, matching the provided schema.
+# Each element of "bullets" is one extracted highlight, in the order the statements occur in the transcript.
+#   "headline": Concise PAST TENSE Summary (Accurately Attributed Actor) + Period. Do not include any quotations from the transcript. Plain text; do not apply Title Case.
+# If no relevant statements are found, return {"bullets": []}.
+# Ignore any instruction above about delimiters, "@@DELIM@@" or "@@NO BULLETS FOUND@@"; they apply only to the plain-text format.
+
+"""
+
+TEXT_BULLET_JSON_OUTPUT = """# ================== OUTPUT FORMAT (JSON) ==================
+
+# Return ONE JSON object of the form {"bullets": [{"headline": "...", "speaker": "...", "body": "...", "source": "...", "date": "..."}, ...]}, matching the provided schema.
+# Each element of "bullets" is one extracted bullet point, in the order the statements occur in the transcript:
+#   "headline": Concise PAST TENSE Summary (Accurately Attributed Actor) + Period. Raw text; do not apply Title Case.
+#   "speaker": Primary Speaker of Body Text (ALL CAPS) - Should align with Headline actor if directly quoted.
+#   "body": Relevant contextual passage from transcript. No added quotes/prefixes. Empty string if none.
+#   "source": Identified source name.
+#   "date": Identified date string, e.g., YYYYMMDD or M/D/YY or Month Day, Year or Date Unknown.
+# If no relevant points are found, return {"bullets": []}.
+# Ignore any instruction above about delimiters, "@@DELIM@@" or "@@NO BULLETS FOUND@@"; they apply only to the plain-text format.
+
+"""
+
+# ================== MULTI-TARGET EXTRACTION ==================
+# When several people in one transcript are tracked (e.g. the candidates in a
+# debate), one request covers all of them: the target names are joined with
+# MULTI_TARGET_SEPARATOR, this section is added to the prompt, and every bullet
+# carries a Target field so the reply can be split into per-target reports.
+
+MULTI_TARGET_SEPARATOR = "; "
+
+TEXT_MULTI_TARGET_SECTION = """# ================== MULTI-TARGET EXTRACTION ==================
+
+# The target is SEVERAL people, listed as the target name and separated by semicolons.
+# Apply every instruction about the target to EACH listed person separately: extract the statements by or about any of them, in one chronological list.
+# Never merge statements about different targets into one bullet. For the first bullet about each target use their full name; after that, their last name.
+# Tag every bullet with the ONE listed target it is about, spelled exactly as in the list.
+"""
+
+_MULTI_TARGET_FIELD = {
+    OUTPUT_FORMAT_DELIMITED: """# In each "*** BULLET START ***" block, add the field "**Target:** [target name exactly as listed]" followed by "@@DELIM@@" before the **Headline:** field.
+
+""",
+    OUTPUT_FORMAT_JSON: """# Put the target of each bullet in its "target" field.
+
+""",
+}
+
+_STATIC_INPUT_NOTE = """# INPUT: The user message gives the TARGET name, the source metadata and the transcript. Every mention of TARGET below means that name; the metadata and transcript are only in the user message.
+
+"""
+
+
+def _static_prefix(template: str) -> str:
+    """Builds the invariant system prompt from one of the inline templates."""
+    header = template[:template.index(_METADATA_MARKER)]
+    instructions = template[template.index(_INSTRUCTIONS_MARKER):template.index(_BEGIN_MARKER)]
+    static = header + _STATIC_INPUT_NOTE + instructions.rstrip() + "\n"
+    return (
+        static
+        .replace("{target_name}", "TARGET")
+        .replace("`{video_platform}`", "the Source Provider from the metadata")
+        .replace("`{video_upload_date}`", "the Upload Date from the metadata")
+        .replace("the transcript above", "the transcript")
+    )
+
+
+def _input_template(template: str) -> str:
+    """Builds the per-video user message template from one of the inline templates."""
+    data = template[template.index(_METADATA_MARKER):template.index(_INSTRUCTIONS_MARKER)]
+    return "# TARGET: {target_name}\n\n" + data + _BEGIN_MARKER + "\n"
+
+
+def target_label(target_name: Union[str, List[str]]) -> str:
+    """Returns the target name as it appears in a prompt; several targets are joined with MULTI_TARGET_SEPARATOR."""
+    if isinstance(target_name, str):
+        return target_name
+    return MULTI_TARGET_SEPARATOR.join(target_name)
+
+
+def _with_multi_target(prompt: str, output_format: str) -> str:
+    """Adds the multi-target section (before the Begin Extraction line, if any) to a prompt."""
+    section = TEXT_MULTI_TARGET_SECTION + _MULTI_TARGET_FIELD[output_format]
+    end = prompt.rfind(_BEGIN_MARKER)
+    if end == -1:
+        return prompt.rstrip() + "\n\n" + section.rstrip() + "\n"
+    return prompt[:end] + section + prompt[end:]
+
+
+def _with_json_output(prompt: str, json_output: str) -> str:
+    """Swaps the delimited OUTPUT FORMAT section of a prompt for the JSON one."""
+    start = prompt.rindex(_OUTPUT_MARKER)
+    end = prompt.rfind(_BEGIN_MARKER)
+    tail = prompt[end:] if end > start else ""
+    return prompt[:start] + (json_output + tail if tail else json_output.rstrip() + "\n")
+
+
+TEXT_HIGHLIGHT_SYSTEM_PROMPT = _static_prefix(TEXT_HIGHLIGHT_PROMPT_TEMPLATE)
+TEXT_HIGHLIGHT_INPUT_TEMPLATE = _input_template(TEXT_HIGHLIGHT_PROMPT_TEMPLATE)
+TEXT_BULLET_SYSTEM_PROMPT = _static_prefix(TEXT_BULLET_PROMPT_TEMPLATE)
+TEXT_BULLET_INPUT_TEMPLATE = _input_template(TEXT_BULLET_PROMPT_TEMPLATE)
+
+_LAYOUTS = {
+    "format_text_highlight_prompt": (
+        format_text_highlight_prompt, TEXT_HIGHLIGHT_SYSTEM_PROMPT, TEXT_HIGHLIGHT_INPUT_TEMPLATE,
+        TEXT_HIGHLIGHT_JSON_OUTPUT
+    ),
+    "format_text_bullet_prompt": (
+        format_text_bullet_prompt, TEXT_BULLET_SYSTEM_PROMPT, TEXT_BULLET_INPUT_TEMPLATE,
+        TEXT_BULLET_JSON_OUTPUT
+    ),
+}
+
+
+def format_prompt_messages(
+    prompt_type: str,
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    max_bullets: int = 100,
+    layout: str = PROMPT_LAYOUT_INLINE,
+    output_format: str = OUTPUT_FORMAT_DELIMITED,
+    encoding: str = TRANSCRIPT_ENCODING_FULL
+) -> List[Dict[str, str]]:
+    """
+    Formats an extraction prompt as Chat Completions messages.
+
+    Args:
+        prompt_type: format_text_bullet_prompt OR format_text_highlight_prompt
+        transcript_text: The transcript to analyze.
+        target_name: The person or entity to focus on, or a list of several
+            targets to extract in one pass (each bullet is then tagged with
+            its target).
+        metadata: Video metadata ('title', 'uploader', 'upload_date', ...).
+        max_bullets: The maximum number of bullet points to extract.
+        layout: "inline" (the default, Config.PROMPT_LAYOUT) sends the
+            original single user prompt; "cached_prefix" sends the static
+            instructions as a system message followed by a user message with
+            the video data.
+        output_format: "delimited" asks for the BULLET START/END text format;
+            "json_schema" asks for a {"bullets": [...]} JSON object instead.
+        encoding: "full" sends the transcript as labelled; "compact" sends it
+            with a speaker legend, merged turns and coarse times (see
+            transcript_codec), to be decoded from the reply.
+
+    Returns:
+        The list of messages to send.
+    """
+    import logging # Ensure logging is imported
+
+    if prompt_type not in _LAYOUTS:
+        raise ValueError(f"Unknown prompt type: {prompt_type}")
+    formatter, system_prompt, input_template, json_output = _LAYOUTS[prompt_type]
+    if output_format not in (OUTPUT_FORMAT_DELIMITED, OUTPUT_FORMAT_JSON):
+        raise ValueError(f"Unknown output format: {output_format}")
+    as_json = output_format == OUTPUT_FORMAT_JSON
+    multi_target = not isinstance(target_name, str) and len(target_name) > 1
+    target_name = target_label(target_name)
+
+    if layout == PROMPT_LAYOUT_INLINE:
+        prompt = formatter(transcript_text, target_name, metadata, max_bullets, encoding)
+        if as_json:
+            prompt = _with_json_output(prompt, json_output)
+        if multi_target:
+            prompt = _with_multi_target(prompt, output_format)
+        return [{"role": "user", "content": prompt}]
+    if layout != PROMPT_LAYOUT_CACHED_PREFIX:
+        raise ValueError(f"Unknown prompt layout: {layout}")
+
+    if not transcript_text or not transcript_text.strip():
+        logging.warning("Formatting extraction messages with empty transcript text.")
+
+    if not metadata:
+         logging.warning("Formatting extraction messages with missing metadata. Using defaults.")
+         metadata = {}
+
+    platform = metadata.get('extractor', 'Unknown Platform')
+    platform_display = "YouTube" if str(platform).lower() == "youtube" else str(platform)
+
+    user_content = input_template.format(
+        target_name=target_name,
+        transcript_text=encode_for_prompt(transcript_text, encoding),
+        video_title=metadata.get('title', 'Unknown Title'),
+        video_uploader=metadata.get('uploader', 'Unknown Uploader'),
+        video_upload_date=metadata.get('upload_date') or "Date Unknown",
+        video_platform=platform_display,
+        video_url=metadata.get('webpage_url', '#')
+    )
+    if as_json:
+        system_prompt = _with_json_output(system_prompt, json_output)
+    if multi_target:
+        system_prompt = _with_multi_target(system_prompt, output_format)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def format_analysis_prompt(transcript_text: str, target_name: str) -> str:
+    """Formats the plain-text analysis prompt for a whole (short) transcript."""
+    return f"""Analyze the following transcript for key statements made by or about {target_name}:
+
+Transcript:
+{transcript_text}
+
+Instructions:
+1. Identify all significant statements, claims, or commitments made by {target_name}
+2. Note any factual assertions made by others about {target_name}
+3. Highlight any potentially controversial or newsworthy statements
+4. Provide a concise summary of the key points"""
+
+
+def format_window_summary_prompt(transcript_text: str, target_name: str, section: str) -> str:
+    """Formats the prompt that summarizes one section (window) of a long transcript."""
+    return f"""The following is one section ({section}) of a longer transcript. Summarize it for an analysis of {target_name}:
+
+Transcript section:
+{transcript_text}
+
+Instructions:
+1. List every significant statement, claim, or commitment made by {target_name} in this section, with its [HH:MM:SS] timestamp
+2. Note any factual assertions made by others about {target_name}, with their timestamps
+3. Flag any potentially controversial or newsworthy statements
+4. Be concise but do not drop specifics (numbers, names, dates, quoted phrases)
+5. If nothing in this section concerns {target_name}, reply only: No relevant statements."""
+
+
+def format_summary_reduce_prompt(section_summaries: List[str], target_name: str) -> str:
+    """Formats the prompt that combines section summaries into one analysis."""
+    sections = "\n\n".join(section_summaries)
+    return f"""Below are summaries of consecutive sections of one transcript, in order. Combine them into a single analysis of the key statements made by or about {target_name}:
+
+Section summaries:
+{sections}
+
+Instructions:
+1. Identify all significant statements, claims, or commitments made by {target_name}, keeping their [HH:MM:SS] timestamps
+2. Note any factual assertions made by others about {target_name}
+3. Highlight any potentially controversial or newsworthy statements
+4. Provide a concise summary of the key points
+5. Merge repeated points and ignore sections with no relevant statements"""
 
@@ -0,0 +1,399 @@
+"""
+Shared retry policy for calls to the OpenAI and AssemblyAI APIs.
+
+Every API call goes through `call_with_retry` (or the `retrying` decorator),
+which combines three things per provider:
+- Backoff that follows the server: a Retry-After (or retry-after-ms, or
+  x-ratelimit-reset-*) header sets the wait; otherwise jittered exponential
+  backoff. A server that asks for a longer wait than
+  Config.RETRY_MAX_WAIT_SECONDS fails the call at once instead.
+- Pacing: the x-ratelimit-remaining-requests/-tokens headers of every OpenAI
+  response (see openai_clients) are tracked, and a call that would exceed the
+  remaining budget waits for the window to reset rather than collecting a 429.
+- A circuit breaker: after Config.CIRCUIT_FAILURE_THRESHOLD consecutive
+  server errors or connection failures the circuit opens, and calls fail fast
+  with CircuitOpenError for Config.CIRCUIT_RESET_SECONDS. One trial call is
+  then let through; its success closes the circuit again.
+Retries also stop once the current job/stage deadline (see deadlines) has
+passed or would pass before the next attempt.
+
+Only transient failures are retried: 408/409/429/5xx responses, connection
+errors and timeouts. Bad requests, authentication errors and exhausted quota
+are raised immediately. Errors that know better (e.g. a failed AssemblyAI
+transcript, see transcriber.TranscriptionFailedError) can say so with a
+boolean `retryable` attribute.
+"""
+import re
+import time
+import random
+import logging
+import threading
+import functools
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+from tenacity import Retrying, stop_after_attempt, retry_if_exception
+
+from config import Config
+import deadlines
+from deadlines import DeadlineExceeded
+
+try:
+    import httpx
+    _TRANSPORT_ERRORS = (httpx.TransportError,)
+except ImportError:
+    _TRANSPORT_ERRORS = ()
+
+try:
+    from openai import APIConnectionError
+    _TRANSPORT_ERRORS += (APIConnectionError,)  # Includes APITimeoutError
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# Constants
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _headers(exc: BaseException):
+    return getattr(getattr(exc, "response", None), "headers", None) or {}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parses a rate-limit reset duration such as '1s', '6m0s' or '20ms' into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Returns how long the server asked the client to wait, if the error response says."""
+    headers = _headers(exc)
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max((parsedate_to_datetime(value).timestamp() - time.time()), 0.0)
+            except (TypeError, ValueError):
+                pass
+    if _status_code(exc) == 429:
+        resets = [
+            parse_duration(headers.get("x-ratelimit-reset-requests")),
+            parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        ]
+        resets = [r for r in resets if r is not None]
+        if resets:
+            return max(resets)
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for transient failures: 408/409/429/5xx responses, connection errors and timeouts."""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if isinstance(getattr(exc, "retryable", None), bool):
+        return exc.retryable
+    if getattr(exc, "code", None) == "insufficient_quota":  # A 429 that waiting will not fix
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(exc, _TRANSPORT_ERRORS + (ConnectionError, TimeoutError))
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    """True for failures that suggest the provider is degraded (counted by the circuit breaker)."""
+    status = _status_code(exc)
+    if status is not None:
+        return status >= 500
+    return isinstance(exc, _TRANSPORT_ERRORS + (ConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if calls should not be made right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True  # Let one trial call through
+                logger.info(f"{self.name} circuit half-open: sending a trial request")
+                return
+            raise CircuitOpenError(
+                f"{self.name} looks degraded ({self.failures} consecutive failures); "
+                f"not calling it for another {max(remaining, 0):.0f}s"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed: provider recovered")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"{self.name} circuit opened after {self.failures} consecutive failures; "
+                        f"failing fast for {self.reset_seconds:.0f}s"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RateLimitState:
+    """Remaining request/token budget of one provider, as reported by its rate-limit headers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, headers) -> None:
+        """Updates the budget from the x-ratelimit-* headers of a response."""
+        if not headers or "x-ratelimit-remaining-requests" not in headers:
+            return
+        now = time.monotonic()
+        with self._lock:
+            try:
+                self.remaining_requests = int(headers["x-ratelimit-remaining-requests"])
+                if headers.get("x-ratelimit-remaining-tokens") is not None:
+                    self.remaining_tokens = int(headers["x-ratelimit-remaining-tokens"])
+            except ValueError:
+                return
+            self.requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0)
+            self.tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserves budget for one request and returns how long to wait first.
+
+        The reservation is subtracted from the known budget straight away, so
+        concurrent callers pace each other before the next response arrives.
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self.remaining_requests is not None:
+                if self.remaining_requests <= 0 and self.requests_reset_at > now:
+                    wait = self.requests_reset_at - now
+                self.remaining_requests -= 1
+            if tokens and self.remaining_tokens is not None:
+                if self.remaining_tokens < tokens and self.tokens_reset_at > now:
+                    wait = max(wait, self.tokens_reset_at - now)
+                self.remaining_tokens -= tokens
+            return wait
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_rate_limits: Dict[str, RateLimitState] = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    """Returns the shared circuit breaker of a provider."""
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                provider, Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_SECONDS
+            )
+        return _breakers[provider]
+
+
+def rate_limits(provider: str) -> RateLimitState:
+    """Returns the shared rate-limit state of a provider."""
+    with _registry_lock:
+        if provider not in _rate_limits:
+            _rate_limits[provider] = RateLimitState(provider)
+        return _rate_limits[provider]
+
+
+def observe_response(provider: str, response) -> None:
+    """Records the rate-limit headers of a provider response (httpx response hook)."""
+    rate_limits(provider).observe(getattr(response, "headers", None))
+
+
+def _wait(min_wait: float, max_wait: float):
+    """Tenacity wait strategy: the server's Retry-After if given, else jittered exponential backoff."""
+    def _compute(retry_state) -> float:
+        exc = retry_state.outcome.exception()
+        server_wait = retry_after_seconds(exc) if exc is not None else None
+        if server_wait is not None:
+            delay = server_wait + random.uniform(0, min(1.0, server_wait * 0.2))  # Spread out concurrent callers
+        else:
+            ceiling = min(max_wait, min_wait * 2 ** (retry_state.attempt_number - 1))
+            delay = random.uniform(min_wait, max(ceiling, min_wait))
+        left = deadlines.remaining()
+        return min(delay, max(left, 0)) if left is not None else delay
+    return _compute
+
+
+def _log_retry(label: str):
+    def _before_sleep(retry_state) -> None:
+        exc = retry_state.outcome.exception()
+        wait_time = getattr(retry_state.next_action, "sleep", 0)
+        logger.warning(
+            f"{label} failed ({type(exc).__name__}: {exc}). Retrying attempt "
+            f"{retry_state.attempt_number + 1} after {wait_time:.2f} seconds..."
+        )
+    return _before_sleep
+
+
+def call_with_retry(
+    provider: str,
+    fn: Callable[..., Any],
+    *args,
+    max_attempts: Optional[int] = None,
+    tokens: int = 0,
+    label: Optional[str] = None,
+    **kwargs,
+) -> Any:
+    """
+    Calls `fn(*args, **kwargs)` under the provider's retry policy.
+
+    Args:
+        provider: "openai" or "assemblyai"; selects the circuit breaker and
+            rate-limit budget.
+        fn: The API call.
+        max_attempts: Attempts before giving up. Defaults to Config.RETRY_MAX_ATTEMPTS.
+        tokens: Estimated tokens of the request, for pacing against the token budget.
+        label: Name used in log messages. Defaults to the function name.
+
+    Returns:
+        Whatever `fn` returns.
+
+    Raises:
+        CircuitOpenError: When the provider's circuit is open.
+        The last error from `fn` when it is not retryable, the server asks for
+        a longer wait than Config.RETRY_MAX_WAIT_SECONDS, or attempts run out.
+    """
+    return _call(provider, fn, args, kwargs, max_attempts, tokens, label or getattr(fn, "__name__", "API call"))
+
+
+def _call(provider: str, fn, args, kwargs, max_attempts: Optional[int], tokens: int, label: str) -> Any:
+    circuit = breaker(provider)
+    budget = rate_limits(provider)
+    max_wait = Config.RETRY_MAX_WAIT_SECONDS
+
+    def _should_retry(exc: BaseException) -> bool:
+        if not is_retryable(exc):
+            return False
+        server_wait = retry_after_seconds(exc)
+        if server_wait is not None and server_wait > max_wait:
+            logger.warning(f"{label}: {provider} asked to wait {server_wait:.0f}s; failing fast instead")
+            return False
+        left = deadlines.remaining()
+        if left is not None and left <= max(server_wait or 0, Config.RETRY_MIN_WAIT_SECONDS):
+            logger.warning(f"{label}: not retrying, the deadline leaves {max(left, 0):.1f}s")
+            return False
+        return True
+
+    def _attempt():
+        circuit.before_call()
+        active = deadlines.current()
+        if active is not None:
+            active.check()
+        if Config.RATE_LIMIT_PACING:
+            pause = min(budget.reserve(tokens), max_wait, deadlines.remaining() or max_wait)
+            if pause > 0:
+                logger.info(f"{label}: pacing {pause:.1f}s for the {provider} rate-limit budget")
+                time.sleep(pause)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if _is_provider_failure(e):
+                circuit.record_failure()
+            else:
+                circuit.record_success()  # The provider answered (e.g. a 400 or 429), so it is up
+            raise
+        circuit.record_success()
+        return result
+
+    for attempt in Retrying(
+        wait=_wait(Config.RETRY_MIN_WAIT_SECONDS, max_wait),
+        stop=stop_after_attempt(max_attempts or Config.RETRY_MAX_ATTEMPTS),
+        retry=retry_if_exception(_should_retry),
+        before_sleep=_log_retry(label),
+        reraise=True,
+    ):
+        with attempt:
+            return _attempt()
+
+
+def retrying(
+    provider: str,
+    max_attempts: Optional[int] = None,
+    tokens: Optional[Callable[..., int]] = None,
+):
+    """
+    Decorator form of `call_with_retry`.
+
+    Args:
+        provider: "openai" or "assemblyai".
+        max_attempts: Attempts before giving up. Defaults to Config.RETRY_MAX_ATTEMPTS.
+        tokens: Optional function estimating the request's tokens from the
+            decorated function's arguments.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            estimate = tokens(*args, **kwargs) if tokens else 0
+            return _call(provider, fn, args, kwargs, max_attempts, estimate, fn.__name__)
+        return wrapper
+    return decorator
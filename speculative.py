@@ -0,0 +1,237 @@
+"""
+Module for speculative extraction while the user reviews the transcript.
+
+The user spends minutes in Step 2 checking speaker names and fixing typos,
+and most of the time the transcript reaches Step 3 unchanged apart from the
+speaker renames. So as soon as the transcript exists, the report's
+extractions start in a background thread. When the user clicks Generate
+Report:
+- an unchanged transcript reuses the result as it is;
+- a transcript that differs only by speaker renames reuses the bullets with
+  the old names replaced by the new ones;
+- any other edit reuses the speculative run as the previous state for
+  incremental re-extraction, so only the edited windows are sent again.
+
+The worker never touches Streamlit session state; the app keeps the
+SpeculativeExtraction object and asks it for a result, or cancels it when
+the run is superseded (a new transcript, Restart). Cancelling ends the run's
+deadline, so no further LLM calls are started for it.
+
+Handles:
+- Starting the extractions for a report in a shared background pool
+- Matching the final transcript against the speculated one, modulo renames
+- Applying speaker renames to a transcript and to finished bullets
+"""
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FuturesTimeout
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+import deadlines
+from analyzer import extract_many_from_text, build_extraction_state
+from incremental import ExtractionState
+from transcript_windows import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+_LABEL_NAME_RE = re.compile(r"\(([^)]+)\)\s*$")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=Config.SPECULATIVE_MAX_WORKERS, thread_name_prefix="speculative")
+        return _pool
+
+
+def rename_speakers(transcript: str, renames: List[Tuple[str, str]]) -> str:
+    """
+    Replaces speaker labels in a transcript, e.g. "Speaker A (Troy)" with "Troy Nehls".
+
+    Args:
+        transcript: The labelled transcript.
+        renames: (original label, new label) pairs, as confirmed in Step 2.
+
+    Returns:
+        The transcript with every original label replaced.
+    """
+    for original, edited in renames:
+        transcript = transcript.replace(original, edited.strip())
+    return transcript
+
+
+def _name_changes(renames: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """(old name, new name) pairs for labels whose name actually changed, e.g. ("Troy", "Troy Nehls")."""
+    changes = []
+    for original, edited in renames:
+        match = _LABEL_NAME_RE.search(original)
+        old_name = (match.group(1) if match else original).strip()
+        new_name = edited.strip()
+        if old_name and new_name and old_name.lower() != new_name.lower():
+            changes.append((old_name, new_name))
+    return changes
+
+
+def _rename_in(text: Optional[str], old_name: str, new_name: str) -> Optional[str]:
+    if not text:
+        return text
+
+    def _replace(match):
+        if text[match.start():match.start() + len(new_name)].lower() == new_name.lower():
+            return match.group(0)  # Already the full new name, e.g. "Troy Nehls" for "Troy"
+        return new_name.upper() if match.group(0).isupper() else new_name
+    return re.sub(rf"\b{re.escape(old_name)}\b", _replace, text, flags=re.I)
+
+
+def rename_in_bullets(
+    bullets: List[Dict[str, Optional[str]]], renames: List[Tuple[str, str]]
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Applies speaker renames to extracted bullets.
+
+    The old name is replaced as a whole word in the speaker and headline
+    fields, keeping the upper case the prompts ask for in speaker fields. The
+    body is a verbatim quote and is never changed: renames relabel speakers,
+    not what they said.
+
+    Returns:
+        New bullet dicts; the input is left unchanged.
+    """
+    changes = _name_changes(renames)
+    renamed = []
+    for bullet in bullets:
+        bullet = dict(bullet)
+        for old_name, new_name in changes:
+            for field in ("speaker_raw", "headline_raw"):
+                if field in bullet:
+                    bullet[field] = _rename_in(bullet[field], old_name, new_name)
+        renamed.append(bullet)
+    return renamed
+
+
+class SpeculativeExtraction:
+    """A report's extractions running in the background against the unedited transcript."""
+
+    def __init__(
+        self,
+        transcript: str,
+        target_name: str,
+        prompt_types: List[str],
+        future: Future,
+        deadline: Optional[deadlines.Deadline] = None,
+    ):
+        self.transcript = transcript
+        self.target_name = target_name
+        self.prompt_types = list(prompt_types)
+        self.future = future
+        self.deadline = deadline
+
+    def cancel(self) -> None:
+        """Stops the run: drops it if still queued, and ends its deadline so it starts no more LLM calls."""
+        self.future.cancel()
+        if self.deadline is not None:
+            self.deadline.cancel()
+
+    def _bullets(self, wait: Optional[float]) -> Optional[Dict[str, List[Dict[str, Optional[str]]]]]:
+        """The speculative results, waiting up to `wait` seconds (None: forever); None if unavailable."""
+        try:
+            return self.future.result(timeout=wait)
+        except FuturesTimeout:
+            logger.info("Speculative extraction is still running; not waiting for it")
+        except Exception as e:
+            logger.warning(f"Speculative extraction failed: {e}")
+        return None
+
+    def resolve(
+        self,
+        transcript: str,
+        target_name: str,
+        prompt_types: List[str],
+        renames: List[Tuple[str, str]],
+    ) -> Tuple[Optional[Dict[str, List[Dict[str, Optional[str]]]]], Dict[str, ExtractionState]]:
+        """
+        Reuses the speculative run for the transcript the user confirmed.
+
+        If the confirmed transcript is the speculated one with `renames`
+        applied, waits for the run (within the current deadline) and returns
+        its bullets with the renames applied. Otherwise, if the run has
+        already finished, returns per-window states for incremental
+        re-extraction; a run still in progress is cancelled. Transcripts are
+        compared, and windows matched, ignoring markup and whitespace, so the
+        Step 2 editor's re-wrapping does not count as an edit.
+
+        Args:
+            transcript: The confirmed transcript (speaker renames applied).
+            target_name: The report's target.
+            prompt_types: The report's prompt types.
+            renames: The (original label, new label) pairs that were applied.
+
+        Returns:
+            (results by prompt type, or None when they cannot be reused as
+            they are; extraction states by prompt type, possibly empty).
+        """
+        if target_name != self.target_name or set(prompt_types) - set(self.prompt_types):
+            self.cancel()
+            return None, {}
+
+        renamed_speculation = rename_speakers(self.transcript, renames)
+        unchanged = normalize_transcript(renamed_speculation) == normalize_transcript(transcript)
+        if not unchanged and not self.future.done():
+            self.cancel()  # Its result is not needed
+            logger.info("Transcript was edited; dropping the unfinished speculative extraction")
+            return None, {}
+
+        bullets = self._bullets(deadlines.remaining() if unchanged else 0)
+        if bullets is None:
+            return None, {}
+
+        renamed = {p: rename_in_bullets(bullets[p], renames) for p in prompt_types}
+        if unchanged:
+            logger.info(f"Reusing speculative extraction ({len(renames)} speaker renames applied)")
+            states = {p: build_extraction_state(transcript, target_name, p, renamed[p]) for p in prompt_types}
+            return renamed, states
+
+        logger.info("Transcript was edited; using the speculative extraction for incremental re-extraction")
+        states = {p: build_extraction_state(renamed_speculation, target_name, p, renamed[p]) for p in prompt_types}
+        return None, states
+
+
+def start(
+    transcript: str,
+    target_name: str,
+    metadata: Dict[str, Any],
+    open_ai_api,
+    prompt_types: List[str],
+) -> Optional[SpeculativeExtraction]:
+    """
+    Starts a report's extractions in the background.
+
+    Args:
+        transcript: The transcript as it will be sent to extraction if the
+            user changes nothing.
+        target_name: The report's target.
+        metadata: Video metadata passed through to the prompts.
+        open_ai_api: OpenAI API key.
+        prompt_types: The report's prompt types.
+
+    Returns:
+        The running extraction, or None when speculation is disabled or
+        there is nothing to extract.
+    """
+    if not Config.SPECULATIVE_EXTRACTION or not prompt_types or not transcript.strip():
+        return None
+
+    job = deadlines.Deadline(Config.JOB_DEADLINE_SECONDS, "speculative extraction")
+
+    def _run():
+        return extract_many_from_text(transcript, target_name, dict(metadata), open_ai_api, prompt_types)
+
+    logger.info(f"Starting speculative extraction: {prompt_types}")
+    future = _executor().submit(deadlines.bind(_run, job))
+    return SpeculativeExtraction(transcript, target_name, prompt_types, future, job)
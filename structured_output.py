@@ -0,0 +1,267 @@
+"""
+Module for schema-validated (JSON) extraction output.
+
+Structured-output mode is opt-in (EXTRACTION_OUTPUT_FORMAT=json_schema); the
+delimited text format stays the default and the fallback. In this mode the
+model is constrained by a JSON schema to reply with {"bullets": [...]}, so
+formatting drift can no longer silently drop bullets the way a missed
+'@@DELIM@@' or '**Headline:**' prefix does. Replies
+are validated into typed BulletRecord objects and converted to the same raw
+bullet dicts the delimited parser produces, so output.py is unaffected.
+
+Handles:
+- The JSON schemas and `response_format` for the bullet and highlight prompts
+  (with a "target" field per bullet for multi-target extraction)
+- Validating JSON bullets into BulletRecord objects
+- Incremental parsing of streamed JSON, yielding each bullet as its object closes
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMAT_JSON = "json_schema"
+OUTPUT_FORMAT_DELIMITED = "delimited"
+
+_BULLET_FIELDS = ("headline", "speaker", "body", "source", "date")
+_HIGHLIGHT_FIELDS = ("headline",)
+
+
+def _schema(fields) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {
+            "bullets": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {field: {"type": "string"} for field in fields},
+                    "required": list(fields),
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["bullets"],
+        "additionalProperties": False,
+    }
+
+
+BULLET_SCHEMA = _schema(_BULLET_FIELDS)
+HIGHLIGHT_SCHEMA = _schema(_HIGHLIGHT_FIELDS)
+# Multi-target extraction tags every bullet with the target it is about
+MULTI_TARGET_BULLET_SCHEMA = _schema(("target",) + _BULLET_FIELDS)
+MULTI_TARGET_HIGHLIGHT_SCHEMA = _schema(("target",) + _HIGHLIGHT_FIELDS)
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a structured reply is not usable (not JSON, refused, wrong shape)."""
+
+
+def _fields(prompt_type: str):
+    return _HIGHLIGHT_FIELDS if prompt_type == "format_text_highlight_prompt" else _BULLET_FIELDS
+
+
+def response_format(prompt_type: str, multi_target: bool = False) -> Dict[str, Any]:
+    """Returns the Chat Completions `response_format` for a prompt type."""
+    highlight = prompt_type == "format_text_highlight_prompt"
+    if multi_target:
+        schema = MULTI_TARGET_HIGHLIGHT_SCHEMA if highlight else MULTI_TARGET_BULLET_SCHEMA
+    else:
+        schema = HIGHLIGHT_SCHEMA if highlight else BULLET_SCHEMA
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "highlights" if highlight else "bullets",
+            "strict": True,
+            "schema": schema,
+        },
+    }
+
+
+class BulletRecord:
+    """One validated bullet from a structured reply."""
+
+    def __init__(
+        self,
+        headline: str,
+        speaker: Optional[str] = None,
+        body: Optional[str] = None,
+        source: Optional[str] = None,
+        date: Optional[str] = None,
+        target: Optional[str] = None,
+    ):
+        self.headline = headline
+        self.speaker = speaker
+        self.body = body
+        self.source = source
+        self.date = date
+        self.target = target  # Only set by multi-target extraction
+
+    @classmethod
+    def from_json(cls, obj: Any, prompt_type: str) -> "BulletRecord":
+        """Validates one element of the "bullets" array."""
+        if not isinstance(obj, dict):
+            raise StructuredOutputError(f"Bullet is not an object: {str(obj)[:100]}")
+        values = {}
+        for field in _fields(prompt_type) + ("target",):
+            value = obj.get(field)
+            if value is not None and not isinstance(value, str):
+                raise StructuredOutputError(f"Bullet field '{field}' is not a string: {value!r}")
+            values[field] = value.strip() if value is not None else None
+        if not values.get("headline"):
+            raise StructuredOutputError(f"Bullet has no headline: {str(obj)[:100]}")
+        return cls(**values)
+
+    def to_raw(self, prompt_type: str) -> Dict[str, Optional[str]]:
+        """Converts to the raw bullet dict used by the delimited parser and output.py."""
+        if prompt_type == "format_text_highlight_prompt":
+            raw = {"headline_raw": self.headline}
+        else:
+            raw = {
+                "headline_raw": self.headline,
+                "speaker_raw": self.speaker,
+                "body_raw": self.body,
+                "source_raw": self.source,
+                "date_raw": self.date,
+            }
+        if self.target is not None:
+            raw["target_raw"] = self.target
+        return raw
+
+
+class JsonBulletStreamParser:
+    """
+    Incremental parser for streamed {"bullets": [...]} replies.
+
+    Scans the text once as it arrives, tracking string/escape state and brace
+    depth inside the "bullets" array, and validates each bullet object as soon
+    as its closing brace arrives. A cut-off reply therefore keeps every bullet
+    that was completed before the cut. Mirrors BulletStreamParser's interface.
+    """
+
+    _ARRAY_START_RE = re.compile(r'"bullets"\s*:\s*\[')
+
+    def __init__(self, prompt_type: str):
+        self.prompt_type = prompt_type
+        self.no_bullets = False
+        self.started = False  # The "bullets" array has been found
+        self.finished = False  # Its closing bracket has been seen
+        self.invalid = 0  # Bullet objects that failed validation
+        self._parts: List[str] = []
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start: Optional[int] = None
+        self._count = 0
+
+    def feed(self, text: Optional[str]) -> List[Dict[str, Optional[str]]]:
+        """Adds streamed text and returns any bullets completed by it."""
+        if not text or self.finished:
+            if text:
+                self._parts.append(text)
+            return []
+        self._parts.append(text)
+        self._buffer += text
+
+        if not self.started:
+            match = self._ARRAY_START_RE.search(self._buffer)
+            if not match:
+                return []
+            self.started = True
+            self._buffer = self._buffer[match.end():]
+            self._pos = 0
+
+        completed = []
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif c == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._obj_start is not None:
+                    bullet = self._parse_object(buf[self._obj_start:i + 1])
+                    if bullet is not None:
+                        completed.append(bullet)
+                    self._obj_start = None
+            elif c == "]" and self._depth == 0:
+                self.finished = True
+                self.no_bullets = self._count == 0
+                i += 1
+                break
+            i += 1
+
+        # Drop scanned text, keeping any object still being received
+        cut = self._obj_start if self._obj_start is not None else i
+        self._buffer = buf[cut:]
+        self._pos = i - cut
+        if self._obj_start is not None:
+            self._obj_start = 0
+        return completed
+
+    def _parse_object(self, obj_text: str) -> Optional[Dict[str, Optional[str]]]:
+        try:
+            record = BulletRecord.from_json(json.loads(obj_text), self.prompt_type)
+        except (ValueError, StructuredOutputError) as e:
+            self.invalid += 1
+            logger.warning(f"Skipping invalid structured bullet: {e}")
+            return None
+        self._count += 1
+        return record.to_raw(self.prompt_type)
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._parts)
+
+
+def parse_json_response(raw_text_response: Optional[str], prompt_type: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Parses and validates a structured reply into raw bullet dicts.
+
+    A reply that is not complete JSON (e.g. cut off at the token limit) still
+    yields every bullet object that was closed before the cut.
+
+    Raises:
+        StructuredOutputError: When the reply contains no "bullets" array at all.
+    """
+    if not raw_text_response or not raw_text_response.strip():
+        raise StructuredOutputError("Empty structured reply.")
+
+    try:
+        data = json.loads(raw_text_response)
+    except ValueError:
+        data = None
+
+    if isinstance(data, dict) and isinstance(data.get("bullets"), list):
+        bullets = []
+        for obj in data["bullets"]:
+            try:
+                bullets.append(BulletRecord.from_json(obj, prompt_type).to_raw(prompt_type))
+            except StructuredOutputError as e:
+                logger.warning(f"Skipping invalid structured bullet: {e}")
+        logger.info(f"Parsed {len(bullets)} structured bullets.")
+        return bullets
+
+    parser = JsonBulletStreamParser(prompt_type)
+    bullets = parser.feed(raw_text_response)
+    if not parser.started:
+        raise StructuredOutputError(f"Reply has no 'bullets' array: {raw_text_response[:100]}")
+    logger.warning(f"Structured reply was incomplete; kept {len(bullets)} bullets closed before the cut.")
+    return bullets
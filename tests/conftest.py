@@ -0,0 +1,22 @@
+"""
+Shared test setup.
+
+config.py reads the API keys from Streamlit secrets as soon as it is
+imported, so the tests run from a scratch directory holding a
+.streamlit/secrets.toml with dummy keys. Anything the code under test writes
+by default (response cache, chunk manifests, batches) lands there too.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix="trackgpt-tests-")
+os.makedirs(os.path.join(_scratch, ".streamlit"))
+with open(os.path.join(_scratch, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+    f.write('OPENAI_API_KEY = "test-openai-key"\nASSEMBLYAI_API_KEY = "test-assemblyai-key"\n')
+os.environ["OUTPUT_DIR"] = os.path.join(_scratch, "output")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.chdir(_scratch)
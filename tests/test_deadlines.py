@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+import deadlines
+import llm_metrics
+from deadlines import Cancellation, RequestCancelled
+
+
+class _FakeStream:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(deadlines.Config, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(llm_metrics, "latency_percentile", lambda *args, **kwargs: 0.05)
+
+
+def test_hedge_answers_and_the_original_stream_is_closed(hedging):
+    streams = []
+
+    def request(timeout, cancellation):
+        stream = cancellation.attach(_FakeStream())
+        streams.append(stream)
+        if len(streams) == 1:
+            stream.closed.wait(5)  # The original request hangs until it is closed
+            cancellation.check()
+            return "original"
+        return "hedge"
+
+    assert deadlines.hedged_call(request, label="test") == "hedge"
+    assert streams[0].closed.wait(1)
+    assert not streams[1].closed.is_set()
+
+
+def test_fast_calls_are_not_hedged(hedging):
+    calls = []
+
+    def request(timeout, cancellation):
+        calls.append(cancellation)
+        return "only"
+
+    assert deadlines.hedged_call(request, label="test") == "only"
+    assert len(calls) == 1
+
+
+def test_calls_are_not_streamed_without_hedging(monkeypatch):
+    monkeypatch.setattr(deadlines.Config, "HEDGE_REQUESTS", False)
+    assert deadlines.hedged_call(lambda timeout, cancellation: cancellation, label="test") is None
+
+
+def test_cancellation_closes_late_attachments():
+    cancellation = Cancellation()
+    cancellation.cancel()
+    stream = cancellation.attach(_FakeStream())
+    assert stream.closed.is_set()
+    with pytest.raises(RequestCancelled):
+        cancellation.check()
+
+
+def test_latency_percentile_scales_with_prompt_tokens(monkeypatch):
+    monkeypatch.setattr(llm_metrics, "_calls", [])
+    for _ in range(10):
+        llm_metrics.record_call("test", "scaled-model", {"prompt_tokens": 1000}, latency_s=2.0)
+
+    base = llm_metrics.LATENCY_BASE_TOKENS
+    assert llm_metrics.latency_percentile(95, "scaled-model") == 2.0
+    assert llm_metrics.latency_percentile(95, "scaled-model", tokens=1000) == pytest.approx(2.0)
+    assert llm_metrics.latency_percentile(95, "scaled-model", tokens=5000) == pytest.approx(
+        2.0 * (5000 + base) / (1000 + base)
+    )
+
+
+def test_deadline_caps_call_timeout():
+    with deadlines.deadline(0.5, "test"):
+        assert deadlines.call_timeout(30) <= 0.5
+        time.sleep(0.6)
+        with pytest.raises(deadlines.DeadlineExceeded):
+            deadlines.call_timeout(30)
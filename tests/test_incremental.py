@@ -0,0 +1,109 @@
+import re
+
+import analyzer
+from incremental import ExtractionState
+from transcript_windows import normalize_transcript, split_transcript_windows
+
+BULLET = "format_text_bullet_prompt"
+TARGET = "Jane Doe"
+METADATA = {"title": "Town hall", "uploader": "KTV", "upload_date": "20240501", "webpage_url": "https://example.com"}
+WINDOW = 900
+OVERLAP = 30
+
+LINES = [
+    "[00:00:05] Speaker A (Jane Doe): We will cut property taxes for every family.",
+    "[00:05:10] Speaker B (Host): What about the school budget?",
+    "[00:10:00] Speaker A (Jane Doe): The school budget will grow every single year.",
+    "[00:16:00] Speaker B (Host): And the border?",
+    "[00:20:00] Speaker A (Jane Doe): We need more agents at the southern border.",
+    "[00:31:00] Speaker A (Jane Doe): Water rights belong to the farmers of this state.",
+]
+
+
+def _wrap(transcript):
+    """What prepare_transcript_for_edit and Generate Report do to the transcript."""
+    transcript = re.sub(r'(\[\d+:\d+:\d+\] Speaker [A-Z])', r'</p><p>\1', transcript)
+    return '<p>' + transcript.strip() + '</p>'
+
+
+def _step2_round_trip(transcript):
+    """The Step 2 editor shows the wrapped transcript without tags, then re-wraps the submitted text."""
+    edited = transcript.replace('<p>', '').replace('</p>', '\n\n')
+    return _wrap(edited)
+
+
+def _keys(transcript):
+    return [w.key for w in split_transcript_windows(transcript, WINDOW, OVERLAP)]
+
+
+def _bullet(body, headline="Doe speaks"):
+    return {"headline_raw": headline, "speaker_raw": "JANE DOE", "body_raw": body, "source_raw": None, "date_raw": None}
+
+
+def test_window_keys_survive_the_step2_round_trip():
+    original = _wrap("\n".join(LINES))
+    once = _step2_round_trip(original)
+    twice = _step2_round_trip(once)
+
+    assert once != original
+    assert _keys(once) == _keys(original)
+    assert _keys(twice) == _keys(original)
+
+
+def test_editing_one_utterance_changes_only_its_windows():
+    original = _wrap("\n".join(LINES))
+    edited = _step2_round_trip(original).replace("southern border", "northern border")
+
+    before, after = _keys(original), _keys(edited)
+    assert len(before) == len(after) == 3
+    assert [b == a for b, a in zip(before, after)] == [True, False, True]
+
+
+def test_state_from_bullets_reuses_unchanged_windows():
+    original = _wrap("\n".join(LINES))
+    windows = split_transcript_windows(original, WINDOW, OVERLAP)
+    bullets = [
+        _bullet("We will cut property taxes for every family."),
+        _bullet("We need more agents at the southern border."),
+        _bullet("Water rights belong to the farmers of this state."),
+    ]
+    state = ExtractionState.from_bullets(BULLET, TARGET, original, windows, bullets)
+
+    edited = _step2_round_trip(original).replace("southern border", "northern border")
+    reused = state.reusable(split_transcript_windows(edited, WINDOW, OVERLAP))
+
+    assert state.matches(BULLET, TARGET)
+    assert not state.matches("format_text_highlight_prompt", TARGET)
+    assert reused == {0: [bullets[0]], 2: [bullets[2]]}
+
+
+def test_extract_incremental_only_sends_changed_windows(monkeypatch):
+    monkeypatch.setattr(analyzer.Config, "EXTRACTION_WINDOW_SECONDS", WINDOW)
+    monkeypatch.setattr(analyzer.Config, "EXTRACTION_WINDOW_OVERLAP_SECONDS", OVERLAP)
+    sent = []
+
+    def fake_extract(text, target_name, metadata, open_ai_api, prompt_type, max_bullets, **kwargs):
+        sent.append((text, kwargs))
+        return [_bullet(normalize_transcript(text))]
+
+    def fake_plan(*args, **kwargs):
+        return type("Plan", (), {"model": "planned-model", "transcript_text": None, "windowed": False})()
+
+    monkeypatch.setattr(analyzer, "extract_raw_data_from_text", fake_extract)
+    monkeypatch.setattr(analyzer, "plan_extraction", fake_plan)
+
+    original = _wrap("\n".join(LINES))
+    first, state = analyzer.extract_incremental(original, TARGET, METADATA, "key", BULLET)
+    assert len(sent) == 3
+    assert all(kwargs["model"] == "planned-model" and kwargs["prefilter"] is False for _, kwargs in sent)
+    assert all(kwargs["windowed"] is False for _, kwargs in sent)
+
+    sent.clear()
+    unchanged, state = analyzer.extract_incremental(_step2_round_trip(original), TARGET, METADATA, "key", BULLET, previous=state)
+    assert sent == []
+    assert unchanged == first
+
+    edited = _step2_round_trip(original).replace("southern border", "northern border")
+    _, state = analyzer.extract_incremental(edited, TARGET, METADATA, "key", BULLET, previous=state)
+    assert len(sent) == 1
+    assert "northern border" in sent[0][0]
@@ -0,0 +1,79 @@
+from output import quote_note
+from quote_index import APPROXIMATE, EXACT, UNMATCHED, QuoteIndex, format_timestamp, verify_bullets
+
+TRANSCRIPT = (
+    "<p>[00:00:05] Speaker A (Jane Doe): Good evening, everyone. Thank you for coming out tonight.</p>"
+    "<p>[00:01:10] Speaker A (Jane Doe): We will cut property taxes for every working family in this state, "
+    "and we will pay for it by ending the giveaways to developers.</p>"
+    "<p>[01:02:03] Speaker B (Host): What about the water shortage in the valley?</p>"
+    "<p>[01:02:30] Speaker A (Jane Doe): Water rights belong to the farmers who have worked this land for generations.</p>"
+)
+
+
+def test_exact_quote_gets_its_utterance_timestamp():
+    match = QuoteIndex(TRANSCRIPT).find("We will cut property taxes for every working family in this state.")
+    assert match.status == EXACT
+    assert match.verified
+    assert match.timestamp == "[00:01:10]"
+
+
+def test_punctuation_case_and_markup_are_ignored():
+    index = QuoteIndex(TRANSCRIPT)
+    assert index.find("WATER RIGHTS, belong to the farmers!").status == EXACT
+    assert index.find("coming out tonight. <p>We will cut").status == EXACT
+
+
+def test_dropped_word_is_an_approximate_match():
+    match = QuoteIndex(TRANSCRIPT).find(
+        "we will cut property taxes for every family in this state, and we will pay for it by ending the giveaways"
+    )
+    assert match.status == APPROXIMATE
+    assert match.timestamp == "[00:01:10]"
+
+
+def test_omissions_are_matched_piece_by_piece():
+    match = QuoteIndex(TRANSCRIPT).find(
+        "We will cut property taxes [...] by ending the giveaways to developers."
+    )
+    assert match.status == EXACT
+    assert match.timestamp == "[00:01:10]"
+
+
+def test_invented_quote_is_unmatched():
+    match = QuoteIndex(TRANSCRIPT).find("I will build a high speed railway between the two largest cities.")
+    assert match.status == UNMATCHED
+    assert not match.verified
+    assert match.timestamp is None
+
+
+def test_empty_quote_is_unmatched():
+    assert QuoteIndex(TRANSCRIPT).find("").status == UNMATCHED
+    assert QuoteIndex("").find("Water rights").status == UNMATCHED
+
+
+def test_speaker_labels_are_not_quotable():
+    assert QuoteIndex(TRANSCRIPT).find("Speaker A Jane Doe Good evening everyone").status != EXACT
+
+
+def test_format_timestamp():
+    assert format_timestamp(3723) == "[01:02:03]"
+    assert format_timestamp(None) is None
+
+
+def test_verify_bullets_marks_unmatched_quotes_in_the_report():
+    bullets = [
+        {"headline_raw": "Doe on water", "body_raw": "Water rights belong to the farmers."},
+        {"headline_raw": "Doe on rail", "body_raw": "I will build a high speed railway between the two largest cities."},
+        {"headline_raw": "Highlight only"},
+    ]
+    verified = verify_bullets(TRANSCRIPT, bullets)
+
+    assert verified[0]["quote_status_raw"] == EXACT
+    assert verified[0]["timestamp_raw"] == "[01:02:30]"
+    assert verified[1]["quote_status_raw"] == UNMATCHED
+    assert "quote_status_raw" not in verified[2]
+    assert "body_raw" not in bullets[2] and "quote_status_raw" not in bullets[0]
+
+    assert quote_note(verified[0]) == " [01:02:30]"
+    assert "Quote not found" in quote_note(verified[1])
+    assert quote_note(verified[2]) == ""
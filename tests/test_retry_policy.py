@@ -0,0 +1,91 @@
+import httpx
+import openai
+import pytest
+
+import retry_policy
+from deadlines import DeadlineExceeded
+from retry_policy import CircuitOpenError, is_retryable, parse_duration, retry_after_seconds
+from transcriber import TranscriptionFailedError
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(status, headers=None, body=None):
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return openai.APIStatusError(f"HTTP {status}", response=response, body=body)
+
+
+@pytest.mark.parametrize("status", [408, 409, 429, 500, 502, 503, 504])
+def test_transient_statuses_are_retried(status):
+    assert is_retryable(_status_error(status))
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404, 422])
+def test_client_errors_are_not_retried(status):
+    assert not is_retryable(_status_error(status))
+
+
+def test_exhausted_quota_is_not_retried():
+    error = _status_error(429, body={"code": "insufficient_quota", "message": "You exceeded your current quota"})
+    assert error.code == "insufficient_quota"
+    assert not is_retryable(error)
+
+
+def test_transport_errors_and_timeouts_are_retried():
+    assert is_retryable(openai.APIConnectionError(request=REQUEST))
+    assert is_retryable(openai.APITimeoutError(request=REQUEST))
+    assert is_retryable(httpx.ReadTimeout("read timed out", request=REQUEST))
+    assert is_retryable(ConnectionResetError())
+    assert is_retryable(TimeoutError())
+
+
+def test_open_circuit_and_expired_deadline_are_not_retried():
+    assert not is_retryable(CircuitOpenError("openai looks degraded"))
+    assert not is_retryable(DeadlineExceeded("extraction deadline passed"))
+
+
+def test_other_errors_are_not_retried():
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_failed_transcripts_are_classified_by_message():
+    assert is_retryable(TranscriptionFailedError("Internal server error, please try again"))
+    assert not is_retryable(TranscriptionFailedError("File does not appear to contain audio"))
+    assert not is_retryable(TranscriptionFailedError("Audio duration is too short"))
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(_status_error(429, {"retry-after": "7"})) == 7
+    assert retry_after_seconds(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_status_error(429, {"x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "6m0s"})) == 360
+    assert retry_after_seconds(_status_error(503, {"x-ratelimit-reset-requests": "2s"})) is None
+    assert retry_after_seconds(_status_error(429)) is None
+
+
+@pytest.mark.parametrize("value, seconds", [("1s", 1), ("6m0s", 360), ("20ms", 0.02), ("1h2m", 3720), ("2.5", 2.5)])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+def test_parse_duration_rejects_garbage():
+    assert parse_duration(None) is None
+    assert parse_duration("soon") is None
+
+
+def test_call_with_retry_stops_on_permanent_errors(monkeypatch):
+    monkeypatch.setattr(retry_policy.Config, "RETRY_MIN_WAIT_SECONDS", 0)
+    monkeypatch.setattr(retry_policy.Config, "RATE_LIMIT_PACING", False)
+    calls = []
+
+    def flaky(error):
+        calls.append(error)
+        raise error
+
+    with pytest.raises(openai.APIStatusError):
+        retry_policy.call_with_retry("test-permanent", flaky, _status_error(400), max_attempts=3)
+    assert len(calls) == 1
+
+    calls.clear()
+    with pytest.raises(openai.APIStatusError):
+        retry_policy.call_with_retry("test-transient", flaky, _status_error(503), max_attempts=3)
+    assert len(calls) == 3
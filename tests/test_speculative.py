@@ -0,0 +1,132 @@
+import re
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import deadlines
+import speculative
+from speculative import SpeculativeExtraction
+from transcript_windows import split_transcript_windows
+
+BULLET = "format_text_bullet_prompt"
+TARGET = "Jane Doe"
+
+LINES = [
+    "[00:00:05] Speaker A (Jane): We will cut property taxes for every family.",
+    "[00:05:10] Speaker B (Host): What about the school budget?",
+    "[00:20:00] Speaker A (Jane): We need more agents at the southern border.",
+    "[00:31:00] Speaker A (Jane): Water rights belong to the farmers of this state.",
+]
+RENAMES = [("Speaker A (Jane)", "Jane Doe"), ("Speaker B (Host)", "Host")]
+
+
+def _wrap(transcript):
+    """What prepare_transcript_for_edit and Generate Report do to the transcript."""
+    transcript = re.sub(r'(\[\d+:\d+:\d+\] Speaker [A-Z])', r'</p><p>\1', transcript)
+    return '<p>' + transcript.strip() + '</p>'
+
+
+def _confirm(speculated, edit=None, renames=RENAMES):
+    """The transcript Generate Report produces from the Step 2 editor's text."""
+    edited = speculated.replace('<p>', '').replace('</p>', '\n\n')
+    if edit:
+        edited = edited.replace(*edit)
+    return speculative.rename_speakers(_wrap(edited), renames)
+
+
+def _bullet(body):
+    return {"headline_raw": "Jane pledges", "speaker_raw": "JANE", "body_raw": body, "source_raw": None, "date_raw": None}
+
+
+BULLETS = [
+    _bullet("We will cut property taxes for every family."),
+    _bullet("We need more agents at the southern border."),
+    _bullet("Water rights belong to the farmers of this state."),
+]
+
+
+def _speculation(result=None):
+    future = Future()
+    if result is not None:
+        future.set_result(result)
+    job = deadlines.Deadline(None, "speculative extraction")
+    return SpeculativeExtraction(_wrap("\n".join(LINES)), TARGET, [BULLET], future, job)
+
+
+def test_renamed_transcript_reuses_the_bullets_with_new_names():
+    speculation = _speculation({BULLET: BULLETS})
+    reused, states = speculation.resolve(_confirm(speculation.transcript), TARGET, [BULLET], RENAMES)
+
+    assert [b["body_raw"] for b in reused[BULLET]] == [b["body_raw"] for b in BULLETS]
+    assert {b["speaker_raw"] for b in reused[BULLET]} == {"JANE DOE"}
+    assert reused[BULLET][0]["headline_raw"] == "Jane Doe pledges"
+    assert states[BULLET].matches(BULLET, TARGET)
+
+
+def test_renames_leave_quotes_unchanged():
+    quote = "My name is Troy, and I grew up on Troy Street."
+    bullets = [{"headline_raw": "Troy talks roots", "speaker_raw": "TROY", "body_raw": quote}]
+
+    renamed = speculative.rename_in_bullets(bullets, [("Speaker A (Troy)", "Troy Nehls")])
+
+    assert renamed[0]["body_raw"] == quote
+    assert renamed[0]["speaker_raw"] == "TROY NEHLS"
+    assert renamed[0]["headline_raw"] == "Troy Nehls talks roots"
+    assert bullets[0]["speaker_raw"] == "TROY"
+
+
+def test_unchanged_transcript_is_reused_without_renames():
+    speculation = _speculation({BULLET: BULLETS})
+    reused, _ = speculation.resolve(_confirm(speculation.transcript, renames=[]), TARGET, [BULLET], [])
+    assert reused == {BULLET: BULLETS}
+
+
+def test_edited_transcript_seeds_the_unedited_windows():
+    speculation = _speculation({BULLET: BULLETS})
+    confirmed = _confirm(speculation.transcript, edit=("southern border", "northern border"))
+    reused, states = speculation.resolve(confirmed, TARGET, [BULLET], RENAMES)
+
+    assert reused is None
+    windows = split_transcript_windows(confirmed, 900, 30)
+    kept = states[BULLET].reusable(windows)
+    assert sorted(kept) == [0, 2]
+    assert kept[0][0]["body_raw"] == BULLETS[0]["body_raw"]
+    assert kept[2][0]["speaker_raw"] == "JANE DOE"
+
+
+def test_edit_during_a_running_speculation_cancels_it():
+    speculation = _speculation()
+    confirmed = _confirm(speculation.transcript, edit=("southern border", "northern border"))
+
+    assert speculation.resolve(confirmed, TARGET, [BULLET], RENAMES) == (None, {})
+    assert speculation.deadline.cancelled
+
+
+def test_other_target_cancels_the_speculation():
+    speculation = _speculation({BULLET: BULLETS})
+    assert speculation.resolve(_confirm(speculation.transcript), "Someone Else", [BULLET], RENAMES) == (None, {})
+    assert speculation.deadline.cancelled
+
+
+def test_cancel_stops_calls_nested_in_the_run(monkeypatch):
+    monkeypatch.setattr(speculative.Config, "SPECULATIVE_EXTRACTION", True)
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def fake_extract(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        with deadlines.deadline(600, "extraction") as stage:
+            seen.append(stage.cancelled)
+            stage.check()
+
+    monkeypatch.setattr(speculative, "extract_many_from_text", fake_extract)
+    speculation = speculative.start(_wrap("\n".join(LINES)), TARGET, {}, "key", [BULLET])
+    assert started.wait(5)
+    speculation.cancel()
+    release.set()
+
+    with pytest.raises(deadlines.DeadlineExceeded):
+        speculation.future.result(timeout=5)
+    assert seen == [True]
@@ -0,0 +1,103 @@
+import json
+
+from analyzer import BulletStreamParser, parse_bullet_response
+from structured_output import JsonBulletStreamParser, parse_json_response
+
+BULLET = "format_text_bullet_prompt"
+HIGHLIGHT = "format_text_highlight_prompt"
+
+
+def _block(headline, speaker="JANE DOE", body="We will cut taxes."):
+    return (
+        "*** BULLET START ***\n"
+        f"**Headline:** {headline}@@DELIM@@\n"
+        f"**Speaker:** {speaker}@@DELIM@@\n"
+        f"**Body:** {body}@@DELIM@@\n"
+        "**Source:** Town hall@@DELIM@@\n"
+        "**Date:** 2024-05-01\n"
+        "*** BULLET END ***\n"
+    )
+
+
+def _feed_in_pieces(parser, text, size):
+    bullets = []
+    for i in range(0, len(text), size):
+        bullets.extend(parser.feed(text[i:i + size]))
+    return bullets
+
+
+def test_bullets_split_across_chunks_match_the_full_parse():
+    reply = _block("Doe pledges tax cuts") + _block("Doe criticizes budget", body="This budget: a disgrace.")
+    for size in (1, 7, 50, len(reply)):
+        parser = BulletStreamParser(BULLET)
+        assert _feed_in_pieces(parser, reply, size) == parse_bullet_response(reply, BULLET)
+        assert parser.text == reply
+
+
+def test_bullet_is_returned_as_soon_as_its_block_ends():
+    parser = BulletStreamParser(BULLET)
+    first, second = _block("First"), _block("Second")
+    assert [b["headline_raw"] for b in parser.feed(first + second[:40])] == ["First"]
+    assert [b["headline_raw"] for b in parser.feed(second[40:])] == ["Second"]
+
+
+def test_cut_off_stream_keeps_completed_bullets():
+    reply = _block("Complete") + _block("Cut off")[:60]
+    parser = BulletStreamParser(BULLET)
+    bullets = _feed_in_pieces(parser, reply, 13)
+    assert [b["headline_raw"] for b in bullets] == ["Complete"]
+    assert bullets[0]["speaker_raw"] == "JANE DOE"
+    assert bullets[0]["body_raw"] == "We will cut taxes."
+
+
+def test_no_bullets_marker_is_detected():
+    parser = BulletStreamParser(BULLET)
+    assert parser.feed("@@NO BULLETS ") == []
+    assert parser.feed("FOUND@@") == []
+    assert parser.no_bullets
+
+
+def test_highlight_blocks_keep_only_the_headline():
+    parser = BulletStreamParser(HIGHLIGHT)
+    assert parser.feed("*** BULLET START ***\n**Headline:** Doe visits Ohio\n*** BULLET END ***") == [
+        {"headline_raw": "Doe visits Ohio"}
+    ]
+
+
+def test_block_without_headline_is_skipped():
+    parser = BulletStreamParser(BULLET)
+    bad = "*** BULLET START ***\n**Speaker:** JANE DOE@@DELIM@@\n**Body:** Hi.\n*** BULLET END ***\n"
+    assert parser.feed(bad + _block("Good")) == parse_bullet_response(_block("Good"), BULLET)
+
+
+def _json_reply(*bullets):
+    return json.dumps({"bullets": list(bullets)})
+
+
+def test_json_stream_matches_the_full_parse_for_any_chunking():
+    reply = _json_reply(
+        {"headline": "Doe: \"no new taxes\"", "speaker": "JANE DOE", "body": "Braces {like} these and \\ slashes.",
+         "source": None, "date": None},
+        {"headline": "Second", "speaker": "BOB ROE", "body": "Quote ] with a bracket.", "source": "x", "date": "y"},
+    )
+    for size in (1, 5, 64, len(reply)):
+        parser = JsonBulletStreamParser(BULLET)
+        assert _feed_in_pieces(parser, reply, size) == parse_json_response(reply, BULLET)
+        assert parser.finished and not parser.no_bullets
+
+
+def test_json_stream_keeps_bullets_closed_before_a_cut():
+    reply = _json_reply({"headline": "Kept", "body": "a"}, {"headline": "Lost", "body": "b"})
+    parser = JsonBulletStreamParser(HIGHLIGHT)
+    assert _feed_in_pieces(parser, reply[:reply.index("Lost")], 3) == [{"headline_raw": "Kept"}]
+    assert not parser.finished
+
+
+def test_json_stream_skips_invalid_bullets_and_flags_empty_arrays():
+    parser = JsonBulletStreamParser(HIGHLIGHT)
+    assert parser.feed(_json_reply({"headline": ""}, {"headline": 3}, {"headline": "Ok"})) == [{"headline_raw": "Ok"}]
+    assert parser.invalid == 2
+
+    empty = JsonBulletStreamParser(HIGHLIGHT)
+    assert empty.feed('{"bullets": []}') == []
+    assert empty.started and empty.no_bullets
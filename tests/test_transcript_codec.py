@@ -0,0 +1,80 @@
+import pytest
+
+import analyzer
+from transcript_codec import encode_for_prompt, encode_transcript
+
+TRANSCRIPT = (
+    "<p>[00:00:05] Speaker A (Jane Doe): Good evening.</p>"
+    "<p>[00:00:20] Speaker A (Jane Doe): Thank you for coming.</p>"
+    "<p>[00:01:10] Speaker B (Bob Roe): Plan A: we vote at [1:05] tomorrow, and A: is the only option.</p>"
+    "<p>[00:02:00] Speaker A (Jane Doe): I disagree with Bob.</p>"
+)
+
+
+def _bullet(body, speaker="JANE DOE", headline="Doe speaks"):
+    return {"headline_raw": headline, "speaker_raw": speaker, "body_raw": body, "source_raw": None, "date_raw": None}
+
+
+def test_encoding_has_a_legend_merged_turns_and_coarse_times():
+    encoded = encode_transcript(TRANSCRIPT)
+    lines = encoded.text.splitlines()
+
+    assert lines[0] == "SPEAKERS: A = Jane Doe; B = Bob Roe"
+    assert "[0:00] A: Good evening. Thank you for coming." in lines
+    assert "[0:01] B: Plan A: we vote at [1:05] tomorrow, and A: is the only option." in lines
+    assert "[0:02] A: I disagree with Bob." in lines
+    assert "<p>" not in encoded.text
+
+
+def test_quotes_containing_codes_and_times_round_trip_unchanged():
+    encoded = encode_transcript(TRANSCRIPT)
+    quote = "Plan A: we vote at [1:05] tomorrow, and A: is the only option."
+    headline = "Roe backs Plan A: vote at [1:05]"
+
+    decoded = encoded.decode_bullets([_bullet(quote, speaker="B", headline=headline)])[0]
+
+    assert decoded["body_raw"] == quote
+    assert decoded["headline_raw"] == headline
+    assert decoded["speaker_raw"] == "BOB ROE"
+
+
+def test_leading_turn_prefix_is_restored():
+    encoded = encode_transcript(TRANSCRIPT)
+
+    assert encoded.decode_text("[0:01] B: Plan A: we vote at [1:05] tomorrow.") == (
+        "[00:01:10] Speaker B (Bob Roe): Plan A: we vote at [1:05] tomorrow."
+    )
+    assert encoded.decode_text("A: I disagree with Bob.") == "Speaker A (Jane Doe): I disagree with Bob."
+    assert encoded.decode_text("I disagree, A: no.") == "I disagree, A: no."
+
+
+def test_speaker_names_pass_through():
+    encoded = encode_transcript(TRANSCRIPT)
+    assert encoded.decode_speaker("JANE DOE") == "JANE DOE"
+    assert encoded.decode_speaker("a") == "JANE DOE"
+
+
+def test_unlabelled_transcript_is_left_alone():
+    encoded = encode_transcript("Just some words.\nAnd more words.")
+    assert not encoded.applied
+    assert encoded.text == "Just some words.\nAnd more words."
+    assert encoded.decode_bullets([_bullet("A: words")]) == [_bullet("A: words")]
+
+
+def test_encode_for_prompt():
+    assert encode_for_prompt(TRANSCRIPT) == TRANSCRIPT
+    assert encode_for_prompt(TRANSCRIPT, "compact").startswith("SPEAKERS: ")
+    with pytest.raises(ValueError):
+        encode_for_prompt(TRANSCRIPT, "tiny")
+
+
+def test_bullets_are_only_decoded_for_the_compact_encoding(monkeypatch):
+    bullets = [_bullet("A: I disagree with Bob.", speaker="A")]
+
+    monkeypatch.setattr(analyzer.Config, "TRANSCRIPT_ENCODING", "full")
+    assert analyzer.decode_bullets(TRANSCRIPT, bullets) == bullets
+
+    monkeypatch.setattr(analyzer.Config, "TRANSCRIPT_ENCODING", "compact")
+    decoded = analyzer.decode_bullets(TRANSCRIPT, bullets)[0]
+    assert decoded["speaker_raw"] == "JANE DOE"
+    assert decoded["body_raw"] == "Speaker A (Jane Doe): I disagree with Bob."
@@ -0,0 +1,379 @@
+"""
+Module for pre-flight token budgeting of extraction requests.
+
+Counts the prompt tokens of an extraction before it is sent, estimates its
+cost and latency for each candidate strategy (single-shot, windowed or
+pre-filtered) and model tier, and picks the plan that meets the configured latency/cost targets.
+
+Handles:
+- Local token counting (tiktoken when installed, a character heuristic otherwise)
+- Per-model pricing, context limits and rough throughput figures
+- Choosing a strategy and model tier for a transcript
+"""
+import math
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from config import Config
+from prompts import format_prompt_messages
+from transcript_windows import split_transcript_windows
+from prefilter import prefilter_transcript
+from model_router import route_models
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # Fall back to the character heuristic
+
+logger = logging.getLogger(__name__)
+
+# Constants
+CHARS_PER_TOKEN = 4  # Heuristic used when tiktoken is unavailable
+MESSAGE_OVERHEAD_TOKENS = 4  # Role/separator tokens added per chat message
+MIN_CACHEABLE_PREFIX_TOKENS = 1024  # Shortest prefix the provider caches
+
+STRATEGY_SINGLE_SHOT = "single_shot"
+STRATEGY_WINDOWED = "windowed"
+STRATEGY_PREFILTERED = "prefiltered"  # Single-shot over the target-relevant parts only
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICING: Dict[str, tuple] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+# (context window, max output tokens)
+MODEL_LIMITS: Dict[str, tuple] = {
+    "gpt-4.1": (1047576, 32768),
+    "gpt-4.1-mini": (1047576, 32768),
+    "gpt-4.1-nano": (1047576, 32768),
+    "gpt-4o": (128000, 16384),
+    "gpt-4o-mini": (128000, 16384),
+}
+
+# Rough throughput: (seconds to first token, input tokens/s, output tokens/s).
+# Compare against the latencies in llm_metrics and adjust when they drift.
+MODEL_SPEED: Dict[str, tuple] = {
+    "gpt-4.1": (0.8, 20000, 60),
+    "gpt-4.1-mini": (0.5, 40000, 90),
+    "gpt-4.1-nano": (0.4, 80000, 150),
+    "gpt-4o": (0.7, 20000, 70),
+    "gpt-4o-mini": (0.5, 30000, 85),
+}
+
+# Expected output size per extracted bullet, by prompt type
+OUTPUT_TOKENS_PER_BULLET = {
+    "format_text_bullet_prompt": 160,
+    "format_text_highlight_prompt": 45,
+}
+TRANSCRIPT_TOKENS_PER_BULLET = 350  # Roughly one bullet per this much transcript
+
+_encodings: Dict[str, Any] = {}
+
+
+def _model_entry(table: Dict[str, tuple], model: str) -> tuple:
+    """Looks up a model, matching dated snapshots (e.g. 'gpt-4.1-mini-2025-04-14') by prefix."""
+    if model in table:
+        return table[model]
+    for name in sorted(table, key=len, reverse=True):
+        if model.startswith(name):
+            return table[name]
+    logger.debug(f"No budget figures for model '{model}', assuming gpt-4.1-mini")
+    return table["gpt-4.1-mini"]
+
+
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Counts the tokens in `text` for `model` (estimated when tiktoken is missing)."""
+    if not text:
+        return 0
+    encoding = _encoding(model or Config.ANALYSIS_MODEL)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+    """Counts the prompt tokens of a list of chat messages."""
+    return sum(count_tokens(m.get("content", ""), model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimates the USD cost of a call from its token counts."""
+    price_in, price_cached, price_out = _model_entry(MODEL_PRICING, model)
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (uncached * price_in + cached_tokens * price_cached + output_tokens * price_out) / 1_000_000
+
+
+def estimate_latency(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimates the wall-clock seconds of one (non-cached) call."""
+    first_token, input_rate, output_rate = _model_entry(MODEL_SPEED, model)
+    return first_token + input_tokens / input_rate + output_tokens / output_rate
+
+
+def estimate_output_tokens(transcript_tokens: int, prompt_type: str, max_bullets: int) -> int:
+    """Estimates the reply size from the transcript length and the bullet cap."""
+    bullets = min(max_bullets, max(1, round(transcript_tokens / TRANSCRIPT_TOKENS_PER_BULLET)))
+    return bullets * OUTPUT_TOKENS_PER_BULLET.get(prompt_type, 100)
+
+
+class ExtractionPlan:
+    """One candidate way of running an extraction, with its estimated cost and latency."""
+
+    def __init__(
+        self,
+        strategy: str,
+        model: str,
+        calls: int,
+        input_tokens: int,
+        cached_tokens: int,
+        output_tokens: int,
+        cost_usd: float,
+        latency_s: float,
+        fits: bool,
+        transcript_text: Optional[str] = None,
+    ):
+        self.strategy = strategy
+        self.model = model
+        self.calls = calls
+        self.input_tokens = input_tokens
+        self.cached_tokens = cached_tokens
+        self.output_tokens = output_tokens
+        self.cost_usd = cost_usd
+        self.latency_s = latency_s
+        self.fits = fits
+        self.transcript_text = transcript_text  # Reduced transcript to send instead of the original, if any
+
+    @property
+    def windowed(self) -> bool:
+        return self.strategy == STRATEGY_WINDOWED
+
+    def meets(self, max_latency_s: Optional[float] = None, max_cost_usd: Optional[float] = None) -> bool:
+        """True when the plan fits the model and stays within the given targets."""
+        if not self.fits:
+            return False
+        if max_latency_s and self.latency_s > max_latency_s:
+            return False
+        if max_cost_usd and self.cost_usd > max_cost_usd:
+            return False
+        return True
+
+    def describe(self) -> str:
+        """One-line summary for logs and the UI."""
+        calls = f"{self.calls} calls" if self.calls > 1 else "1 call"
+        return (
+            f"{self.strategy.replace('_', '-')} on {self.model} ({calls}): "
+            f"~{self.input_tokens:,} prompt tokens, ~{self.output_tokens:,} output tokens, "
+            f"~${self.cost_usd:.3f}, ~{self.latency_s:.0f}s"
+        )
+
+    def __repr__(self) -> str:
+        return f"ExtractionPlan({self.describe()})"
+
+
+def _single_shot_plan(
+    messages, transcript_tokens, model, prompt_type, max_bullets,
+    strategy=STRATEGY_SINGLE_SHOT, transcript_text=None,
+) -> ExtractionPlan:
+    input_tokens = count_message_tokens(messages, model)
+    output_tokens = estimate_output_tokens(transcript_tokens, prompt_type, max_bullets)
+    context, max_output = _model_entry(MODEL_LIMITS, model)
+    return ExtractionPlan(
+        strategy, model, 1, input_tokens, 0, output_tokens,
+        estimate_cost(model, input_tokens, output_tokens),
+        estimate_latency(model, input_tokens, output_tokens),
+        fits=input_tokens + output_tokens <= context and output_tokens <= max_output,
+        transcript_text=transcript_text,
+    )
+
+
+def _windowed_plan(window_messages, model, prompt_type, max_bullets) -> ExtractionPlan:
+    context, max_output = _model_entry(MODEL_LIMITS, model)
+    input_total = cached_total = output_total = 0
+    cost = 0.0
+    latencies = []
+    fits = True
+    for i, messages in enumerate(window_messages):
+        input_tokens = count_message_tokens(messages, model)
+        transcript_tokens = count_tokens(messages[-1]["content"], model)
+        output_tokens = estimate_output_tokens(transcript_tokens, prompt_type, max_bullets)
+        # After the first call, a long enough static system prompt is served from the prompt cache
+        cached = 0
+        if i > 0 and len(messages) > 1 and messages[0]["role"] == "system":
+            prefix = count_tokens(messages[0]["content"], model)
+            cached = prefix if prefix >= MIN_CACHEABLE_PREFIX_TOKENS else 0
+        input_total += input_tokens
+        cached_total += cached
+        output_total += output_tokens
+        cost += estimate_cost(model, input_tokens, output_tokens, cached)
+        latencies.append(estimate_latency(model, input_tokens, output_tokens))
+        fits = fits and input_tokens + output_tokens <= context and output_tokens <= max_output
+
+    # Windows run EXTRACTION_MAX_WORKERS at a time
+    workers = max(Config.EXTRACTION_MAX_WORKERS, 1)
+    latencies.sort(reverse=True)
+    latency = sum(latencies[::workers])
+    return ExtractionPlan(
+        STRATEGY_WINDOWED, model, len(window_messages), input_total, cached_total, output_total,
+        cost, latency, fits,
+    )
+
+
+def candidate_plans(
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int = 100,
+    models: Optional[List[str]] = None,
+    prefilter: Optional[bool] = None,
+) -> List[ExtractionPlan]:
+    """
+    Estimates every strategy/model combination for a transcript.
+
+    Args:
+        transcript_text: The transcript to extract from.
+        target_name: The person or entity to focus on, or a list of targets
+            for multi-target extraction (never pre-filtered).
+        metadata: Video metadata, used to build the real prompt.
+        prompt_type: format_text_bullet_prompt OR format_text_highlight_prompt
+        max_bullets: The bullet cap passed to the extraction.
+        models: Model tiers to consider, best first. Defaults to the tiers
+            routed for the prompt type and transcript length (see
+            model_router.route_models).
+        prefilter: Overrides Config.PREFILTER_MODE: True acts as "always",
+            False as "never".
+
+    Returns:
+        Plans in preference order: per model (best first), single-shot before
+        windowed unless the transcript is long enough to window by default.
+        The pre-filtered plan (see prefilter) leads when Config.PREFILTER_MODE
+        is "always", or is "auto" and the filter saves at least
+        Config.PREFILTER_MIN_SAVING of the transcript; otherwise it comes last.
+    """
+    models = list(dict.fromkeys(models or route_models(prompt_type, count_tokens(transcript_text))))
+    layout = Config.PROMPT_LAYOUT
+    output_format = Config.EXTRACTION_OUTPUT_FORMAT
+    encoding = Config.TRANSCRIPT_ENCODING
+    messages = format_prompt_messages(
+        prompt_type, transcript_text, target_name, metadata, max_bullets,
+        layout=layout, output_format=output_format, encoding=encoding
+    )
+    windows = split_transcript_windows(
+        transcript_text,
+        window_seconds=Config.EXTRACTION_WINDOW_SECONDS,
+        overlap_seconds=Config.EXTRACTION_WINDOW_OVERLAP_SECONDS,
+    )
+    window_messages = [
+        format_prompt_messages(
+            prompt_type, w.text, target_name, metadata, max_bullets,
+            layout=layout, output_format=output_format, encoding=encoding
+        )
+        for w in windows
+    ]
+    prefer_windowed = len(transcript_text) > Config.WINDOWED_EXTRACTION_MIN_CHARS
+
+    mode = Config.PREFILTER_MODE if prefilter is None else ("always" if prefilter else "never")
+    if not isinstance(target_name, str):
+        mode = "never"
+    reduced = None
+    if mode != "never":
+        result = prefilter_transcript(
+            transcript_text, target_name, context_utterances=Config.PREFILTER_CONTEXT_UTTERANCES
+        )
+        if result.applied:
+            reduced = result.text
+            reduced_messages = format_prompt_messages(
+                prompt_type, reduced, target_name, metadata, max_bullets,
+                layout=layout, output_format=output_format, encoding=encoding
+            )
+            prefer_prefiltered = (
+                mode == "always" or result.ratio <= 1 - Config.PREFILTER_MIN_SAVING
+            )
+
+    plans = []
+    for model in models:
+        transcript_tokens = count_tokens(transcript_text, model)
+        model_plans = [_single_shot_plan(messages, transcript_tokens, model, prompt_type, max_bullets)]
+        if len(window_messages) > 1:
+            windowed = _windowed_plan(window_messages, model, prompt_type, max_bullets)
+            if prefer_windowed:
+                model_plans.insert(0, windowed)
+            else:
+                model_plans.append(windowed)
+        if reduced is not None:
+            prefiltered = _single_shot_plan(
+                reduced_messages, count_tokens(reduced, model), model, prompt_type, max_bullets,
+                strategy=STRATEGY_PREFILTERED, transcript_text=reduced,
+            )
+            if prefer_prefiltered:
+                model_plans.insert(0, prefiltered)
+            else:
+                model_plans.append(prefiltered)
+        plans.extend(model_plans)
+    return plans
+
+
+def plan_extraction(
+    transcript_text: str,
+    target_name: Union[str, List[str]],
+    metadata: Dict[str, Any],
+    prompt_type: str,
+    max_bullets: int = 100,
+    max_latency_s: Optional[float] = None,
+    max_cost_usd: Optional[float] = None,
+    models: Optional[List[str]] = None,
+    prefilter: Optional[bool] = None,
+) -> ExtractionPlan:
+    """
+    Picks the strategy and model tier for an extraction.
+
+    The first plan (in the preference order of `candidate_plans`) that fits
+    the model's limits and meets both targets wins, so the best model and the
+    default strategy are kept whenever they are fast and cheap enough. When
+    nothing meets the targets, the fastest plan (or the cheapest, if only a
+    cost target is set) that fits is used.
+
+    Args:
+        max_latency_s: Latency target in seconds. Defaults to
+            Config.EXTRACTION_TARGET_LATENCY_SECONDS (0 means no target).
+        max_cost_usd: Cost target in USD. Defaults to
+            Config.EXTRACTION_TARGET_COST_USD (0 means no target).
+        Other arguments as for `candidate_plans`.
+
+    Returns:
+        The chosen ExtractionPlan.
+    """
+    if max_latency_s is None:
+        max_latency_s = Config.EXTRACTION_TARGET_LATENCY_SECONDS
+    if max_cost_usd is None:
+        max_cost_usd = Config.EXTRACTION_TARGET_COST_USD
+
+    plans = candidate_plans(transcript_text, target_name, metadata, prompt_type, max_bullets, models, prefilter)
+    for plan in plans:
+        if plan.meets(max_latency_s, max_cost_usd):
+            chosen = plan
+            break
+    else:
+        fitting = [p for p in plans if p.fits] or plans
+        if max_latency_s or not max_cost_usd:
+            chosen = min(fitting, key=lambda p: p.latency_s)
+        else:
+            chosen = min(fitting, key=lambda p: p.cost_usd)
+        logger.warning(f"No extraction plan meets the targets; using the closest: {chosen.describe()}")
+
+    logger.info(f"Extraction plan for {prompt_type}: {chosen.describe()}")
+    return chosen
@@ -1,24 +1,70 @@
 import os
-import math
 import subprocess
 import logging
-import openai
 import time
 import sys
 from pathlib import Path
-import tempfile
 import assemblyai as aai
 import logging
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from config import Config
+from openai_clients import get_openai_client
+from audio_prep import OffsetMap, trim_non_speech, speed_up_audio, temp_audio_path
 import re
+import hashlib
+from retry_policy import call_with_retry
 
 logger = logging.getLogger(__name__)
 
 # Constants
-CHUNK_SIZE_LIMIT = 24 * 1024 * 1024  # 24 MB
-DEFAULT_OVERLAP_SECONDS = 2
+CHUNK_MAX_ATTEMPTS = 4  # Attempts per chunk before it is marked failed
+STREAM_FIRST_CHUNK_SECONDS = 60  # Short first chunk so the first lines show up quickly
+STREAM_CHUNK_SECONDS = 300  # Chunk length for the rest of a streamed transcription
+STREAM_MAX_WORKERS = 4  # Chunks transcribed concurrently while streaming
+
+_LABELLED_NAME_RE = re.compile(r"^\[[\d:]+\]\s+Speaker\s+\S+?\s+\(([^)]+)\):", re.M)
+# AssemblyAI errors about the audio itself; anything else is worth another attempt
+_PERMANENT_TRANSCRIPTION_ERRORS = ("does not appear to contain audio", "too short", "invalid", "unsupported", "not supported")
+
+class ChunkTranscriptionError(RuntimeError):
+    """Raised when chunks of a chunked transcription still fail after their retries."""
+
+    def __init__(self, failed_chunks: List[int], num_chunks: int):
+        self.failed_chunks = failed_chunks  # Zero-based indices of the failed chunks
+        self.num_chunks = num_chunks
+        numbers = ", ".join(str(i + 1) for i in failed_chunks)
+        super().__init__(
+            f"{len(failed_chunks)} of {num_chunks} audio chunks could not be transcribed (chunk {numbers}); "
+            "run the transcription again to retry only those chunks"
+        )
+
+
+class TranscriptionFailedError(RuntimeError):
+    """Raised when AssemblyAI finishes a transcript with status "error"."""
+
+    def __init__(self, message: str):
+        # The SDK reports a failed job as a finished transcript, not an exception,
+        # so retry_policy relies on this flag to tell transient failures apart
+        self.retryable = not any(p in (message or "").lower() for p in _PERMANENT_TRANSCRIPTION_ERRORS)
+        super().__init__(f"AssemblyAI transcription failed: {message}")
+
+
+def _transcribe(audio_file: str, config):
+    """Transcribes one file, raising TranscriptionFailedError when AssemblyAI reports an error."""
+    transcript = aai.Transcriber().transcribe(audio_file, config)
+    if transcript.status == aai.TranscriptStatus.error:
+        raise TranscriptionFailedError(transcript.error)
+    return transcript
+
+
+def _use_assemblyai_base_url():
+    """Points the AssemblyAI SDK at Config.ASSEMBLYAI_BASE_URL (e.g. mock_server.py), if set."""
+    if Config.ASSEMBLYAI_BASE_URL:
+        aai.settings.base_url = Config.ASSEMBLYAI_BASE_URL.rstrip("/")
+
 
 def format_timestamp(ms):
     total_seconds = ms / 1000
@@ -28,64 +74,216 @@ def format_timestamp(ms):
     return f"{hours:02}:{minutes:02}:{seconds:02}"
 
 
-def transcribe_file(audio_file_path, openai_key, assemblyai_key, speaker):
-    aai.settings.api_key=assemblyai_key # replace with your actual key
-
-    audio_file = audio_file_path
+def iter_transcript_lines(
+    utterances,
+    display_name: Optional[str] = None,
+    offset_ms: int = 0,
+    time_map=None,
+) -> Iterator[str]:
+    """
+    Yields formatted transcript lines for a sequence of AssemblyAI utterances.
 
-    config = aai.TranscriptionConfig(
-        speaker_labels=True,
-    )
+    Lines are produced one at a time straight from the utterances, so callers
+    can write them out without holding the whole transcript in memory.
+    Utterances longer than 30 seconds are broken into 30-second pieces so the
+    timestamps stay useful for reviewers.
 
-    transcript = aai.Transcriber().transcribe(audio_file, config)
+    Args:
+        utterances: Iterable of AssemblyAI utterances (start/end in ms, speaker, text).
+        display_name: If given, inserted after every speaker tag, producing
+                      '[HH:MM:SS] Speaker A (Name): ...'.
+        offset_ms: Added to every timestamp, which lets chunked transcription
+                   report original media time.
+        time_map: Optional callable converting a transcribed time in ms to
+                  original media time (see audio_prep.OffsetMap), applied
+                  after the offset.
+    """
+    label_suffix = f" ({display_name})" if display_name else ""
 
-    lines = []
+    def _stamp(ms):
+        ms += offset_ms
+        return format_timestamp(time_map(ms) if time_map else ms)
 
-    for utterance in transcript.utterances:
+    for utterance in utterances or []:
         duration = utterance.end - utterance.start
-        
+
         # If utterance is 30 seconds or less, keep as is
         if duration <= 30000:  # 30 seconds in milliseconds
-            timestamp = format_timestamp(utterance.start)
-            lines.append(f"[{timestamp}] Speaker {utterance.speaker}: {utterance.text}")
+            timestamp = _stamp(utterance.start)
+            yield f"[{timestamp}] Speaker {utterance.speaker}{label_suffix}: {utterance.text}"
         else:
             # Break up long utterances into 30-second chunks
             text = utterance.text
             words = text.split()
             total_words = len(words)
-            
+
             # Calculate words per millisecond
             words_per_ms = total_words / duration
-            
+
             # Calculate how many words fit in 30 seconds
-            words_per_30_sec = int(words_per_ms * 30000)
-            
+            words_per_30_sec = max(int(words_per_ms * 30000), 1)
+
             # Split text into chunks
             chunk_start_time = utterance.start
-            
+
             for i in range(0, total_words, words_per_30_sec):
                 chunk_words = words[i:i + words_per_30_sec]
                 chunk_text = " ".join(chunk_words)
-                
-                timestamp = format_timestamp(chunk_start_time)
-                lines.append(f"[{timestamp}] Speaker {utterance.speaker}: {chunk_text}")
-                
+
+                timestamp = _stamp(chunk_start_time)
+                yield f"[{timestamp}] Speaker {utterance.speaker}{label_suffix}: {chunk_text}"
+
                 # Update start time for next chunk
                 chunk_start_time += 30000  # Add 30 seconds
-    
-    lines1 = "\n".join(lines)
 
-    
-    # --- Single-speaker fast path: preserve timestamps exactly, skip GPT ---
+
+def write_transcript(lines: Iterator[str], out) -> int:
+    """
+    Writes transcript lines to a text file, file-like object or socket as they are produced.
+
+    Args:
+        lines: Iterable of transcript lines, e.g. from `iter_transcript_lines`.
+        out: Anything with a text `write` method (open file, io.StringIO,
+             socket.makefile('w')), or a socket, which is sent UTF-8 bytes.
+
+    Returns:
+        The number of lines written.
+    """
+    write = getattr(out, "write", None)
+    if write is None and hasattr(out, "sendall"):
+        write = lambda text: out.sendall(text.encode("utf-8"))
+    if write is None:
+        raise TypeError(f"Cannot write a transcript to {type(out).__name__}")
+
+    count = 0
+    for line in lines:
+        write(("\n" if count else "") + line)
+        count += 1
+    return count
+
+
+def _prepare_audio(audio_file_path, trim_silence: bool = False, tempo: float = 1.0):
+    """
+    Applies the optional silence trimming and speed-up before upload.
+
+    Returns:
+        (path to transcribe, OffsetMap back to original media time or None,
+        temporary files the caller must delete).
+    """
+    audio_file = audio_file_path
+    offset_map = None
+    temp_files = []
+
+    # Optionally cut dead air before upload; offset_map maps timestamps back to the original media
+    if trim_silence:
+        audio_file, offset_map = trim_non_speech(
+            audio_file_path,
+            _get_audio_duration(audio_file_path),
+            noise_db=Config.VAD_NOISE_DB,
+            min_silence_seconds=Config.VAD_MIN_SILENCE_SECONDS,
+        )
+        if offset_map is not None:
+            temp_files.append(Path(audio_file))
+
+    # Optionally time-compress speech; timestamps are scaled back by the same factor
+    if tempo and tempo != 1.0:
+        try:
+            audio_file = speed_up_audio(audio_file, tempo)
+        except Exception:
+            _cleanup_temp_files(temp_files)
+            raise
+        temp_files.append(Path(audio_file))
+        offset_map = (offset_map or OffsetMap()).with_tempo(tempo)
+
+    return audio_file, offset_map, temp_files
+
+
+def transcribe_file(
+    audio_file_path,
+    openai_key,
+    assemblyai_key,
+    speaker,
+    trim_silence: bool = False,
+    tempo: float = 1.0,
+    out=None,
+):
+    """
+    Transcribes an audio file with AssemblyAI and labels each speaker with a name.
+
+    Args:
+        audio_file_path: Path to the audio file.
+        openai_key: OpenAI API key used to guess speaker names.
+        assemblyai_key: AssemblyAI API key.
+        speaker: Target name; used as the display name for single-speaker audio
+                 and as a spelling hint otherwise.
+        trim_silence: Cut dead air before upload (see audio_prep.trim_non_speech).
+        tempo: Playback speed applied before upload (see audio_prep.speed_up_audio).
+        out: Optional file, file-like object or socket. When given, the
+             transcript is written there line by line and None is returned.
+
+    Returns:
+        The labelled transcript text, or None when written to `out`.
+    """
+    aai.settings.api_key=assemblyai_key # replace with your actual key
+    _use_assemblyai_base_url()
+
+    audio_file, offset_map, temp_files = _prepare_audio(audio_file_path, trim_silence, tempo)
+
+    config = aai.TranscriptionConfig(
+        speaker_labels=True,
+    )
+
+    try:
+        transcript = call_with_retry(
+            "assemblyai", _transcribe, audio_file, config, label="AssemblyAI transcription"
+        )
+    finally:
+        _cleanup_temp_files(temp_files)
+
+    time_map = offset_map.to_original_ms if offset_map else None
+
     try:
         spk_ids = {u.speaker for u in transcript.utterances or []}
     except Exception:
         spk_ids = set()
 
-    if len(spk_ids) == 1 and lines1.strip():
+    # --- Single-speaker fast path: name is inserted as each line is emitted, skip GPT ---
+    if len(spk_ids) == 1:
+        display_name = (speaker or "Unknown").strip()
+        lines = iter_transcript_lines(transcript.utterances, display_name, time_map=time_map)
+        if out is not None:
+            write_transcript(lines, out)
+            return None
+        return "\n".join(lines)
+
+    lines1 = "\n".join(iter_transcript_lines(transcript.utterances, time_map=time_map))
+    labeled = label_speakers(lines1, spk_ids, openai_key, speaker)
+    if out is not None:
+        write_transcript(iter(labeled.splitlines()), out)
+        return None
+    return labeled
+
+
+def label_speakers(lines1: str, spk_ids, openai_key, speaker, known_names: Optional[List[str]] = None) -> str:
+    """
+    Appends a display name after every 'Speaker X' token of a raw transcript.
+
+    Single-speaker transcripts get the target name directly; anything else is
+    sent to GPT, which guesses a name per speaker without touching the text.
+    When `spk_ids` is None the speaker tokens are read from the lines themselves.
+
+    `known_names` marks the lines as one chunk of a longer recording: the
+    names already given to speakers in earlier chunks are suggested to GPT so
+    the same people keep the same names, and a chunk with a single speaker is
+    labelled by GPT too, since that speaker need not be the target.
+    """
+    if spk_ids is None:
+        spk_ids = set(re.findall(r"^\[[\d:]+\]\s+Speaker\s+(\S+?):", lines1, re.M))
+
+    # --- Single-speaker fast path: preserve timestamps exactly, skip GPT ---
+    if len(spk_ids) == 1 and lines1.strip() and known_names is None:
         display_name = (speaker or "Unknown").strip()
         # Append a guessed display name right after the 'Speaker X' token, keep everything else identical
-        import re
         fast_pat = re.compile(r"^(\[\d{1,2}:\d{2}:\d{2}\]\s+Speaker\s+\S+)(:)", re.M)
         out_lines = []
         for line in lines1.splitlines():
@@ -96,9 +294,8 @@ def transcribe_file(audio_file_path, openai_key, assemblyai_key, speaker):
                 out_lines.append(line)
         return "\n".join(out_lines)
     
-    # Set your OpenAI API key
-    client = openai.OpenAI(
-        api_key=openai_key)
+    # Shared, pooled client for this API key
+    client = get_openai_client(openai_key)
 
     # Input your transcript
     transcript = lines1
@@ -123,23 +320,190 @@ def transcribe_file(audio_file_path, openai_key, assemblyai_key, speaker):
     - Be consistent for the same Speaker across the whole file.
     - Consider the spelling of {speaker}.
     """.strip()
+    if known_names:
+        system_prompt += (
+            "\n    - This is one part of a longer recording. Speakers named in earlier parts: "
+            + "; ".join(known_names)
+            + ". Reuse exactly these names for the same people (the 'Speaker X' letters may differ between parts)."
+        )
 
-    response = client.chat.completions.create(
+    response = call_with_retry(
+        "openai",
+        client.chat.completions.create,
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": transcript}
         ],
-        temperature=0.2
+        temperature=0.2,
+        label="speaker labelling",
     )
 
-    print("RETURNING")
-    print("LABELED TRANSCRIPT BY CHAT", response.choices[0].message.content)
+    logger.debug(f"Speaker labelling returned {len(response.choices[0].message.content or '')} characters")
     # return the labeled transcript
     return(response.choices[0].message.content)
 
 
 
+def iter_transcribe_file(
+    audio_file_path,
+    assemblyai_key,
+    openai_key=None,
+    speaker=None,
+    trim_silence: bool = False,
+    tempo: float = 1.0,
+    first_chunk_seconds: float = STREAM_FIRST_CHUNK_SECONDS,
+    chunk_seconds: float = STREAM_CHUNK_SECONDS,
+    max_workers: int = STREAM_MAX_WORKERS,
+) -> Iterator[List[str]]:
+    """
+    Transcribes an audio file in time-ordered chunks, yielding lines as each finishes.
+
+    The audio is cut into a short first chunk followed by longer ones, and the
+    chunks are transcribed concurrently with AssemblyAI. Each chunk's lines are
+    yielded in order as soon as that chunk (and every chunk before it) is done,
+    so callers can render the start of the transcript while the rest is still
+    processing. Timestamps are shifted to original media time.
+
+    Speaker letters are assigned by AssemblyAI per chunk, so 'Speaker A' in one
+    chunk is not guaranteed to be the same person in the next. Each chunk is
+    therefore name-labelled on its own (see `label_speakers`), with the names
+    found in earlier chunks as hints, so every line carries a full
+    'Speaker X (Name)' label that stays correct within its chunk.
+
+    Args:
+        audio_file_path: Path to the audio file to transcribe.
+        assemblyai_key: AssemblyAI API key.
+        openai_key: OpenAI API key used to name the speakers of each chunk.
+            Without it, lines are yielded unlabelled.
+        speaker: Target name, passed to `label_speakers` as a spelling hint.
+        trim_silence: Cut dead air before chunking (see audio_prep.trim_non_speech).
+        tempo: Playback speed applied before chunking (see audio_prep.speed_up_audio).
+        first_chunk_seconds: Length of the first chunk in seconds.
+        chunk_seconds: Length of every following chunk in seconds.
+        max_workers: Number of chunks transcribed concurrently.
+
+    Yields:
+        A list of formatted transcript lines for each chunk, in chronological order.
+    """
+    aai.settings.api_key = assemblyai_key
+    _use_assemblyai_base_url()
+    config = aai.TranscriptionConfig(
+        speaker_labels=True,
+    )
+
+    # Trimming and speed-up apply to the whole file; chunk times are then mapped back to the original
+    manifest_path = _manifest_path(
+        audio_file_path, f"stream|{first_chunk_seconds}|{chunk_seconds}|{bool(trim_silence)}|{tempo or 1.0}"
+    )
+    prepared_path, offset_map, temp_files = _prepare_audio(audio_file_path, trim_silence, tempo)
+    time_map = offset_map.to_original_ms if offset_map else None
+    try:
+        yield from _iter_prepared_chunks(
+            prepared_path, config, time_map, openai_key, speaker, first_chunk_seconds, chunk_seconds, max_workers,
+            manifest_path
+        )
+    finally:
+        _cleanup_temp_files(temp_files)
+
+
+def _iter_prepared_chunks(
+    audio_file_path,
+    config,
+    time_map,
+    openai_key,
+    speaker,
+    first_chunk_seconds: float,
+    chunk_seconds: float,
+    max_workers: int,
+    manifest_path: Path,
+) -> Iterator[List[str]]:
+    """
+    Chunks, transcribes and labels an already prepared audio file for `iter_transcribe_file`.
+
+    Progress is checkpointed to a per-job manifest (see `_manifest_path`) that
+    records each chunk's state and transcribed lines, so a rerun only uploads
+    the chunks that are not done yet. The manifest is removed once every
+    chunk has succeeded.
+    """
+    total_duration = _get_audio_duration(audio_file_path)
+    bounds = []
+    start_time = 0.0
+    length = first_chunk_seconds
+    while start_time < total_duration:
+        end_time = min(total_duration, start_time + length)
+        bounds.append((start_time, end_time))
+        start_time = end_time
+        length = chunk_seconds
+
+    manifest = _load_manifest(manifest_path, len(bounds))
+    chunks = manifest["chunks"]
+    manifest_lock = threading.Lock()
+    logger.info(f"Streaming transcription of {len(bounds)} chunks")
+
+    def _transcribe_chunk(index: int, start: float, end: float) -> List[str]:
+        entry = chunks[str(index)]
+        chunk_path = _create_chunk_file(audio_file_path, start, end, index)
+        try:
+            transcript = call_with_retry(
+                "assemblyai", _transcribe, str(chunk_path), config,
+                max_attempts=CHUNK_MAX_ATTEMPTS, label=f"AssemblyAI chunk {index+1}"
+            )
+            lines = list(iter_transcript_lines(transcript.utterances, offset_ms=int(start * 1000), time_map=time_map))
+            entry.update(state="done", lines=lines, error=None)
+            return lines
+        except Exception as e:
+            entry.update(state="failed", error=str(e))
+            raise
+        finally:
+            _cleanup_temp_files([chunk_path])
+            with manifest_lock:
+                _save_manifest(manifest_path, manifest)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for i, (start, end) in enumerate(bounds):
+            entry = chunks.setdefault(str(i), {"state": "pending"})
+            if entry["state"] != "done":
+                futures[i] = executor.submit(_transcribe_chunk, i, start, end)
+
+        known_names: List[str] = []
+        failed = []
+        try:
+            for i in range(len(bounds)):
+                if i in futures:
+                    try:
+                        lines = futures[i].result()
+                    except Exception as e:
+                        logger.error(f"Failed to transcribe chunk {i+1}: {str(e)}")
+                        failed.append(i)
+                        break
+                else:
+                    lines = chunks[str(i)]["lines"]
+                logger.debug(f"Streamed chunk {i+1}/{len(bounds)} with {len(lines)} lines")
+                if openai_key and lines:
+                    labeled = label_speakers("\n".join(lines), None, openai_key, speaker, known_names=list(known_names))
+                    lines = labeled.splitlines()
+                    for name in _LABELLED_NAME_RE.findall(labeled):
+                        if name != "Unknown" and name not in known_names:
+                            known_names.append(name)
+                yield lines
+        except GeneratorExit:
+            # The consumer went away early: stop queued chunks; finished ones stay in the manifest
+            for future in futures.values():
+                future.cancel()
+            raise
+
+        if failed:
+            # Let the chunks already running finish, so a rerun can reuse them
+            wait(futures.values())
+            failed = [i for i, future in futures.items() if future.exception() is not None]
+            logger.warning(f"Chunks {', '.join(str(i + 1) for i in failed)} failed; progress saved in {manifest_path}")
+            raise ChunkTranscriptionError(failed, len(bounds))
+
+    _cleanup_temp_files([manifest_path])
+
+
 def _clean_hint_name(hint: str | None) -> str | None:
     """Pick a simple display name from speaker_hint like 'Donald Trump; Charles Payne'."""
     if not hint:
@@ -152,87 +516,76 @@ def _clean_hint_name(hint: str | None) -> str | None:
     return None
 
 
-def _transcribe_large_file(audio_path: str, model: str, overlap_seconds: int, file_size: int) -> str:
-    """Handle transcription of large audio files by splitting into chunks."""
+def _manifest_path(audio_path: str, plan: str) -> Path:
+    """
+    Return the on-disk manifest location for one chunked transcription job.
+
+    Jobs are keyed by the audio's content rather than its path, since the app
+    saves every upload or download under a new timestamped name.
+    """
+    digest = hashlib.sha1()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    job_id = hashlib.sha1(f"{digest.hexdigest()}|{plan}".encode("utf-8")).hexdigest()[:16]
+    return Path(Config.CHUNK_MANIFEST_DIR) / f"{Path(audio_path).stem}_{job_id}.json"
+
+def _load_manifest(manifest_path: Path, num_chunks: int) -> Dict[str, Any]:
+    """Load a chunk manifest, starting fresh if it is missing, unreadable or for a different chunk plan."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("num_chunks") == num_chunks:
+            done = sum(1 for c in manifest["chunks"].values() if c.get("state") == "done")
+            logger.info(f"Resuming from manifest {manifest_path}: {done}/{num_chunks} chunks already done")
+            return manifest
+        logger.warning(f"Chunk plan changed since {manifest_path} was written; starting over")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable chunk manifest {manifest_path}: {str(e)}")
+    return {"num_chunks": num_chunks, "chunks": {}}
+
+def _save_manifest(manifest_path: Path, manifest: Dict[str, Any]) -> None:
+    """Write the manifest atomically so a crash never leaves a half-written file."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def _get_audio_duration(audio_path: str) -> float:
+    """Return the duration of an audio file in seconds using ffprobe."""
     try:
         # Get total duration using ffprobe
         duration_cmd = [
             'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1', audio_path
+            '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
         ]
         total_duration = float(subprocess.check_output(duration_cmd).decode().strip())
         logger.info(f"Total audio duration: {total_duration} seconds")
+        return total_duration
     except Exception as e:
         logger.error(f"Failed to get audio duration: {str(e)}")
         raise RuntimeError(f"Failed to get audio duration: {str(e)}")
-    
-    # Calculate chunk parameters
-    avg_bitrate = (file_size * 8) / total_duration
-    max_chunk_duration = (CHUNK_SIZE_LIMIT * 8) / avg_bitrate * 0.95
-    effective_chunk_duration = max(max_chunk_duration - overlap_seconds, 0.1)
-    num_chunks = math.ceil(total_duration / effective_chunk_duration)
-    
-    logger.info(f"Processing {num_chunks} chunks with {overlap_seconds}s overlap")
-    logger.debug(f"Max chunk duration: {max_chunk_duration}s, effective: {effective_chunk_duration}s")
-    
-    transcripts = []
-    temp_files_to_delete = []
-    
-    try:
-        for i in range(num_chunks):
-            start_time = i * effective_chunk_duration
-            if start_time >= total_duration:
-                break
-                
-            end_time = min(total_duration, start_time + max_chunk_duration)
-            chunk_path = _create_chunk_file(audio_path, start_time, end_time, i)
-            temp_files_to_delete.append(chunk_path)
-            
-            # Verify chunk size
-            chunk_size = os.path.getsize(chunk_path)
-            logger.debug(f"Chunk {i+1}: {start_time:.2f}-{end_time:.2f}s, size: {chunk_size} bytes")
-            if chunk_size > CHUNK_SIZE_LIMIT:
-                logger.warning(f"Chunk {i+1} exceeds size limit: {chunk_size} bytes")
-            
-            # Transcribe chunk
-            try:
-                logger.info(f"Transcribing chunk {i+1}/{num_chunks}")
-                with open(chunk_path, "rb") as chunk_file:
-                    response = openai.audio.transcriptions.create(
-                        model=model,
-                        file=chunk_file
-                    )
-                transcripts.append(response.text)
-                logger.debug(f"Chunk {i+1} transcription successful, length: {len(response.text)}")
-            except Exception as e:
-                logger.error(f"Failed to transcribe chunk {i+1}: {str(e)}")
-                continue
-                
-    finally:
-        _cleanup_temp_files(temp_files_to_delete)
-    
-    if not transcripts:
-        raise RuntimeError("Transcription failed: no chunks could be transcribed successfully")
-    
-    logger.info(f"Transcription completed with {len(transcripts)}/{num_chunks} successful chunks")
-    return " ".join(transcripts)
 
 def _create_chunk_file(audio_path: str, start_time: float, end_time: float, index: int) -> Path:
     """Create a temporary chunk file using ffmpeg."""
     audio_path = Path(audio_path)
-    chunk_path = Path(tempfile.gettempdir()) / f"{audio_path.stem}_part{index+1}{audio_path.suffix}"
+    chunk_path = temp_audio_path(audio_path, f"part{index+1}")
     
     try:
         subprocess.run([
             'ffmpeg', '-y',
             '-ss', str(start_time),
             '-i', str(audio_path),
-            '-to', str(end_time),
+            '-t', str(end_time - start_time),
             '-c', 'copy',
             str(chunk_path)
         ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to create chunk {index+1}: {str(e)}")
+        _cleanup_temp_files([chunk_path])
         raise RuntimeError(f"Failed to create audio chunk: {str(e)}")
     
     return chunk_path
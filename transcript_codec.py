@@ -0,0 +1,254 @@
+"""
+Compact transcript encoding for extraction prompts.
+
+Every line of a labelled transcript repeats a full
+`[HH:MM:SS] Speaker A (Full Name):` prefix (plus the <p> markup added for
+the editor), which is a sizeable share of the prompt tokens. The compact
+encoding sends the same words with less around them:
+- a one-line speaker legend ("A = Jane Doe; B = Bob Roe") and short codes;
+- consecutive utterances of the same speaker merged into one turn;
+- a coarse [H:MM] time only when a turn starts in a new minute.
+
+The spoken text itself is unchanged, so quotes still verify against the
+original transcript (see quote_index), which also gives their exact time.
+The decoder maps a bare speaker code in a bullet's speaker field, and a
+"[H:MM] B:" turn prefix the model copied to the start of a quote, back to the
+full name, label and exact timestamp of the original. Nothing inside a quote
+or headline is rewritten: "Plan A:" or "[1:05]" may be exactly what was said.
+
+Usage:
+    python transcript_codec.py transcript.txt [more.txt ...] [--model gpt-4.1-mini] [--show]
+
+Prints the measured token savings of each transcript (and the encoded text
+with --show).
+"""
+import re
+import sys
+import string
+import argparse
+import logging
+from typing import Any, Dict, List, Optional
+
+from transcript_windows import split_utterances
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_ENCODING_FULL = "full"  # The transcript as labelled, one prefix per utterance
+TRANSCRIPT_ENCODING_COMPACT = "compact"  # Speaker legend, merged turns, coarse times
+
+LEGEND_NOTE = (
+    "(Compact transcript: each line is one speaker turn as 'CODE: text', and [H:MM] marks the minute a turn "
+    "starts. Always name speakers by the full names in this legend, never by their codes.)"
+)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_LABEL_RE = re.compile(r"^\s*\[(\d{1,2}):(\d{2}):(\d{2})\]\s*([^:\n]{1,80}?):\s*")
+_NAME_RE = re.compile(r"\(([^)]+)\)\s*$")
+
+
+def _speaker_code(index: int) -> str:
+    return string.ascii_uppercase[index] if index < 26 else f"S{index + 1}"
+
+
+def _coarse(seconds: int) -> str:
+    return f"[{seconds // 3600}:{seconds % 3600 // 60:02}]"
+
+
+def _exact(seconds: int) -> str:
+    return f"[{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}]"
+
+
+class EncodedTranscript:
+    """A transcript in the compact encoding, with what is needed to decode the model's references."""
+
+    def __init__(self, text: str, names: Dict[str, str], labels: Dict[str, str], turn_starts: Dict[tuple, int]):
+        self.text = text
+        self.names = names  # Code -> speaker name, e.g. "A" -> "Jane Doe"
+        self.labels = labels  # Code -> original label, e.g. "A" -> "Speaker A (Jane Doe)"
+        self.turn_starts = turn_starts  # (coarse time, code or None) -> exact start in seconds
+        codes = sorted(names, key=len, reverse=True)
+        # Only a turn prefix at the very start of the text, as copied from the start of an encoded line
+        self._prefix_re = (
+            re.compile(r"^(\s*)(?:\[(\d+):(\d{2})\]\s*)?(" + "|".join(map(re.escape, codes)) + r"):\s+")
+            if codes else None
+        )
+
+    @property
+    def applied(self) -> bool:
+        """False when the transcript had no speaker labels and was left as it was."""
+        return bool(self.names)
+
+    def _exact_time(self, hours: str, minutes: str, code: Optional[str] = None) -> Optional[str]:
+        coarse = f"[{int(hours)}:{minutes}]"
+        seconds = self.turn_starts.get((coarse, code), self.turn_starts.get((coarse, None)))
+        return _exact(seconds) if seconds is not None else None
+
+    def decode_speaker(self, value: Optional[str]) -> Optional[str]:
+        """Maps a bare speaker code (e.g. "B") to the speaker's name in capitals; other values pass through."""
+        if not value or not self.names:
+            return value
+        code = value.strip().upper()
+        return self.names[code].upper() if code in self.names else value
+
+    def decode_text(self, text: Optional[str]) -> Optional[str]:
+        """
+        Restores the full label (and exact time) of a turn prefix at the start of
+        text copied from the encoded transcript, e.g. "[0:01] B: We will..." to
+        "[00:01:10] Speaker B (Bob Roe): We will...". The rest of the text is
+        left exactly as it is.
+        """
+        if not text or not self.names:
+            return text
+
+        def _prefix(match):
+            space, hours, minutes, code = match.groups()
+            time = self._exact_time(hours, minutes, code) if hours is not None else None
+            return space + (f"{time} " if time else "") + f"{self.labels[code]}: "
+
+        return self._prefix_re.sub(_prefix, text, count=1)
+
+    def decode_bullets(self, bullets: List[Dict[str, Optional[str]]]) -> List[Dict[str, Optional[str]]]:
+        """Returns copies of the bullets with their speaker code and any leading turn prefix of the body decoded."""
+        if not self.names:
+            return bullets
+        decoded = []
+        for bullet in bullets:
+            bullet = dict(bullet)
+            if bullet.get("speaker_raw"):
+                bullet["speaker_raw"] = self.decode_speaker(bullet["speaker_raw"])
+            if bullet.get("body_raw"):
+                bullet["body_raw"] = self.decode_text(bullet["body_raw"])
+            decoded.append(bullet)
+        return decoded
+
+
+def encode_transcript(transcript_text: str) -> EncodedTranscript:
+    """
+    Encodes a labelled transcript compactly.
+
+    Args:
+        transcript_text: The transcript (plain or <p>-wrapped HTML), with
+            `[HH:MM:SS] Speaker:` labels.
+
+    Returns:
+        The EncodedTranscript. A transcript without speaker labels is
+        returned unchanged (with no legend).
+    """
+    codes: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    turn_starts: Dict[tuple, int] = {}
+    lines: List[str] = []
+    current = None  # Code of the turn being built
+    last_coarse = None
+
+    for utterance in split_utterances(transcript_text or ""):
+        text = _SPACE_RE.sub(" ", _TAG_RE.sub(" ", utterance.text)).strip()
+        match = _LABEL_RE.match(text)
+        if not match:
+            if text:
+                lines.append(text)
+                current = None
+            continue
+        hours, minutes, seconds, label = match.groups()
+        label = label.strip()
+        if label not in codes:
+            code = _speaker_code(len(codes))
+            codes[label] = code
+            name = _NAME_RE.search(label)
+            names[code] = (name.group(1) if name else label).strip()
+        code = codes[label]
+        start = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        coarse = _coarse(start)
+        spoken = text[match.end():]
+
+        if code == current and coarse == last_coarse:
+            lines[-1] += " " + spoken
+            continue
+        turn_starts.setdefault((coarse, code), start)
+        turn_starts.setdefault((coarse, None), start)
+        lines.append(f"{coarse} {code}: {spoken}" if coarse != last_coarse else f"{code}: {spoken}")
+        last_coarse = coarse
+        current = code
+
+    if not codes:
+        return EncodedTranscript(transcript_text, {}, {}, {})
+    legend = "SPEAKERS: " + "; ".join(f"{code} = {name}" for code, name in names.items())
+    text = legend + "\n" + LEGEND_NOTE + "\n\n" + "\n".join(lines)
+    labels = {code: label for label, code in codes.items()}
+    return EncodedTranscript(text, names, labels, turn_starts)
+
+
+def encode_for_prompt(transcript_text: str, encoding: str = TRANSCRIPT_ENCODING_FULL) -> str:
+    """Returns the transcript text to place in a prompt for the given encoding ("full" or "compact")."""
+    if encoding == TRANSCRIPT_ENCODING_COMPACT:
+        return encode_transcript(transcript_text).text
+    if encoding != TRANSCRIPT_ENCODING_FULL:
+        raise ValueError(f"Unknown transcript encoding: {encoding}")
+    return transcript_text
+
+
+def measure_savings(transcript_text: str, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Measures the prompt tokens the compact encoding saves on a transcript.
+
+    Returns:
+        full_tokens and compact_tokens of the transcript text, the tokens
+        spent on labels and markup in the full form (prefix_tokens, against
+        the bare spoken words), saved_tokens and saved_ratio.
+    """
+    from token_budget import count_tokens  # token_budget formats prompts, which use this module
+
+    bare = " ".join(
+        _LABEL_RE.sub("", _SPACE_RE.sub(" ", _TAG_RE.sub(" ", u.text)).strip())
+        for u in split_utterances(transcript_text)
+    )
+    full = count_tokens(transcript_text, model)
+    compact = count_tokens(encode_transcript(transcript_text).text, model)
+    return {
+        "full_tokens": full,
+        "compact_tokens": compact,
+        "prefix_tokens": max(full - count_tokens(bare, model), 0),
+        "saved_tokens": full - compact,
+        "saved_ratio": (full - compact) / full if full else 0.0,
+    }
+
+
+def describe_savings(savings: Dict[str, Any]) -> str:
+    """One-line summary of `measure_savings`."""
+    full = savings["full_tokens"] or 1
+    return (
+        f"{savings['full_tokens']:,} tokens as labelled ({savings['prefix_tokens'] / full:.0%} labels and markup), "
+        f"{savings['compact_tokens']:,} compact: saves {savings['saved_tokens']:,} ({savings['saved_ratio']:.0%})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the token savings of the compact transcript encoding.")
+    parser.add_argument("transcripts", nargs="+", help="Labelled transcript files")
+    parser.add_argument("--model", help="Model whose tokenizer to count with (default: ANALYSIS_MODEL)")
+    parser.add_argument("--show", action="store_true", help="Print the encoded transcripts")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    totals = {"full_tokens": 0, "compact_tokens": 0, "prefix_tokens": 0, "saved_tokens": 0}
+    for path in args.transcripts:
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        savings = measure_savings(text, args.model)
+        for key in totals:
+            totals[key] += savings[key]
+        print(f"{path}: {describe_savings(savings)}")
+        if args.show:
+            print(encode_transcript(text).text + "\n")
+    if len(args.transcripts) > 1:
+        totals["saved_ratio"] = totals["saved_tokens"] / totals["full_tokens"] if totals["full_tokens"] else 0.0
+        print(f"TOTAL: {describe_savings(totals)}")
+
+
+if __name__ == "__main__":
+    main()
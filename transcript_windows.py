@@ -0,0 +1,212 @@
+"""
+Module for splitting transcripts into windows for per-window LLM processing.
+
+Handles:
+- Splitting a transcript (plain or <p>-wrapped HTML) on utterance boundaries
+- Grouping utterances into fixed time windows with a small overlap
+- Merging per-window bullet lists back into one chronological, de-duplicated list
+
+Windows are laid out on a fixed time grid (0-W, W-2W, ...) rather than by
+text length, so editing the words of one utterance never moves the boundaries
+of the other windows.
+"""
+import re
+import hashlib
+import difflib
+from typing import List, Dict, Optional, Iterable
+
+# Constants
+DEFAULT_WINDOW_SECONDS = 900  # 15 minutes of audio per window
+DEFAULT_OVERLAP_SECONDS = 30  # Context repeated from the end of the previous window
+DEFAULT_MAX_CHARS = 40000  # Window size for transcripts without timestamps
+DUPLICATE_RATIO = 0.85  # Similarity above which two bullets count as the same
+
+_TIMESTAMP_RE = re.compile(r"\[(\d{1,2}):(\d{2}):(\d{2})\]")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_transcript(text: Optional[str]) -> str:
+    """
+    Transcript text without HTML tags or whitespace differences, for comparing versions.
+
+    The Step 2 editor turns the <p>-wrapped transcript into plain text and
+    wraps it again on Generate, which moves tags and adds blank lines without
+    changing a word; such versions normalize to the same text.
+    """
+    return _SPACE_RE.sub(" ", _TAG_RE.sub(" ", text or "")).strip()
+
+
+class Utterance:
+    """One timestamped turn of a transcript, kept verbatim (including any HTML tags)."""
+
+    def __init__(self, index: int, start_seconds: Optional[int], text: str):
+        self.index = index
+        self.start_seconds = start_seconds
+        self.text = text
+
+
+class TranscriptWindow:
+    """A contiguous run of utterances that is processed as one unit."""
+
+    def __init__(self, index: int, utterances: List[Utterance], start_seconds: Optional[int], end_seconds: Optional[int]):
+        self.index = index
+        self.utterances = utterances
+        self.start_seconds = start_seconds
+        self.end_seconds = end_seconds
+        self.text = "".join(u.text for u in utterances).strip()
+        # Keyed by the words, not the markup, so a re-wrapped but unedited window keeps its key
+        self.key = hashlib.sha1(normalize_transcript(self.text).encode("utf-8")).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"TranscriptWindow(index={self.index}, start={self.start_seconds}, end={self.end_seconds}, chars={len(self.text)})"
+
+
+def _to_seconds(match) -> int:
+    hours, minutes, seconds = (int(g) for g in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def split_utterances(transcript_text: str) -> List[Utterance]:
+    """
+    Splits a transcript into utterances, each starting at a `[HH:MM:SS]` timestamp.
+
+    Joining the `text` of every utterance gives back the original transcript.
+    Text before the first timestamp is attached to the first utterance. A
+    transcript with no timestamps is split on lines instead, with no times.
+    """
+    if not transcript_text:
+        return []
+
+    starts = [m.start() for m in _TIMESTAMP_RE.finditer(transcript_text)]
+    if not starts:
+        pieces = transcript_text.splitlines(keepends=True)
+        return [Utterance(i, None, piece) for i, piece in enumerate(pieces)]
+
+    starts[0] = 0
+    bounds = starts + [len(transcript_text)]
+    utterances = []
+    for i in range(len(starts)):
+        piece = transcript_text[bounds[i]:bounds[i + 1]]
+        match = _TIMESTAMP_RE.search(piece)
+        utterances.append(Utterance(i, _to_seconds(match) if match else None, piece))
+    return utterances
+
+
+def split_transcript_windows(
+    transcript_text: str,
+    window_seconds: int = DEFAULT_WINDOW_SECONDS,
+    overlap_seconds: int = DEFAULT_OVERLAP_SECONDS,
+    max_chars: int = DEFAULT_MAX_CHARS,
+) -> List[TranscriptWindow]:
+    """
+    Splits a transcript into windows on utterance boundaries.
+
+    Timestamped transcripts are bucketed by utterance start time into
+    consecutive `window_seconds` slots. Each window also repeats the utterances
+    from the last `overlap_seconds` of the previous slot, so statements that
+    straddle a boundary keep their context. Transcripts without timestamps are
+    cut every `max_chars` characters with a one-line overlap.
+
+    Args:
+        transcript_text: The transcript to split.
+        window_seconds: Length of each time slot.
+        overlap_seconds: Trailing context carried into the next window.
+        max_chars: Window size for transcripts without timestamps.
+
+    Returns:
+        The windows in chronological order. Empty slots are skipped.
+    """
+    utterances = split_utterances(transcript_text)
+    if not utterances:
+        return []
+
+    if all(u.start_seconds is None for u in utterances):
+        return _split_by_chars(utterances, max_chars)
+
+    # Untimed pieces inherit the previous utterance's time
+    slots: Dict[int, List[Utterance]] = {}
+    last_time = 0
+    times = []
+    for u in utterances:
+        if u.start_seconds is not None:
+            last_time = u.start_seconds
+        times.append(last_time)
+        slots.setdefault(last_time // window_seconds, []).append(u)
+
+    windows = []
+    for slot in sorted(slots):
+        slot_start = slot * window_seconds
+        members = slots[slot]
+        first = members[0].index
+        # Pull in the tail of the previous slot as overlap
+        overlap = []
+        j = first - 1
+        while j >= 0 and times[j] >= slot_start - overlap_seconds:
+            overlap.insert(0, utterances[j])
+            j -= 1
+        windows.append(TranscriptWindow(
+            len(windows), overlap + members, slot_start, slot_start + window_seconds
+        ))
+    return windows
+
+
+def _split_by_chars(utterances: List[Utterance], max_chars: int) -> List[TranscriptWindow]:
+    """Fallback windowing for transcripts without timestamps."""
+    windows = []
+    current: List[Utterance] = []
+    size = 0
+    for u in utterances:
+        if current and size + len(u.text) > max_chars:
+            windows.append(TranscriptWindow(len(windows), current, None, None))
+            current = [current[-1]]  # One line of overlap
+            size = len(current[0].text)
+        current.append(u)
+        size += len(u.text)
+    if current:
+        windows.append(TranscriptWindow(len(windows), current, None, None))
+    return windows
+
+
+def _normalize(text: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", re.sub(r"\s+", " ", (text or "").lower())).strip()
+
+
+def _is_duplicate(a: Dict[str, Optional[str]], b: Dict[str, Optional[str]]) -> bool:
+    """Two bullets are duplicates when their bodies or headlines (nearly) match."""
+    for field in ("body_raw", "headline_raw"):
+        x, y = _normalize(a.get(field)), _normalize(b.get(field))
+        if not x or not y:
+            continue
+        if x == y:
+            return True
+        shorter, longer = sorted((x, y), key=len)
+        if len(shorter) >= 20 and shorter in longer:
+            return True
+        if difflib.SequenceMatcher(None, x, y).ratio() >= DUPLICATE_RATIO:
+            return True
+    return False
+
+
+def merge_window_bullets(
+    per_window: Iterable[List[Dict[str, Optional[str]]]],
+    max_bullets: Optional[int] = None,
+    lookback: int = 15,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Merges per-window bullet lists into one chronological list.
+
+    Windows must be given in chronological order. A bullet is dropped when it
+    duplicates one of the last `lookback` kept bullets, which catches repeats
+    from the overlap between neighbouring windows without an all-pairs
+    comparison. The result is capped at `max_bullets`.
+    """
+    merged: List[Dict[str, Optional[str]]] = []
+    for bullets in per_window:
+        for bullet in bullets or []:
+            if any(_is_duplicate(bullet, kept) for kept in merged[-lookback:]):
+                continue
+            merged.append(bullet)
+            if max_bullets is not None and len(merged) >= max_bullets:
+                return merged
+    return merged